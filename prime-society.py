@@ -16,14 +16,26 @@ except ImportError:
    TORCH_AVAILABLE = False
 import pickle
 import zlib
+import lzma
+import bz2
+import io
+import shutil
+import hashlib
 import heapq
 import uuid
 import argparse
 import logging
+import logging.handlers
+import atexit
 import json
 import math
+import threading
+import traceback
+import queue
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections import defaultdict, deque
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import Dict, List, Set, Tuple, Optional, Any
 from enum import Enum
@@ -97,10 +109,16 @@ COMPETENCY_SALARY_WEIGHT = 0.04
 KNOWLEDGE_SALARY_BONUS = 2.5
 JOB_SWITCH_THRESHOLD = 0.15
 JOB_SWITCH_COOLDOWN_DAYS = 30
+JOB_SEARCH_SAMPLE_FRACTION = 1.0  # share of unemployed adults searching each day
+JOB_SWITCH_SAMPLE_FRACTION = 0.2  # share of employed adults considering a switch each day
+LABOR_MARKET_SEARCH_DEPTH = 5  # open vacancies compared per candidate
+LABOR_MARKET_CROSS_REGION = True  # search other regions when no local vacancy fits
 MIGRATION_BASE_RATE = 0.002
 MIGRATION_COST_BASE = 20.0
 MIGRATION_COOLDOWN_DAYS = 90
 MIGRATION_OPPORTUNITY_THRESHOLD = 0.05
+MIGRATION_SAMPLE_FRACTION = 0.3  # share of adults weighing a move each day
+MIGRATION_TOP_REGIONS = 5  # destinations drawn from the best-scoring regions
 DAILY_LOCAL_MOVE_RATE = 0.35
 DAILY_DISTRICT_MOVE_RATE = 0.05
 COMPANY_DISTRESS_DEBT_FACTOR = 10
@@ -110,6 +128,8 @@ COMPANY_RESTRUCTURE_PAY_RATIO = 0.55
 COMPANY_RESTRUCTURE_MIN_EMPLOYEES = 1
 COMPANY_RESTRUCTURE_LAYOFF_SHARE = 0.2
 COMPANY_COMPETITION_CAPITAL_FRACTION = 0.25
+COMPANY_MAX_PRODUCT = 19  # highest number companies consider producing
+PRODUCT_MENU_CACHE_SIZE = 4096  # distinct knowledge signatures kept
 
 # Cultural Dynamics Parameters
 CULTURE_DIM = 50
@@ -123,6 +143,8 @@ TRAIT_INHERITANCE_VARIANCE = 20
 TRAIT_MUTATION_RATE = 0.1
 RELATIONSHIP_DISTANCE_THRESHOLD = 3  # cells
 RELATIONSHIP_DECAY = 0.01  # per day without interaction
+RELATIONSHIP_DEGREE_CAP = 32  # ties kept per person; the weakest is evicted when full
+RELATIONSHIP_PRUNE_THRESHOLD = 0.5  # ties decayed below this strength are dropped
 CHILD_COST = 5  # total cost to raise a child (to do: define value meaning)
 MIN_REPRODUCTION_AGE = 16
 MAX_REPRODUCTION_AGE = 55
@@ -156,6 +178,12 @@ ELECTION_CYCLES = {
    'region': 1095
 }
 CORRUPTION_THRESHOLD = 70  # trait value above which corruption likely
+ELECTION_MAX_CANDIDATES = 5  # candidates per constituency
+ELECTION_VOTERS_PER_CANDIDATE = 20  # one candidate slot per this many voters
+ELECTION_MIN_VOTERS = 3  # smaller constituencies hold no election
+ELECTION_ABSTENTION_RATE = 0.2
+ELECTION_CHUNK_SIZE = 65536  # voters scored per vectorized batch
+QUARTER_CELLS = 5  # a quarter is a QUARTER_CELLS x QUARTER_CELLS block of cells
 
 # Early Simulation Support
 STARTUP_WELLBEING_DAYS = 120
@@ -173,6 +201,9 @@ SURVIVAL_WORK_GAIN = 6.0
 MEME_SPREAD_BASE_RATE = 0.5
 MEME_DECAY_RATE = 0.05
 MEME_MUTATION_CHANCE = 0.05
+MEME_CONTACTS_PER_CARRIER = 3  # spread attempts per carrier per day
+MEME_CONTACT_RADIUS = 2  # cells
+MEME_SPREAD_CHUNK_SIZE = 65536  # carriers processed per vectorized batch
 
 # Visualization Parameters
 ENABLE_GRAPHS = False
@@ -190,7 +221,10 @@ PYGAME_MAX_VISIBLE_COMPANIES = 400
 ENABLE_REGION_MULTITHREADING = True
 REGION_THREAD_WORKERS = max(2, min(16, os.cpu_count() or 4))
 MIN_PARALLEL_PEOPLE = 500
-MIN_PARALLEL_COMPANIES = 50
+COMPACTION_INTERVAL_DAYS = 7  # days between batch purges of dead agents
+COMPACTION_TOMBSTONE_FRACTION = 0.01  # compact early once this share of the population is tombstoned
+STATS_MEMORY_DAYS = 20000  # daily samples kept in memory per series
+STATS_SPILL_DIR = None  # spill older samples to disk here instead of dropping them
 
 BITMAP_FONT_5X7 = {
    'A': ["01110", "10001", "10001", "11111", "10001", "10001", "10001"],
@@ -238,12 +272,39 @@ BITMAP_FONT_5X7 = {
 }
 
 # Checkpoint Parameters
-CHECKPOINT_FREQUENCY = 1000  # days
+CHECKPOINT_FREQUENCY = 1000  # days between full checkpoints
+DELTA_CHECKPOINT_FREQUENCY = 50  # days between delta checkpoints against the last full one (0 disables)
 MAX_CHECKPOINTS = 1000
 AUTO_SAVE = True
 CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_FORMAT = "prime-society-columnar"
+CHECKPOINT_VERSION = 3
+CHECKPOINT_CODEC = "zlib"  # zlib, lzma, bz2, or none (uncompressed, memory-mapped on load)
+CHECKPOINT_LEVEL = 3  # compression level, 0-9 (bz2 uses at least 1)
+CHECKPOINT_CHUNK_SIZE = 4 * 1024 * 1024  # bytes per independently compressed chunk
+CHECKPOINT_COMPRESSION_WORKERS = max(1, min(8, os.cpu_count() or 1))
+CHECKPOINT_CODECS = ('zlib', 'lzma', 'bz2', 'none')
+ASYNC_CHECKPOINTS = True  # write auto-saves on a background thread
+CHECKPOINT_QUEUE_SIZE = 2  # snapshots waiting to be written before saves block
+BRANCH_DAYS = 365  # days each what-if branch runs
+BRANCH_METRICS = ('population', 'gdp', 'gini', 'happiness', 'knowledge')
+
+# Death Archive Parameters
+ENABLE_DEATH_ARCHIVE = True
+DEATH_ARCHIVE_DIR = "archive"
+DEATH_ARCHIVE_BATCH = 4096  # records buffered before an append to disk
+DYNASTY_SAMPLE_DAYS = 30  # days between dynasty metric samples
+DYNASTY_MIN_DESCENDANTS = 5
+
+# Event Journal Parameters
+ENABLE_EVENT_JOURNAL = False
+EVENT_JOURNAL_DIR = "journal"
+EVENT_JOURNAL_BATCH = 8192  # records buffered before a write
+EVENT_JOURNAL_ROTATE_BYTES = 64 * 1024 * 1024  # part file size before starting the next part
 
 # Logging Configuration
+LOG_FILE = "prime_society.log"  # None disables the log file
+LOG_ASYNC = True  # hand records to a background listener thread instead of writing inline
 CURRENT_DAY = 0
 GLOBAL_SEED = None
 
@@ -273,17 +334,94 @@ class DayFilter(logging.Filter):
            record.day = CURRENT_DAY
        return True
 
-logging.basicConfig(
-   level=logging.INFO,
-   format='[Day %(day)d] %(levelname)s: %(message)s',
-   handlers=[
-       logging.StreamHandler(),
-       logging.FileHandler('prime_society.log')
-   ]
-)
-for handler in logging.getLogger().handlers:
-   handler.addFilter(DayFilter())
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+   """Queue handler that leaves formatting to the listener thread.
+
+   Records never leave the process, so they can be queued as they are
+   instead of being formatted up front by QueueHandler.prepare.
+   """
+
+   def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+       return record
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(log_file: Optional[str] = LOG_FILE, async_logging: bool = LOG_ASYNC,
+                      level: int = logging.INFO):
+   """Install console and file handlers, behind a QueueListener when async."""
+   global _log_listener
+   root = logging.getLogger()
+   stop_log_listener()
+   _log_listener = None
+   for handler in root.handlers[:]:
+       root.removeHandler(handler)
+       handler.close()
+   formatter = logging.Formatter('[Day %(day)d] %(levelname)s: %(message)s')
+   handlers: List[logging.Handler] = [logging.StreamHandler()]
+   if log_file:
+       os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+       handlers.append(logging.FileHandler(log_file, delay=True))
+   for handler in handlers:
+       handler.setFormatter(formatter)
+   if async_logging:
+       # The day is stamped by the filter on the simulation thread, before queueing
+       queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+       queue_handler.addFilter(DayFilter())
+       root.addHandler(queue_handler)
+       _log_listener = logging.handlers.QueueListener(queue_handler.queue, *handlers)
+       _log_listener.start()
+   else:
+       for handler in handlers:
+           handler.addFilter(DayFilter())
+           root.addHandler(handler)
+   root.setLevel(level)
+
+def stop_log_listener():
+   """Drain queued records and stop the listener thread."""
+   if _log_listener is not None and _log_listener._thread is not None:
+       _log_listener.stop()
+
+def inline_logging():
+   """Write through the listener's handlers directly, e.g. in a forked child that has no listener thread."""
+   root = logging.getLogger()
+   for handler in root.handlers[:]:
+       if isinstance(handler, DeferredQueueHandler):
+           root.removeHandler(handler)
+           for target in _log_listener.handlers if _log_listener else ():
+               target.addFilter(DayFilter())
+               root.addHandler(target)
+
+def start_log_listener():
+   """Restart a listener paused by stop_log_listener (e.g. around os.fork)."""
+   if _log_listener is not None and _log_listener._thread is None:
+       _log_listener.start()
+
+class DailyEventLog:
+   """Per-category event counters, logged as one summary line per day.
+
+   Per-agent events (deaths, births, bankruptcies, prime discoveries) are
+   counted here instead of logging a line each; the detail stays available
+   at DEBUG level.
+   """
+
+   def __init__(self):
+       self.counts: Dict[str, int] = defaultdict(int)
+       self.lock = threading.Lock()
+
+   def count(self, category: str, amount: int = 1):
+       with self.lock:
+           self.counts[category] += amount
+
+   def flush(self, day: int):
+       with self.lock:
+           counts, self.counts = self.counts, defaultdict(int)
+       if counts and logger.isEnabledFor(logging.INFO):
+           logger.info("Day %d events: %s", day, ", ".join(f"{name} {n}" for name, n in sorted(counts.items())))
+
+configure_logging()
+atexit.register(stop_log_listener)
 logger = logging.getLogger(__name__)
+event_log = DailyEventLog()
 
 # ============= UTILITY FUNCTIONS =============
 
@@ -360,6 +498,43 @@ def calculate_efficiency(n: int) -> float:
        return 0
    return calculate_nutrition(n) / weight
 
+_PRODUCT_TABLE: List[Tuple[int, frozenset, float]] = []
+_PRODUCT_WEIGHTS = np.zeros(0, dtype=float)
+_PRODUCT_MENU_CACHE: Dict[frozenset, List[Tuple[int, float]]] = {}
+_PRODUCT_TABLE_GENERATION = 0  # bumped on every rebuild; menus cached elsewhere compare against it
+
+def _ensure_product_table() -> int:
+   """(Re)build the static product table when COMPANY_MAX_PRODUCT changes; returns its generation"""
+   global _PRODUCT_WEIGHTS, _PRODUCT_TABLE_GENERATION
+   if len(_PRODUCT_TABLE) == COMPANY_MAX_PRODUCT - 1:
+       return _PRODUCT_TABLE_GENERATION
+   _PRODUCT_TABLE[:] = [
+       (n, frozenset(factorize(n)), calculate_efficiency(n))
+       for n in range(2, COMPANY_MAX_PRODUCT + 1)
+   ]
+   _PRODUCT_WEIGHTS = np.array([0.0] + [calculate_weight(n) for n in range(1, COMPANY_MAX_PRODUCT + 1)])
+   _PRODUCT_MENU_CACHE.clear()
+   _PRODUCT_TABLE_GENERATION += 1
+   return _PRODUCT_TABLE_GENERATION
+
+def get_product_weights() -> np.ndarray:
+   """Weight lookup indexed by number for 0..COMPANY_MAX_PRODUCT (0 maps to 0)"""
+   _ensure_product_table()
+   return _PRODUCT_WEIGHTS
+
+def get_product_menu(known_primes: Set[int]) -> List[Tuple[int, float]]:
+   """Producible (number, efficiency) pairs for a knowledge set, cached per signature"""
+   _ensure_product_table()
+   signature = frozenset(known_primes)
+   menu = _PRODUCT_MENU_CACHE.get(signature)
+   if menu is not None:
+       return menu
+   menu = [(n, efficiency) for n, factors, efficiency in _PRODUCT_TABLE if factors <= signature]
+   if len(_PRODUCT_MENU_CACHE) >= PRODUCT_MENU_CACHE_SIZE:
+       _PRODUCT_MENU_CACHE.clear()
+   _PRODUCT_MENU_CACHE[signature] = menu
+   return menu
+
 # ============= PERSONALITY TRAITS =============
 
 class Trait(Enum):
@@ -375,6 +550,16 @@ class Trait(Enum):
    CONSERVATIVE_PROGRESSIVE = "conservative_progressive"  # -100 conservative, +100 progressive
    MATERIALIST_SPIRITUAL = "materialist_spiritual"  # -100 materialist, +100 spiritual
 
+TRAIT_ORDER: List[Trait] = list(Trait)
+for _column, _trait in enumerate(TRAIT_ORDER):
+   _trait.column = _column  # position in the population trait matrix
+
+GENE_NAMES = ['nutrition_efficiency', 'starvation_resistance', 'health_resilience']
+
+def compatibility_distance(traits_a: np.ndarray, traits_b: np.ndarray) -> np.ndarray:
+   """Mean absolute trait difference between broadcastable trait arrays (last axis = traits)"""
+   return np.abs(traits_a - traits_b).mean(axis=-1)
+
 # ============= CORE CLASSES =============
 
 @dataclass
@@ -401,8 +586,9 @@ class Location:
 class Person:
    """Individual agent in the simulation"""
    
-   def __init__(self, traits: Dict[Trait, float] = None, parents: Tuple['Person', 'Person'] = None):
-       self.id = str(uuid.uuid4())
+   def __init__(self, traits: Dict[Trait, float] = None, parents: Tuple['Person', 'Person'] = None,
+                genetics: Dict[str, float] = None, location: 'Location' = None, person_id: str = None):
+       self.id = person_id or str(uuid.uuid4())
        self.age = 0
        self.birth_day = 0
        self.death_day = None
@@ -419,10 +605,8 @@ class Person:
            self.traits = self._random_traits()
 
        # Genetics
-       if parents:
-           genetics = self._inherit_genetics(parents)
-       else:
-           genetics = self._random_genetics()
+       if not genetics:
+           genetics = self._inherit_genetics(parents) if parents else self._random_genetics()
        self.nutrition_efficiency = genetics['nutrition_efficiency']
        self.starvation_resistance = genetics['starvation_resistance']
        self.health_resilience = genetics['health_resilience']
@@ -453,14 +637,13 @@ class Person:
        expectancy = max(50, min(MAX_AGE, expectancy))
        self.life_expectancy_days = int(expectancy * 365)
        
-       # Relationships
-       self.relationships: Dict[str, float] = {}  # person_id -> relationship strength
+       # Relationships (tie strengths live in World.relationships)
        self.family: Dict[str, str] = {}  # role -> person_id
        self.employer: Optional['Company'] = None
        self.salary = 0.0
        
        # Location and property
-       self.location = Location(
+       self.location = location or Location(
            region=random.randint(0, WORLD_REGIONS-1),
            district=random.randint(0, DISTRICTS_PER_REGION-1),
            cell_x=random.randint(0, 9),
@@ -563,8 +746,14 @@ class Person:
 
        difficulty = get_prime_position(next_prime) ** 2
        if self.learning_progress[next_prime] >= difficulty:
-           self.known_primes.add(next_prime)
+           self.learn_prime(next_prime)
            del self.learning_progress[next_prime]
+
+   def learn_prime(self, prime: int):
+       """Add a prime to known primes and report it to the employer."""
+       self.known_primes.add(prime)
+       if self.employer:
+           self.employer.note_employee_learned(self, prime)
    
    def age_up(self):
        """Age by one day"""
@@ -586,7 +775,8 @@ class Person:
        """Handle death"""
        self.is_alive = False
        self.death_day = self.age
-       logger.info(f"Person {self.id} died at age {self.age/365:.1f}")
+       event_log.count('deaths')
+       logger.debug("Person %s died at age %.1f", self.id, self.age / 365)
    
    def daily_routine(self, world: 'World'):
        """Execute daily activities"""
@@ -630,7 +820,7 @@ class Person:
            self.study()
        
        # Update happiness
-       self.update_happiness()
+       self.update_happiness(world)
 
    def survival_work(self):
        """Do subsistence work when hungry and unemployed."""
@@ -693,9 +883,9 @@ class Person:
        # Check if learned
        difficulty = get_prime_position(next_prime) ** 2
        if self.learning_progress[next_prime] >= difficulty:
-           self.known_primes.add(next_prime)
+           self.learn_prime(next_prime)
            del self.learning_progress[next_prime]
-           logger.debug(f"Person {self.id} learned prime {next_prime}")
+           logger.debug("Person %s learned prime %d", self.id, next_prime)
    
    def socialize(self, world: 'World'):
        """Interact with nearby people"""
@@ -703,30 +893,22 @@ class Person:
            return
        
        # Find nearby people
-       nearby = world.get_nearby_people(self.location, RELATIONSHIP_DISTANCE_THRESHOLD)
+       nearby = [other for other in world.get_nearby_people(self.location, RELATIONSHIP_DISTANCE_THRESHOLD)[:5]
+                 if other.id != self.id]  # Interact with up to 5 people
+       if not nearby:
+           return
+       own_row = world.population.index[self.id]
+       compatibilities = world.population.compatibility(own_row, world.population.rows(nearby))
        
-       for other in nearby[:5]:  # Interact with up to 5 people
-           if other.id == self.id:
-               continue
-           
+       for other, compatibility in zip(nearby, compatibilities):
            # Update relationship
-           compatibility = self.calculate_compatibility(other)
-           if other.id not in self.relationships:
-               self.relationships[other.id] = 0
-           
-           self.relationships[other.id] += compatibility * 0.1
-           self.relationships[other.id] = max(-100, min(100, self.relationships[other.id]))
+           world.relationships.strengthen(self.id, other.id, float(compatibility) * 0.1, world.current_day)
            
            self.energy -= 2
            if self.energy <= 0:
                break
    
-   def calculate_compatibility(self, other: 'Person') -> float:
-       """Calculate compatibility with another person"""
-       trait_diff = sum(abs(self.traits[t] - other.traits[t]) for t in Trait)
-       return 100 - (trait_diff / len(Trait))
-   
-   def update_happiness(self):
+   def update_happiness(self, world: 'World'):
        """Update happiness based on current state"""
        base = 50
        
@@ -736,7 +918,7 @@ class Person:
        stress_factor = -self.stress * 0.3
        
        # Social satisfaction
-       relationship_quality = sum(self.relationships.values()) / max(1, len(self.relationships))
+       relationship_quality = world.relationships.average_strength(self.id, world.current_day)
        social_factor = relationship_quality * 0.2
        
        # Economic satisfaction
@@ -767,6 +949,42 @@ class Person:
        if not hasattr(self, 'last_migration_day'):
            self.last_migration_day = 0
 
+COMPANY_KNOWLEDGE_LOCK = threading.Lock()
+
+class EmployeeRoster(Sequence):
+   """Index-addressable employee set with O(1) add and swap-remove"""
+
+   def __init__(self, people: List[Person] = None):
+       self._items: List[Person] = []
+       self._index: Dict[str, int] = {}
+       for person in people or []:
+           self.add(person)
+
+   def __len__(self) -> int:
+       return len(self._items)
+
+   def __getitem__(self, index):
+       return self._items[index]
+
+   def __iter__(self):
+       return iter(self._items)
+
+   def __contains__(self, person) -> bool:
+       return getattr(person, 'id', None) in self._index
+
+   def add(self, person: Person):
+       if person.id in self._index:
+           return
+       self._index[person.id] = len(self._items)
+       self._items.append(person)
+
+   def remove(self, person: Person):
+       index = self._index.pop(person.id)
+       last = self._items.pop()
+       if last is not person:
+           self._items[index] = last
+           self._index[last.id] = index
+
 class Company:
    """Economic entity that employs people and produces goods"""
    
@@ -789,12 +1007,19 @@ class Company:
        self.inventory: Dict[int, float] = {}  # number -> quantity
        
        # Employees
-       self.employees: List[Person] = [founder]
+       self.employees = EmployeeRoster([founder])
        founder.employer = self
        self.is_bankrupt = False
+       self.payroll = founder.salary
+       event_journal.record('founding', self.id, founder.id, self.location.region, self.capital)
+       event_journal.record('hire', founder.id, self.id, value=founder.salary)
        
-       # Knowledge
-       self.collective_knowledge: Set[int] = founder.known_primes.copy()
+       # Knowledge: per-prime count of employees contributing it
+       self._product_menu: Optional[Tuple[int, List[Tuple[int, float]]]] = None  # (table generation, menu)
+       self.collective_knowledge: Set[int] = set()
+       self.knowledge_counts: Dict[int, int] = {}
+       self._counted_primes: Dict[str, Set[int]] = {}
+       self._add_employee_knowledge(founder)
        
        # Production
        self.production_targets: List[int] = []
@@ -811,10 +1036,52 @@ class Company:
        self.distress_days = 0
    
    def update_collective_knowledge(self):
-       """Update company's collective knowledge from employees"""
+       """Rebuild company's collective knowledge from employees"""
+       self._product_menu = None
        self.collective_knowledge = set()
+       self.knowledge_counts = {}
+       self._counted_primes = {}
        for employee in self.employees:
-           self.collective_knowledge.update(employee.known_primes)
+           self._add_employee_knowledge(employee)
+
+   def _add_employee_knowledge(self, person: Person):
+       counted = set(person.known_primes)
+       self._counted_primes[person.id] = counted
+       for prime in counted:
+           self.knowledge_counts[prime] = self.knowledge_counts.get(prime, 0) + 1
+           if prime not in self.collective_knowledge:
+               self.collective_knowledge.add(prime)
+               self._product_menu = None
+
+   def _remove_employee_knowledge(self, person: Person):
+       for prime in self._counted_primes.pop(person.id, ()):
+           remaining = self.knowledge_counts[prime] - 1
+           if remaining > 0:
+               self.knowledge_counts[prime] = remaining
+           else:
+               del self.knowledge_counts[prime]
+               self.collective_knowledge.discard(prime)
+               self._product_menu = None
+
+   def note_employee_learned(self, person: Person, prime: int):
+       """Count a prime an employee learned while on staff."""
+       # Employees may study in another region's worker thread.
+       with COMPANY_KNOWLEDGE_LOCK:
+           counted = self._counted_primes.get(person.id)
+           if counted is None or prime in counted:
+               return
+           counted.add(prime)
+           self.knowledge_counts[prime] = self.knowledge_counts.get(prime, 0) + 1
+           if prime not in self.collective_knowledge:
+               self.collective_knowledge.add(prime)
+               self._product_menu = None
+
+   def product_menu(self) -> List[Tuple[int, float]]:
+       """Producible (number, efficiency) pairs for the current collective knowledge."""
+       generation = _ensure_product_table()
+       if self._product_menu is None or self._product_menu[0] != generation:
+           self._product_menu = (generation, get_product_menu(self.collective_knowledge))
+       return self._product_menu[1]
    
    def can_produce(self, number: int) -> bool:
        """Check if company can produce a number given employee knowledge"""
@@ -857,22 +1124,28 @@ class Company:
        if person.employer:
            person.employer.fire(person)
        
-       self.employees.append(person)
+       self.employees.add(person)
        person.employer = self
        person.salary = salary
-       self.update_collective_knowledge()
+       self.payroll += salary
+       self._add_employee_knowledge(person)
+       event_journal.record('hire', person.id, self.id, value=salary)
    
    def fire(self, person: Person):
        """Fire an employee"""
        if person in self.employees:
+           event_journal.record('fire', person.id, self.id, value=person.salary)
            self.employees.remove(person)
+           self.payroll -= person.salary
+           if not self.employees:
+               self.payroll = 0.0
            person.employer = None
            person.salary = 0
-           self.update_collective_knowledge()
+           self._remove_employee_knowledge(person)
 
    def total_salary_bill(self) -> float:
        """Current total payroll obligation."""
-       return sum(e.salary for e in self.employees)
+       return self.payroll
 
    def debt_limit(self) -> float:
        """Debt floor before mandatory bankruptcy."""
@@ -936,7 +1209,9 @@ class Company:
    
    def bankruptcy(self):
        """Handle company bankruptcy"""
-       logger.info(f"Company {self.name} went bankrupt")
+       event_log.count('bankruptcies')
+       logger.debug("Company %s went bankrupt", self.name)
+       event_journal.record('bankruptcy', self.id, self.founder_id, len(self.employees), self.capital)
        for employee in self.employees[:]:
            self.fire(employee)
        self.capital = 0
@@ -954,6 +1229,12 @@ class Company:
            self.last_funding_day = -INVESTMENT_COOLDOWN_DAYS
        if not hasattr(self, 'distress_days'):
            self.distress_days = 0
+       if not hasattr(self, '_product_menu'):
+           self._product_menu = None
+       if not isinstance(self.employees, EmployeeRoster):
+           self.employees = EmployeeRoster(self.employees)
+           self.payroll = sum(e.salary for e in self.employees)
+           self.update_collective_knowledge()
 
    def estimate_stock_price(self) -> float:
        """Estimate a simple stock price from capital and size."""
@@ -961,6 +1242,52 @@ class Company:
        price = base / max(1.0, self.shares_outstanding)
        return max(0.5, price * (1 + self.reputation / 200))
 
+class CompanyLedger:
+   """Struct-of-arrays snapshot of company finances for bulk daily updates"""
+
+   def __init__(self, companies: List[Company]):
+       self.companies = companies
+       count = len(companies)
+       self.capital = np.zeros(count, dtype=float)
+       self.headcount = np.zeros(count, dtype=float)
+       self.payroll = np.zeros(count, dtype=float)
+       self.distress_days = np.zeros(count, dtype=np.int64)
+       self.reputation = np.zeros(count, dtype=float)
+       self.region = np.fromiter((c.location.region for c in companies), dtype=np.int64, count=count)
+       self.pull()
+
+   def pull(self, indices=None):
+       """Refresh rows from the company objects."""
+       for i in (range(len(self.companies)) if indices is None else indices):
+           company = self.companies[i]
+           self.capital[i] = company.capital
+           self.headcount[i] = len(company.employees)
+           self.payroll[i] = company.payroll
+           self.distress_days[i] = company.distress_days
+           self.reputation[i] = company.reputation
+
+   def push(self, indices=None):
+       """Write mutable rows back to the company objects."""
+       for i in (range(len(self.companies)) if indices is None else indices):
+           company = self.companies[i]
+           company.capital = float(self.capital[i])
+           company.distress_days = int(self.distress_days[i])
+           company.reputation = float(self.reputation[i])
+
+   def debt_limit(self) -> np.ndarray:
+       """Vectorized Company.debt_limit."""
+       payroll_floor = self.payroll * COMPANY_DISTRESS_DEBT_FACTOR
+       structural_floor = np.maximum(COMPANY_MIN_DEBT_LIMIT, self.headcount * 5.0)
+       return -np.maximum(payroll_floor, structural_floor)
+
+   def update_financial_distress(self):
+       """Vectorized Company.update_financial_distress."""
+       days = self.distress_days
+       self.distress_days = np.where(
+           self.capital < 0, days + 1,
+           np.where(self.capital > 0, np.maximum(0, days - 2), np.maximum(0, days - 1))
+       )
+
 class Building:
    """Physical structure in the world"""
    
@@ -1011,7 +1338,7 @@ class Building:
 class Meme:
    """Cultural unit that spreads through population"""
    
-   def __init__(self, creator: Person, name: str = None):
+   def __init__(self, creator: Person, population: 'PopulationStore', name: str = None):
        self.id = str(uuid.uuid4())
        self.name = name or f"Meme_{self.id[:8]}"
        self.creator_id = creator.id
@@ -1024,49 +1351,1023 @@ class Meme:
        
        # Spread dynamics
        self.transmissibility = random.uniform(0.5, 1.5)
-       self.carriers: Set[str] = {creator.id}
-       self.immunity: Set[str] = set()
+       self.population = population
+       self.carriers = AgentSet(population, [creator.id])
+       self.immunity = AgentSet(population)
        
        # Metrics
        self.total_infections = 1
        self.peak_carriers = 1
+
+   def bind(self, population: 'PopulationStore'):
+       """Attach to a population store, converting id sets from older checkpoints."""
+       self.population = population
+       if not isinstance(self.carriers, AgentSet):
+           self.carriers = AgentSet(population, self.carriers)
+       if not isinstance(self.immunity, AgentSet):
+           self.immunity = AgentSet(population, self.immunity)
    
-   def spread(self, from_person: Person, to_person: Person) -> bool:
-       """Attempt to spread meme from one person to another"""
-       if to_person.id in self.carriers or to_person.id in self.immunity:
-           return False
-       
-       # Calculate spread probability
-       compatibility = 0
-       for trait, effect in self.trait_effects.items():
-           if effect * to_person.traits[trait] > 0:  # Same direction
-               compatibility += 0.1
-       
-       spread_prob = MEME_SPREAD_BASE_RATE * self.transmissibility * (1 + compatibility)
-       
-       if random.random() < spread_prob:
-           self.carriers.add(to_person.id)
-           self.total_infections += 1
-           
-           # Apply trait effects
-           for trait, effect in self.trait_effects.items():
-               to_person.traits[trait] += effect
-               to_person.traits[trait] = max(-100, min(100, to_person.traits[trait]))
-           
-           return True
-       
-       return False
+   def spread_to(self, rows: np.ndarray) -> int:
+       """Vectorized spread attempts towards population rows; returns the number of new carriers."""
+       carriers = self.carriers.fit()
+       immune = self.immunity.fit()
+       rows = rows[~carriers[rows] & ~immune[rows]]
+       if not len(rows):
+           return 0
+       traits = self.population.traits
+       spread_prob = MEME_SPREAD_BASE_RATE * self.transmissibility * (1 + self.receptivity(traits[rows]))
+       infected = np.unique(rows[np.random.random(len(rows)) < spread_prob])
+       if not len(infected):
+           return 0
+       carriers[infected] = True
+       self.total_infections += len(infected)
+
+       # Apply trait effects in bulk
+       if self.trait_effects:
+           columns = [trait.column for trait in self.trait_effects]
+           effects = np.array(list(self.trait_effects.values()), dtype=np.float32)
+           block = np.ix_(infected, columns)
+           traits[block] = np.clip(traits[block] + effects, -100, 100)
+       return len(infected)
    
+   def receptivity(self, traits: np.ndarray) -> np.ndarray:
+       """Compatibility bonus (0.1 per trait effect pointing the same way) for trait rows."""
+       if not self.trait_effects:
+           return np.zeros(traits.shape[:-1], dtype=np.float32)
+       columns = [trait.column for trait in self.trait_effects]
+       effects = np.array(list(self.trait_effects.values()), dtype=np.float32)
+       return 0.1 * ((traits[..., columns] * effects) > 0).sum(axis=-1)
+
    def decay(self):
        """Natural decay of meme spread"""
        if random.random() < MEME_DECAY_RATE:
-           if self.carriers:
-               lost_carrier = random.choice(list(self.carriers))
-               self.carriers.remove(lost_carrier)
-               self.immunity.add(lost_carrier)
+           rows = self.carriers.rows()
+           if len(rows):
+               lost_carrier = rows[random.randrange(len(rows))]
+               self.carriers.mask[lost_carrier] = False
+               self.immunity.fit()[lost_carrier] = True
+
+   def forget_row(self, row):
+       """Drop released population rows from carriers and immunity."""
+       self.carriers.discard_row(row)
+       self.immunity.discard_row(row)
+
+class StatsSeries:
+   """Growable float64 time series with prefix sums for O(1) rolling aggregates.
+
+   Once the buffer fills beyond STATS_MEMORY_DAYS samples, the oldest are
+   appended to `spill_path` when set, otherwise dropped. len(), indexing and
+   iteration cover the in-memory samples; `total` counts every sample recorded.
+   """
+
+   def __init__(self, values=(), spill_path: Optional[str] = None, capacity: int = 256):
+       self.spill_path = spill_path
+       self.offset = 0  # samples spilled or dropped before values[0]
+       self._values = np.zeros(max(1, capacity), dtype=np.float64)
+       self._prefix = np.zeros(max(1, capacity) + 1, dtype=np.float64)
+       self._size = 0
+       for value in values:
+           self.append(value)
+
+   def __getstate__(self):
+       state = self.__dict__.copy()
+       state['_values'] = self._values[:self._size].copy()
+       state['_prefix'] = self._prefix[:self._size + 1].copy()
+       return state
+
+   def __setstate__(self, state):
+       self.__dict__.update(state)
+
+   def append(self, value: float):
+       if self._size == len(self._values):
+           if self._size >= STATS_MEMORY_DAYS:
+               self._evict(self._size - STATS_MEMORY_DAYS // 2)
+           if self._size == len(self._values):
+               self._values = np.concatenate([self._values, np.zeros(max(16, len(self._values)))])
+               self._prefix = np.concatenate([self._prefix, np.zeros(len(self._values) - len(self._prefix) + 1)])
+       self._values[self._size] = value
+       self._prefix[self._size + 1] = self._prefix[self._size] + value
+       self._size += 1
+
+   def _evict(self, count: int):
+       """Move the oldest `count` samples out of memory."""
+       if self.spill_path:
+           os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+           with open(self.spill_path, 'ab') as f:
+               self._values[:count].tofile(f)
+       self._values[:self._size - count] = self._values[count:self._size]
+       self._prefix[:self._size - count + 1] = self._prefix[count:self._size + 1] - self._prefix[count]
+       self._size -= count
+       self.offset += count
+
+   @property
+   def values(self) -> np.ndarray:
+       """Read-only view of the in-memory samples."""
+       view = self._values[:self._size]
+       view.flags.writeable = False
+       return view
+
+   def days(self) -> np.ndarray:
+       """Sample index of each in-memory value."""
+       return np.arange(self.offset, self.offset + self._size)
+
+   def history(self) -> np.ndarray:
+       """All samples, including those spilled to disk."""
+       if self.spill_path and self.offset and os.path.exists(self.spill_path):
+           return np.concatenate([np.fromfile(self.spill_path, dtype=np.float64), self.values])
+       return self.values
+
+   def tail(self, window: int) -> np.ndarray:
+       return self.values[max(0, self._size - window):]
+
+   def last(self, default: float = 0.0) -> float:
+       return float(self._values[self._size - 1]) if self._size else default
+
+   def rolling_sum(self, window: int) -> float:
+       window = min(window, self._size)
+       return float(self._prefix[self._size] - self._prefix[self._size - window])
+
+   def rolling_mean(self, window: int) -> float:
+       window = min(window, self._size)
+       return self.rolling_sum(window) / window if window else 0.0
+
+   @property
+   def total(self) -> int:
+       return self.offset + self._size
+
+   def __len__(self) -> int:
+       return self._size
+
+   def __bool__(self) -> bool:
+       return self._size > 0
+
+   def __getitem__(self, key):
+       return self.values[key]
+
+   def __iter__(self):
+       return iter(self.values)
+
+DEATH_RECORD_DTYPE = np.dtype([
+   ('id', 'S16'),
+   ('parent1', 'S16'),
+   ('parent2', 'S16'),
+   ('birth_day', '<i4'),
+   ('death_day', '<i4'),
+   ('resources', '<f8'),
+   ('known_primes', '<i4'),
+])
+
+def encode_person_id(person_id: Optional[str]) -> bytes:
+   """Person UUID as 16 raw bytes (empty for no person)."""
+   return uuid.UUID(person_id).bytes if person_id else b''
+
+def decode_person_id(raw: bytes) -> str:
+   return str(uuid.UUID(bytes=bytes(raw).ljust(16, b'\0')))
+
+def new_death_archive_path() -> Optional[str]:
+   if not ENABLE_DEATH_ARCHIVE:
+       return None
+   stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+   return os.path.join(DEATH_ARCHIVE_DIR, f"deaths_{stamp}_{uuid.uuid4().hex[:8]}.bin")
+
+class DeathArchive:
+   """Append-only binary archive of deceased agents, written in batches.
+
+   Each record is a fixed-width DEATH_RECORD_DTYPE row. `count` is the number
+   of records on disk, so a checkpoint of this object knows where its history
+   ends.
+   """
+
+   def __init__(self, path: Optional[str]):
+       self.path = path
+       self.pending: List[Tuple] = []
+       self.count = 0
+
+   def record(self, person: 'Person', day: int):
+       if not self.path:
+           return
+       self.pending.append((
+           encode_person_id(person.id),
+           encode_person_id(person.family.get('parent1')),
+           encode_person_id(person.family.get('parent2')),
+           day - person.age,
+           day,
+           person.resources,
+           len(person.known_primes),
+       ))
+       if len(self.pending) >= DEATH_ARCHIVE_BATCH:
+           self.flush()
+
+   def flush(self):
+       """Append buffered records to the archive file."""
+       if not self.pending or not self.path:
+           return
+       batch = np.array(self.pending, dtype=DEATH_RECORD_DTYPE)
+       try:
+           os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+           with open(self.path, 'ab') as f:
+               batch.tofile(f)
+       except OSError as e:
+           logger.error(f"Failed to write death archive {self.path}: {e} - archiving disabled")
+           self.path = None
+           return
+       self.count += len(batch)
+       self.pending = []
+
+   def resume(self):
+       """Continue from a checkpointed state of this archive.
+
+       Records past `count` belong to later checkpoints of the same run, so
+       the first `count` records are copied to a new file instead of cutting
+       the shared one short.
+       """
+       self.pending = []
+       if not self.path or not os.path.exists(self.path):
+           return
+       itemsize = DEATH_RECORD_DTYPE.itemsize
+       available = os.path.getsize(self.path) // itemsize
+       if available == self.count:
+           return
+       if available < self.count:
+           logger.warning(f"Death archive {self.path} holds {available} of {self.count} records")
+           self.count = available
+       path = new_death_archive_path()
+       if path:
+           try:
+               os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+               with open(self.path, 'rb') as src, open(path, 'wb') as dst:
+                   remaining = self.count * itemsize
+                   while remaining:
+                       block = src.read(min(remaining, 1 << 20))
+                       dst.write(block)
+                       remaining -= len(block)
+           except OSError as e:
+               logger.error(f"Failed to copy death archive {self.path}: {e} - archiving disabled")
+               path = None
+       self.path = path
+
+   def reader(self) -> 'DeathArchiveReader':
+       self.flush()
+       return DeathArchiveReader(self.path)
+
+class DeathArchiveReader:
+   """Memory-mapped read access to a death archive."""
+
+   def __init__(self, path: Optional[str]):
+       if path and os.path.exists(path) and os.path.getsize(path) >= DEATH_RECORD_DTYPE.itemsize:
+           self.records = np.memmap(path, dtype=DEATH_RECORD_DTYPE, mode='r')
+       else:
+           self.records = np.zeros(0, dtype=DEATH_RECORD_DTYPE)
+
+   def __len__(self) -> int:
+       return len(self.records)
+
+# Kind codes are positions in this table; values describe the record fields per kind
+EVENT_KINDS = {
+   'birth': 'subject=child, other=parent1, number=region, value=child cost',
+   'death': 'subject=person, other=parent1, number=age in days, value=resources',
+   'hire': 'subject=person, other=company, value=salary',
+   'fire': 'subject=person, other=company, value=salary',
+   'trade': 'subject=buyer, other=seller, number=product, value=price, quantity=quantity',
+   'founding': 'subject=company, other=founder, number=region, value=capital',
+   'bankruptcy': 'subject=company, other=founder, number=employees, value=capital',
+   'migration': 'subject=person, number=destination region, value=cost, quantity=origin region',
+}
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_KINDS)}
+
+EVENT_RECORD_DTYPE = np.dtype([
+   ('day', '<i4'),
+   ('kind', 'u1'),
+   ('subject', 'S16'),
+   ('other', 'S16'),
+   ('number', '<i8'),
+   ('value', '<f8'),
+   ('quantity', '<f8'),
+])
+
+def new_event_journal_dir() -> str:
+   stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+   return os.path.join(EVENT_JOURNAL_DIR, f"events_{stamp}_{uuid.uuid4().hex[:8]}")
+
+class EventJournal:
+   """Optional binary journal of individual events (births, deaths, hires, trades...).
+
+   Records are fixed-width EVENT_RECORD_DTYPE rows, buffered in memory and
+   appended in batches to part_NNNN.bin files in the journal directory. A
+   new part is started once the current one reaches
+   EVENT_JOURNAL_ROTATE_BYTES. schema.json next to the parts describes the
+   layout, so the files can be read without the simulator.
+   """
+
+   def __init__(self, directory: Optional[str] = None):
+       self.directory = None
+       self.enabled = False
+       self.pending: List[Tuple] = []
+       self.lock = threading.Lock()
+       self.file = None
+       self.part = 0
+       self.part_bytes = 0
+       self.count = 0
+       if directory:
+           self.open(directory)
+
+   def open(self, directory: str):
+       """Start a journal in `directory`, closing any open one."""
+       self.close()
+       try:
+           os.makedirs(directory, exist_ok=True)
+           with open(os.path.join(directory, 'schema.json'), 'w') as f:
+               json.dump({'dtype': EVENT_RECORD_DTYPE.descr, 'kinds': EVENT_KINDS}, f, indent=2)
+       except OSError as e:
+           logger.error(f"Failed to create event journal {directory}: {e} - journal disabled")
+           return
+       self.directory = directory
+       self.enabled = True
+       self.part = 0
+       self.part_bytes = 0
+       self.count = 0
+       logger.info(f"Writing event journal to {directory}")
+
+   def record(self, kind: str, subject: Optional[str], other: Optional[str] = None,
+              number: int = 0, value: float = 0.0, quantity: float = 0.0):
+       if not self.enabled:
+           return
+       row = (CURRENT_DAY, EVENT_CODES[kind], encode_person_id(subject), encode_person_id(other),
+              number, value, quantity)
+       with self.lock:
+           self.pending.append(row)
+           full = len(self.pending) >= EVENT_JOURNAL_BATCH
+       if full:
+           self.flush()
+
+   def flush(self):
+       """Append buffered records to the current part file."""
+       with self.lock:
+           if not self.pending or not self.enabled:
+               return
+           batch = np.array(self.pending, dtype=EVENT_RECORD_DTYPE)
+           self.pending = []
+           try:
+               if self.file is None:
+                   path = os.path.join(self.directory, f"part_{self.part:04d}.bin")
+                   self.file = open(path, 'ab')
+               self.file.write(batch.tobytes())
+               self.file.flush()
+           except OSError as e:
+               logger.error(f"Failed to write event journal {self.directory}: {e} - journal disabled")
+               self.enabled = False
+               return
+           self.count += len(batch)
+           self.part_bytes += batch.nbytes
+           if self.part_bytes >= EVENT_JOURNAL_ROTATE_BYTES:
+               self.file.close()
+               self.file = None
+               self.part += 1
+               self.part_bytes = 0
+
+   def close(self):
+       self.flush()
+       with self.lock:
+           if self.file is not None:
+               self.file.close()
+               self.file = None
+           self.enabled = False
+
+   def detach(self):
+       """Stop journaling without touching the files, e.g. in a forked child."""
+       with self.lock:
+           self.pending = []
+           self.file = None
+           self.enabled = False
+
+   def reader(self) -> 'EventJournalReader':
+       self.flush()
+       return EventJournalReader(self.directory)
+
+class EventJournalReader:
+   """Iterates the records of an event journal directory (or a single part file), in order.
+
+   Parts are memory-mapped one at a time, so journals larger than memory
+   can be scanned.
+   """
+
+   def __init__(self, path: Optional[str], kinds: Optional[List[str]] = None, batch_size: int = 65536):
+       if path and os.path.isdir(path):
+           self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                               if name.startswith('part_') and name.endswith('.bin'))
+       else:
+           self.paths = [path] if path and os.path.exists(path) else []
+       self.codes = [EVENT_CODES[kind] for kind in kinds] if kinds else None
+       self.batch_size = batch_size
+
+   def batches(self):
+       """Yield structured arrays of at most batch_size records."""
+       for path in self.paths:
+           if os.path.getsize(path) < EVENT_RECORD_DTYPE.itemsize:
+               continue
+           records = np.memmap(path, dtype=EVENT_RECORD_DTYPE, mode='r')
+           for start in range(0, len(records), self.batch_size):
+               batch = records[start:start + self.batch_size]
+               if self.codes is not None:
+                   batch = batch[np.isin(batch['kind'], self.codes)]
+               if len(batch):
+                   yield batch
+
+   def __iter__(self):
+       """Yield one dict per record, with the kind name and decoded ids."""
+       kinds = list(EVENT_KINDS)
+       for batch in self.batches():
+           for row in batch.tolist():
+               day, code, subject, other, number, value, quantity = row
+               yield {
+                   'day': day,
+                   'kind': kinds[code],
+                   'subject': decode_person_id(subject) if subject else None,
+                   'other': decode_person_id(other) if other else None,
+                   'number': number,
+                   'value': value,
+                   'quantity': quantity,
+               }
+
+   def counts(self) -> Dict[str, int]:
+       """Number of records per kind."""
+       totals = np.zeros(len(EVENT_KINDS), dtype=np.int64)
+       for batch in self.batches():
+           totals += np.bincount(batch['kind'], minlength=len(EVENT_KINDS))[:len(EVENT_KINDS)]
+       return {kind: int(n) for kind, n in zip(EVENT_KINDS, totals) if n}
+
+event_journal = EventJournal()
+atexit.register(event_journal.close)
+
+class GenealogyIndex:
+   """Integer parent/child index over everyone ever added to the world.
+
+   Nodes are numbered in insertion order, so parents always precede their
+   children, and each node stores its generation (one more than its deepest
+   known parent). Dynasty founders are people without a recorded parent1;
+   a dynasty counts descendants through either parent, living or dead.
+   """
+
+   STATS_SCRATCH_BYTES = 32 * 1024 * 1024  # scratch memory per dynasty_stats block
+
+   def __init__(self, capacity: int = 1024):
+       self.node_of: Dict[str, int] = {}  # living people only
+       self.founder_ids: Dict[int, str] = {}
+       self.size = 0
+       self.parent1 = np.full(capacity, -1, dtype=np.int32)
+       self.parent2 = np.full(capacity, -1, dtype=np.int32)
+       self.generation = np.zeros(capacity, dtype=np.int32)
+       self.alive = np.zeros(capacity, dtype=bool)
+
+   def _grow(self):
+       old = len(self.generation)
+       self.parent1 = np.concatenate([self.parent1, np.full(old, -1, dtype=np.int32)])
+       self.parent2 = np.concatenate([self.parent2, np.full(old, -1, dtype=np.int32)])
+       self.generation = np.concatenate([self.generation, np.zeros(old, dtype=np.int32)])
+       self.alive = np.concatenate([self.alive, np.zeros(old, dtype=bool)])
+
+   def add(self, person: 'Person'):
+       if person.id not in self.node_of:
+           self._add_node(person.id, person.family.get('parent1'), person.family.get('parent2'), True)
+
+   def _add_node(self, person_id: str, parent1_id: Optional[str], parent2_id: Optional[str], alive: bool,
+                 nodes: Optional[Dict[str, int]] = None):
+       if self.size == len(self.generation):
+           self._grow()
+       nodes = self.node_of if nodes is None else nodes
+       node = self.size
+       self.size += 1
+       parent1 = nodes.get(parent1_id, -1)
+       parent2 = nodes.get(parent2_id, -1)
+       self.parent1[node] = parent1
+       self.parent2[node] = parent2
+       depth = int(self.generation[parent1]) + 1 if parent1 >= 0 else 0
+       if parent2 >= 0:
+           depth = max(depth, int(self.generation[parent2]) + 1)
+       self.generation[node] = depth
+       if parent1_id is None:
+           self.founder_ids[node] = person_id
+       self.alive[node] = alive
+       if alive:
+           self.node_of[person_id] = node
+       return node
+
+   def mark_dead(self, person_id: str):
+       node = self.node_of.pop(person_id, None)
+       if node is not None:
+           self.alive[node] = False
+
+   def dynasty_stats(self, people: Dict[str, 'Person']) -> Dict[str, np.ndarray]:
+       """Descendants, living wealth and mean living knowledge per founder node.
+
+       Dynasty membership is propagated generation by generation as bitsets
+       over a block of founders at a time, so a person descending from several
+       founders (through parent1 and parent2) counts in each of their dynasties.
+       Non-founder nodes report -1 descendants.
+       """
+       size = self.size
+       descendants = np.full(size, -1, dtype=np.int64)
+       wealth = np.zeros(size)
+       avg_knowledge = np.zeros(size)
+       founders = np.fromiter(self.founder_ids, dtype=np.int64, count=len(self.founder_ids))
+       if not size or not len(founders):
+           return {'descendants': descendants, 'wealth': wealth, 'avg_knowledge': avg_knowledge}
+
+       # Weights of living members; people missing from the index carry no lineage
+       nodes = [(self.node_of.get(p.id, -1), p) for p in people.values()]
+       nodes = [(node, p) for node, p in nodes if node >= 0]
+       resources = np.zeros(size)
+       knowledge = np.zeros(size)
+       living = np.zeros(size)
+       if nodes:
+           rows = np.fromiter((node for node, _ in nodes), dtype=np.int64, count=len(nodes))
+           resources[rows] = [p.resources for _, p in nodes]
+           knowledge[rows] = [len(p.known_primes) for _, p in nodes]
+           living[rows] = 1.0
+       weights = np.stack([np.ones(size), resources, knowledge, living], axis=1)
+
+       generation = self.generation[:size]
+       order = np.argsort(generation, kind='stable')
+       bounds = np.searchsorted(generation[order], np.arange(int(generation.max()) + 2))
+       levels = [order[bounds[g]:bounds[g + 1]] for g in range(1, len(bounds) - 1)]
+       parent1 = self.parent1[:size]
+       parent2 = self.parent2[:size]
+
+       words = max(1, min(-(-len(founders) // 64), self.STATS_SCRATCH_BYTES // (size * 8)))
+       for start in range(0, len(founders), words * 64):
+           block = founders[start:start + words * 64]
+           bits = np.arange(len(block))
+           mask = np.zeros((size, words), dtype=np.uint64)
+           mask[block, bits // 64] = np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64))
+           for level in levels:
+               for parents in (parent1[level], parent2[level]):
+                   known = parents >= 0
+                   mask[level[known]] |= mask[parents[known]]
+
+           # Per-founder sums over member rows, unpacked a chunk of rows at a time
+           members = np.flatnonzero(mask.any(axis=1))
+           totals = np.zeros((4, words * 64))
+           chunk = max(1, self.STATS_SCRATCH_BYTES // (words * 64 * 8))
+           for lo in range(0, len(members), chunk):
+               rows = members[lo:lo + chunk]
+               flags = np.unpackbits(mask[rows].astype('<u8', copy=False).view(np.uint8), axis=1, bitorder='little')
+               totals += weights[rows].T @ flags
+           count, total_wealth, total_knowledge, living_count = totals[:, :len(block)]
+           descendants[block] = count.astype(np.int64) - 1
+           wealth[block] = total_wealth
+           avg_knowledge[block] = total_knowledge / np.maximum(1, living_count)
+       return {'descendants': descendants, 'wealth': wealth, 'avg_knowledge': avg_knowledge}
+
+   @classmethod
+   def from_people(cls, people: Dict[str, 'Person']) -> 'GenealogyIndex':
+       """Index of the living, oldest first (for checkpoints written before the index existed)."""
+       index = cls()
+       for person in sorted(people.values(), key=lambda p: p.birth_day):
+           index.add(person)
+       return index
+
+class DailyMemo:
+   """Day-scoped memo cache for derived World quantities, with hit/miss counters.
+
+   Entries are keyed by (name, *args) and dropped when the day changes or when
+   `invalidate(name)` is called after the inputs of `name` change.
+   """
+
+   def __init__(self):
+       self.day = None
+       self.values: Dict[Tuple, Any] = {}
+       self.hits: Dict[str, int] = defaultdict(int)
+       self.misses: Dict[str, int] = defaultdict(int)
+
+   def get(self, day: int, key: Tuple, compute):
+       if day != self.day:
+           self.values = {}
+           self.day = day
+       values = self.values
+       if key in values:
+           self.hits[key[0]] += 1
+           return values[key]
+       self.misses[key[0]] += 1
+       value = compute()
+       values[key] = value
+       return value
+
+   def invalidate(self, name: Optional[str] = None):
+       if name is None:
+           self.values = {}
+       else:
+           self.values = {key: value for key, value in self.values.items() if key[0] != name}
+
+   def hit_rates(self) -> Dict[str, Tuple[int, int, float]]:
+       """(hits, misses, hit rate) per cached quantity."""
+       rates = {}
+       for name in sorted(set(self.hits) | set(self.misses)):
+           hits, misses = self.hits[name], self.misses[name]
+           rates[name] = (hits, misses, hits / max(1, hits + misses))
+       return rates
+
+STATS_SERIES = ['population', 'gdp', 'gini', 'happiness', 'knowledge', 'innovation', 'meme_spread']
+
+def new_stats_series(name: str, values=()) -> StatsSeries:
+   """Create the series for a stats key, spilling under STATS_SPILL_DIR when configured."""
+   spill_path = None
+   if STATS_SPILL_DIR:
+       spill_path = os.path.join(STATS_SPILL_DIR, f"{name}_{uuid.uuid4().hex[:8]}.f64")
+   return StatsSeries(values, spill_path)
 
 # ============= WORLD AND SYSTEMS =============
 
+class TraitRow:
+   """Trait mapping backed by a person's row in the population trait matrix"""
+
+   def __init__(self, store: 'PopulationStore', row: int):
+       self.store = store
+       self.row = row
+
+   def __getitem__(self, trait: Trait) -> float:
+       return float(self.store.traits[self.row, trait.column])
+
+   def __setitem__(self, trait: Trait, value: float):
+       self.store.traits[self.row, trait.column] = value
+
+   def __iter__(self):
+       return iter(TRAIT_ORDER)
+
+   def __len__(self) -> int:
+       return len(TRAIT_ORDER)
+
+   def keys(self):
+       return list(TRAIT_ORDER)
+
+   def values(self):
+       return [float(v) for v in self.store.traits[self.row]]
+
+   def items(self):
+       return list(zip(TRAIT_ORDER, self.values()))
+
+class PopulationStore:
+   """Row allocation for living people plus columnar per-person arrays.
+
+   Every living person owns one row; rows of removed people are recycled and
+   their generation counter is bumped so stale row references can be detected.
+   Rows of the dead are tombstoned first and only return to the free list when
+   the world compacts, so their stale references can be purged in one batch.
+   """
+
+   def __init__(self, capacity: int = 1024):
+       self.index: Dict[str, int] = {}
+       self.ids: List[Optional[str]] = []
+       self.free_rows: List[int] = []
+       self.generation = np.zeros(capacity, dtype=np.int32)
+       self.traits = np.zeros((capacity, len(TRAIT_ORDER)), dtype=np.float32)
+       self.cell = np.full(capacity, -1, dtype=np.int64)  # grid cell code, -1 for free rows
+       self.live = np.zeros(capacity, dtype=bool)
+       self.tombstones: List[int] = []
+
+   @property
+   def capacity(self) -> int:
+       return len(self.generation)
+
+   def _grow(self):
+       old = self.capacity
+       self.generation = np.concatenate([self.generation, np.zeros(old, dtype=np.int32)])
+       self.traits = np.concatenate([self.traits, np.zeros_like(self.traits)])
+       self.cell = np.concatenate([self.cell, np.full(old, -1, dtype=np.int64)])
+       self.live = np.concatenate([self.live, np.zeros(old, dtype=bool)])
+
+   @staticmethod
+   def cell_code(location: Location) -> int:
+       """Flat grid cell index for a location."""
+       return ((location.region * DISTRICTS_PER_REGION + location.district) * 10 +
+               location.cell_x) * 10 + location.cell_y
+
+   def set_location(self, person_id: str, location: Location):
+       row = self.index.get(person_id)
+       if row is not None:
+           self.cell[row] = self.cell_code(location)
+
+   def contact_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+       """Rows grouped by grid cell as (rows sorted by cell, cell starts, cell counts)."""
+       live = np.flatnonzero(self.cell >= 0)
+       order = live[np.argsort(self.cell[live], kind='stable')]
+       counts = np.bincount(self.cell[live], minlength=WORLD_REGIONS * DISTRICTS_PER_REGION * 100)
+       return order, np.cumsum(counts) - counts, counts
+
+   def sample_contacts(self, contact_index, rows: np.ndarray, contacts: int, radius: int) -> np.ndarray:
+       """Draw `contacts` random people (with replacement) near each row within `radius` cells."""
+       order, starts, counts = contact_index
+       codes = self.cell[rows]
+       district, x, y = codes // 100, (codes // 10) % 10, codes % 10
+       offsets = np.arange(-radius, radius + 1)
+       dx = np.repeat(offsets, len(offsets))
+       dy = np.tile(offsets, len(offsets))
+       nx = x[:, None] + dx[None, :]
+       ny = y[:, None] + dy[None, :]
+       inside = (nx >= 0) & (nx < 10) & (ny >= 0) & (ny < 10)
+       neighbour_cells = np.where(inside, district[:, None] * 100 + nx * 10 + ny, 0)
+       cell_counts = np.where(inside, counts[neighbour_cells], 0)
+       totals = cell_counts.sum(axis=1)
+       cumulative = np.cumsum(cell_counts, axis=1)
+
+       draws = np.floor(np.random.random((len(rows), contacts)) * totals[:, None]).astype(np.int64)
+       slot = (cumulative[:, :, None] <= draws[:, None, :]).sum(axis=1)
+       slot = np.minimum(slot, cumulative.shape[1] - 1)
+       source = np.arange(len(rows))[:, None]
+       position = draws - (cumulative - cell_counts)[source, slot]
+       chosen_cells = neighbour_cells[source, slot]
+       targets = order[np.minimum(starts[chosen_cells] + position, max(0, len(order) - 1))]
+       valid = (totals[:, None] > 0) & (targets != rows[:, None])
+       return targets[valid]
+
+   def _allocate_row(self, person_id: str) -> int:
+       if self.free_rows:
+           row = self.free_rows.pop()
+           self.ids[row] = person_id
+       else:
+           row = len(self.ids)
+           if row >= self.capacity:
+               self._grow()
+           self.ids.append(person_id)
+       self.index[person_id] = row
+       self.live[row] = True
+       return row
+
+   def add(self, person: 'Person') -> int:
+       """Give a person a row and move their traits into the trait matrix."""
+       row = self.index.get(person.id)
+       if row is not None:
+           return row
+       row = self._allocate_row(person.id)
+       self.traits[row] = [person.traits[t] for t in TRAIT_ORDER]
+       self.cell[row] = self.cell_code(person.location)
+       person.traits = TraitRow(self, row)
+       return row
+
+   def add_many(self, people: List['Person'], traits: np.ndarray) -> np.ndarray:
+       """Give new people rows in bulk, writing their trait block into the matrix directly."""
+       rows = np.fromiter((self._allocate_row(person.id) for person in people),
+                          dtype=np.int64, count=len(people))
+       self.traits[rows] = traits
+       self.cell[rows] = [self.cell_code(person.location) for person in people]
+       for person, row in zip(people, rows.tolist()):
+           person.traits = TraitRow(self, row)
+       return rows
+
+   def _release(self, person: 'Person', row: int):
+       person.traits = {t: float(v) for t, v in zip(TRAIT_ORDER, self.traits[row])}
+       self.ids[row] = None
+       self.cell[row] = -1
+       self.live[row] = False
+       self.generation[row] += 1
+
+   def tombstone(self, person: 'Person') -> Optional[int]:
+       """Release a dead person's row but hold it back from reuse until compaction."""
+       row = self.index.pop(person.id, None)
+       if row is None:
+           return None
+       self._release(person, row)
+       self.tombstones.append(row)
+       return row
+
+   def recycle_tombstones(self) -> np.ndarray:
+       """Move all tombstoned rows to the free list and return them."""
+       rows = np.array(self.tombstones, dtype=np.int64)
+       self.free_rows.extend(self.tombstones)
+       self.tombstones = []
+       return rows
+
+   def rows(self, people: List['Person']) -> np.ndarray:
+       """Row index for each person."""
+       return np.fromiter((self.index[p.id] for p in people), dtype=np.int64, count=len(people))
+
+   def trait_distance(self, rows_a, rows_b) -> np.ndarray:
+       """Mean absolute trait difference for broadcastable arrays of row pairs."""
+       return compatibility_distance(self.traits[rows_a], self.traits[rows_b])
+
+   def compatibility(self, rows_a, rows_b) -> np.ndarray:
+       """Trait compatibility (100 minus trait distance) for arrays of row pairs."""
+       return 100 - self.trait_distance(rows_a, rows_b)
+
+   @classmethod
+   def from_people(cls, people: Dict[str, 'Person']) -> 'PopulationStore':
+       """Build a store for people loaded from an older checkpoint."""
+       store = cls()
+       for person in people.values():
+           if isinstance(person.traits, TraitRow):
+               person.traits = dict(person.traits.items())
+           store.add(person)
+       return store
+
+class AgentSet:
+   """Set of people stored as a boolean mask over population rows"""
+
+   def __init__(self, population: PopulationStore, person_ids=()):
+       self.population = population
+       self.mask = np.zeros(population.capacity, dtype=bool)
+       for person_id in person_ids:
+           self.add(person_id)
+
+   def fit(self) -> np.ndarray:
+       """Pad the mask to the current population capacity and return it."""
+       missing = self.population.capacity - len(self.mask)
+       if missing > 0:
+           self.mask = np.concatenate([self.mask, np.zeros(missing, dtype=bool)])
+       return self.mask
+
+   def _live_mask(self) -> np.ndarray:
+       return self.mask & self.population.live[:len(self.mask)]
+
+   def __len__(self) -> int:
+       return int(np.count_nonzero(self._live_mask()))
+
+   def __bool__(self) -> bool:
+       return bool(self._live_mask().any())
+
+   def __contains__(self, person_id) -> bool:
+       row = self.population.index.get(person_id)
+       return row is not None and row < len(self.mask) and bool(self.mask[row])
+
+   def __iter__(self):
+       return (self.population.ids[row] for row in self.rows())
+
+   def add(self, person_id: str):
+       row = self.population.index.get(person_id)
+       if row is not None:
+           self.fit()[row] = True
+
+   def discard(self, person_id: str):
+       row = self.population.index.get(person_id)
+       if row is not None:
+           self.discard_row(row)
+
+   def discard_row(self, row):
+       """Drop one row, or an array of rows."""
+       if isinstance(row, np.ndarray):
+           self.mask[row[row < len(self.mask)]] = False
+       elif row < len(self.mask):
+           self.mask[row] = False
+
+   def rows(self) -> np.ndarray:
+       return np.flatnonzero(self._live_mask())
+
+class RelationshipGraph:
+   """Sparse, degree-capped relationship weights with lazy time decay.
+
+   Each person's population row owns RELATIONSHIP_DEGREE_CAP slots holding
+   the partner row, partner generation, weight and day of last update. The
+   generation check invalidates edges pointing at a recycled row.
+   """
+
+   def __init__(self, population: PopulationStore, degree_cap: int = RELATIONSHIP_DEGREE_CAP):
+       self.population = population
+       self.degree_cap = degree_cap
+       self.decay = 1.0 - RELATIONSHIP_DECAY
+       capacity = population.capacity
+       self.partner = np.full((capacity, degree_cap), -1, dtype=np.int32)
+       self.partner_gen = np.zeros((capacity, degree_cap), dtype=np.int32)
+       self.weight = np.zeros((capacity, degree_cap), dtype=np.float32)
+       self.last_day = np.zeros((capacity, degree_cap), dtype=np.int32)
+       # Per-row cache of (sum, count, best slot), valid for cache_day
+       self.cache_day = np.full(capacity, -1, dtype=np.int64)
+       self.weight_sum = np.zeros(capacity, dtype=np.float64)
+       self.degree = np.zeros(capacity, dtype=np.int32)
+       self.best_slot = np.full(capacity, -1, dtype=np.int32)
+
+   def _ensure_capacity(self):
+       old = len(self.cache_day)
+       new = self.population.capacity
+       if new <= old:
+           return
+       def grow(array, fill):
+           grown = np.full((new,) + array.shape[1:], fill, dtype=array.dtype)
+           grown[:old] = array
+           return grown
+       self.partner = grow(self.partner, -1)
+       self.partner_gen = grow(self.partner_gen, 0)
+       self.weight = grow(self.weight, 0)
+       self.last_day = grow(self.last_day, 0)
+       self.cache_day = grow(self.cache_day, -1)
+       self.weight_sum = grow(self.weight_sum, 0)
+       self.degree = grow(self.degree, 0)
+       self.best_slot = grow(self.best_slot, -1)
+
+   def reset_row(self, row):
+       """Clear all ties of a (new or freed) population row, or an array of rows."""
+       self._ensure_capacity()
+       self.partner[row] = -1
+       self.cache_day[row] = -1
+
+   def forget_rows(self, rows: np.ndarray):
+       """Clear recycled rows and drop every cached row summary that may still count them."""
+       self.reset_row(rows)
+       self.cache_day[:] = -1
+
+   def _refresh(self, row: int, day: int):
+       """Apply pending decay to a row, drop stale or weak ties and rebuild its cache."""
+       if self.cache_day[row] == day:
+           return
+       partners = self.partner[row]
+       valid = (partners >= 0) & (self.population.generation[partners] == self.partner_gen[row])
+       weights = self.weight[row] * self.decay ** (day - self.last_day[row])
+       valid &= np.abs(weights) >= RELATIONSHIP_PRUNE_THRESHOLD
+       partners[~valid] = -1
+       weights[~valid] = 0.0
+       self.weight[row] = weights
+       self.last_day[row] = day
+       self.weight_sum[row] = float(weights.sum())
+       self.degree[row] = int(valid.sum())
+       self.best_slot[row] = int(np.where(valid, weights, -np.inf).argmax()) if self.degree[row] else -1
+       self.cache_day[row] = day
+
+   def _refresh_rows(self, rows: np.ndarray, day: int):
+       """Vectorized _refresh over distinct rows."""
+       rows = rows[self.cache_day[rows] != day]
+       if not len(rows):
+           return
+       partners = self.partner[rows]
+       valid = (partners >= 0) & (self.population.generation[partners] == self.partner_gen[rows])
+       weights = self.weight[rows] * self.decay ** (day - self.last_day[rows])
+       valid &= np.abs(weights) >= RELATIONSHIP_PRUNE_THRESHOLD
+       partners[~valid] = -1
+       weights[~valid] = 0.0
+       degree = valid.sum(axis=1)
+       self.partner[rows] = partners
+       self.weight[rows] = weights
+       self.last_day[rows] = day
+       self.weight_sum[rows] = weights.sum(axis=1)
+       self.degree[rows] = degree
+       self.best_slot[rows] = np.where(degree > 0, np.where(valid, weights, -np.inf).argmax(axis=1), -1)
+       self.cache_day[rows] = day
+
+   def strengthen(self, agent_id: str, other_id: str, delta: float, day: int):
+       """Add delta to agent's tie towards other, evicting the weakest tie if the row is full."""
+       row = self.population.index.get(agent_id)
+       other = self.population.index.get(other_id)
+       if row is None or other is None:
+           return
+       self._refresh(row, day)
+       partners = self.partner[row]
+       slots = np.flatnonzero(partners == other)
+       if len(slots):
+           slot = slots[0]
+       else:
+           empty = np.flatnonzero(partners < 0)
+           slot = empty[0] if len(empty) else int(np.abs(self.weight[row]).argmin())
+           partners[slot] = other
+           self.partner_gen[row, slot] = self.population.generation[other]
+           self.weight[row, slot] = 0.0
+       self.weight[row, slot] = max(-100.0, min(100.0, float(self.weight[row, slot]) + delta))
+       self.cache_day[row] = -1
+
+   def average_strength(self, agent_id: str, day: int) -> float:
+       """Mean tie strength for a person (0 without ties)."""
+       row = self.population.index.get(agent_id)
+       if row is None:
+           return 0.0
+       self._refresh(row, day)
+       return self.weight_sum[row] / max(1, self.degree[row])
+
+   def best_partner(self, agent_id: str, day: int) -> Tuple[Optional[str], float]:
+       """Strongest tie of a person as (partner id, strength)."""
+       row = self.population.index.get(agent_id)
+       if row is None:
+           return None, 0.0
+       self._refresh(row, day)
+       slot = self.best_slot[row]
+       if slot < 0:
+           return None, 0.0
+       return self.population.ids[self.partner[row, slot]], float(self.weight[row, slot])
+
+   def best_partners(self, rows: np.ndarray, day: int) -> Tuple[np.ndarray, np.ndarray]:
+       """Strongest tie of each row as (partner rows, -1 when none; strengths)."""
+       self._refresh_rows(rows, day)
+       slot = self.best_slot[rows]
+       has_partner = slot >= 0
+       slot = np.maximum(slot, 0)
+       partner_rows = np.where(has_partner, self.partner[rows, slot], -1)
+       strengths = np.where(has_partner, self.weight[rows, slot], 0.0)
+       return partner_rows, strengths
+
+   @classmethod
+   def from_people(cls, population: PopulationStore, people: Dict[str, 'Person'],
+                   day: int) -> 'RelationshipGraph':
+       """Build a graph from legacy per-person relationship dicts (older checkpoints)."""
+       graph = cls(population)
+       for person in people.values():
+           ties = getattr(person, 'relationships', None) or {}
+           strongest = sorted(ties.items(), key=lambda item: abs(item[1]), reverse=True)
+           for other_id, strength in strongest[:graph.degree_cap]:
+               graph.strengthen(person.id, other_id, strength, day)
+           if hasattr(person, 'relationships'):
+               del person.relationships
+       return graph
+
+def _price_history() -> deque:
+   return deque(maxlen=365)
+
+def _volume_history() -> deque:
+   return deque(maxlen=30)
+
 class Market:
    """Handles all economic transactions"""
    
@@ -1074,8 +2375,8 @@ class Market:
        self.order_book: Dict[int, Dict[str, List]] = {}  # number -> {bids: [], asks: []}
        self.prices: Dict[int, float] = {}  # Current market prices
        self.volume: Dict[int, float] = defaultdict(float)  # Daily trading volume
-       self.price_history: Dict[int, deque] = defaultdict(lambda: deque(maxlen=365))
-       self.volume_history: Dict[int, deque] = defaultdict(lambda: deque(maxlen=30))
+       self.price_history: Dict[int, deque] = defaultdict(_price_history)
+       self.volume_history: Dict[int, deque] = defaultdict(_volume_history)
        self.world: Optional['World'] = None
        
        # Initialize base prices
@@ -1156,6 +2457,8 @@ class Market:
        self.volume[number] += quantity
        self.price_history[number].append(price)
 
+       event_journal.record('trade', buyer_id, seller_id, number, price, quantity)
+
        seller = self._resolve_trader(seller_id)
        if seller:
            trade_value = price * quantity
@@ -1166,7 +2469,7 @@ class Market:
            else:
                seller.resources += trade_value
        
-       logger.debug(f"Trade executed: {quantity} of {number} at {price}")
+       logger.debug("Trade executed: %s of %s at %s", quantity, number, price)
    
    def get_price(self, number: int) -> float:
        """Get current market price or estimate"""
@@ -1201,6 +2504,99 @@ class Market:
            return 0.0
        return sum(order[1] for order in self.order_book[number]['asks'])
 
+@dataclass
+class Vacancy:
+   """Open positions posted by a company for the current day"""
+   company: 'Company'
+   max_offer: float  # highest salary the company can cover for its hiring horizon
+   budget: float  # remaining daily salary budget for new hires
+   openings: int
+   min_offer: float = 0.0  # regional salary floor; below it no hire is affordable
+
+   def is_open(self) -> bool:
+       return self.openings > 0 and self.budget >= self.min_offer and not self.company.is_bankrupt
+
+class LaborMarket:
+   """Regional vacancy index with batched candidate matching"""
+
+   def __init__(self, world: 'World'):
+       self.world = world
+       self.cross_region = LABOR_MARKET_CROSS_REGION
+       self.vacancies_by_region: Dict[int, deque] = {}
+       self.all_vacancies: deque = deque()
+
+   def post_vacancies(self):
+       """Rebuild the vacancy index from current company finances."""
+       by_region: Dict[int, List[Vacancy]] = defaultdict(list)
+       for company in self.world.companies.values():
+           if company.is_bankrupt or company.capital <= 0:
+               continue
+           params = self.world.get_cultural_params(company.location.region)
+           openings = params['max_company_size'] - len(company.employees)
+           if openings <= 0:
+               continue
+           max_offer = company.capital / max(1, params['hiring_capital_days'])
+           by_region[company.location.region].append(
+               Vacancy(company, max_offer, max_offer, openings, params['base_salary'] * 0.5)
+           )
+
+       all_vacancies = [v for vacancies in by_region.values() for v in vacancies]
+       all_vacancies.sort(key=lambda v: v.max_offer, reverse=True)
+       self.all_vacancies = deque(all_vacancies)
+       self.vacancies_by_region = {
+           region: deque(sorted(vacancies, key=lambda v: v.max_offer, reverse=True))
+           for region, vacancies in by_region.items()
+       }
+
+   def _open_vacancies(self, vacancies: deque, exclude: Optional['Company']) -> List[Vacancy]:
+       """Return up to LABOR_MARKET_SEARCH_DEPTH open vacancies, pruning closed ones at the head."""
+       while vacancies and not vacancies[0].is_open():
+           vacancies.popleft()
+       found = []
+       for vacancy in vacancies:
+           if len(found) >= LABOR_MARKET_SEARCH_DEPTH:
+               break
+           if vacancy.is_open() and vacancy.company is not exclude:
+               found.append(vacancy)
+       return found
+
+   def _best_offer(self, person: Person, vacancies: List[Vacancy],
+                   min_salary: float) -> Tuple[Optional[Vacancy], float]:
+       best_vacancy = None
+       best_salary = 0.0
+       for vacancy in vacancies:
+           salary = self.world._calculate_salary_offer(person, vacancy.company)
+           if salary > vacancy.budget or salary <= min_salary:
+               continue
+           if best_vacancy is None or salary > best_salary:
+               best_vacancy = vacancy
+               best_salary = salary
+       return best_vacancy, best_salary
+
+   def match(self, candidates: List[Person], switching: bool = False) -> int:
+       """Assign candidates to vacancies, strongest candidates first; return hires."""
+       if not self.all_vacancies or not candidates:
+           return 0
+       ranked = sorted(candidates, key=self.world._estimate_competency, reverse=True)
+       hires = 0
+       for person in ranked:
+           exclude = person.employer if switching else None
+           min_salary = person.salary * (1 + JOB_SWITCH_THRESHOLD) if switching else 0.0
+           local = self.vacancies_by_region.get(person.location.region, deque())
+           vacancy, salary = self._best_offer(person, self._open_vacancies(local, exclude), min_salary)
+           if vacancy is None and self.cross_region:
+               vacancy, salary = self._best_offer(
+                   person, self._open_vacancies(self.all_vacancies, exclude), min_salary
+               )
+           if vacancy is None:
+               continue
+           vacancy.company.hire(person, salary)
+           vacancy.openings -= 1
+           vacancy.budget -= salary
+           person.last_job_change_day = self.world.current_day
+           hires += 1
+       return hires
+
 class CulturalDynamics:
    """Tracks region-level cultural drift and adjusts economic parameters."""
 
@@ -1400,62 +2796,98 @@ class PoliticalSystem:
                self.hold_election(level, world)
                self.election_countdown[level] = ELECTION_CYCLES[level]
    
+   @staticmethod
+   def _constituency_codes(level: str, voters: List[Person]) -> np.ndarray:
+       """Integer constituency id per voter for an office level."""
+       locations = np.array([(p.location.region, p.location.district, p.location.cell_x, p.location.cell_y)
+                             for p in voters], dtype=np.int64).reshape(len(voters), 4)
+       region, district, x, y = locations.T
+       district_code = region * DISTRICTS_PER_REGION + district
+       if level == 'region':
+           return region
+       if level == 'district':
+           return district_code
+       if level == 'quarter':
+           per_side = int(math.ceil(10 / QUARTER_CELLS))
+           return (district_code * per_side + x // QUARTER_CELLS) * per_side + y // QUARTER_CELLS
+       return (district_code * 10 + x) * 10 + y
+
+   @staticmethod
+   def _constituency_label(level: str, code: int) -> str:
+       """Human-readable constituency name, e.g. '12.3' for region 12 district 3."""
+       if level == 'region':
+           return str(code)
+       if level == 'quarter':
+           per_side = int(math.ceil(10 / QUARTER_CELLS))
+           code, qy = divmod(code, per_side)
+           code, qx = divmod(code, per_side)
+           region, district = divmod(code, DISTRICTS_PER_REGION)
+           return f"{region}.{district}.{qx}.{qy}"
+       if level == 'block':
+           code, y = divmod(code, 10)
+           code, x = divmod(code, 10)
+           region, district = divmod(code, DISTRICTS_PER_REGION)
+           return f"{region}.{district}.{x}.{y}"
+       region, district = divmod(code, DISTRICTS_PER_REGION)
+       return f"{region}.{district}"
+
    def hold_election(self, level: str, world: 'World'):
-       """Hold election at specified level"""
+       """Hold elections in every constituency of the specified level"""
        logger.info(f"Holding {level} election")
        
-       # Get eligible voters and candidates
+       # Get eligible voters, grouped by constituency
        eligible_voters = [p for p in world.people.values() if p.is_alive and p.age >= 18 * 365]
-       
-       # Generate candidates (simplified)
-       num_candidates = min(5, len(eligible_voters) // 100)
-       candidates = random.sample(eligible_voters, num_candidates)
-       
-       # Voting
-       votes = defaultdict(int)
-       for voter in eligible_voters:
-           choice = self.voter_decision(voter, candidates)
-           if choice:
-               votes[choice.id] += 1
-       
-       # Determine winner
-       if votes:
-           winner_id = max(votes, key=votes.get)
-           self.offices[level][str(world.current_day)] = winner_id
-           logger.info(f"Election winner: {winner_id} with {votes[winner_id]} votes")
-   
-   def voter_decision(self, voter: Person, candidates: List[Person]) -> Optional[Person]:
-       """Determine voter's choice"""
-       if not candidates:
-           return None
-       
-       best_candidate = None
-       best_score = -float('inf')
-       
-       for candidate in candidates:
-           # Calculate alignment
-           trait_alignment = sum(
-               -abs(voter.traits[t] - candidate.traits[t]) / 200
-               for t in Trait
-           )
-           
-           # Add charisma factor
-           charisma_factor = candidate.charisma / 100
-           
-           # Random factor
-           random_factor = random.uniform(-0.2, 0.2)
-           
-           score = trait_alignment + charisma_factor + random_factor
-           
-           if score > best_score:
-               best_score = score
-               best_candidate = candidate
-       
-       # Abstention based on apathy
-       if best_score < -0.5 or random.random() < 0.2:  # 20% abstention rate
-           return None
-       
-       return best_candidate
+       voter_count = len(eligible_voters)
+       if not voter_count:
+           return
+       codes, group, sizes = np.unique(self._constituency_codes(level, eligible_voters),
+                                       return_inverse=True, return_counts=True)
+       group = group.reshape(-1)
+
+       # Generate candidates: a random subset of each constituency's voters
+       contested = np.where(sizes >= ELECTION_MIN_VOTERS, 2, 0)
+       num_candidates = np.minimum(ELECTION_MAX_CANDIDATES,
+                                   np.maximum(contested, sizes // ELECTION_VOTERS_PER_CANDIDATE))
+       order = np.lexsort((np.random.random(voter_count), group))
+       starts = np.cumsum(sizes) - sizes
+       rank = np.empty(voter_count, dtype=np.int64)
+       rank[order] = np.arange(voter_count) - np.repeat(starts, sizes)
+       is_candidate = rank < num_candidates[group]
+       candidates = np.full((len(codes), ELECTION_MAX_CANDIDATES), -1, dtype=np.int64)
+       candidates[group[is_candidate], rank[is_candidate]] = np.flatnonzero(is_candidate)
+       if not is_candidate.any():
+           return
+
+       # Voting: score every voter against their constituency's candidates in chunks
+       voter_rows = world.population.rows(eligible_voters)
+       charisma = np.array([p.charisma for p in eligible_voters], dtype=np.float32) / 100
+       votes = np.zeros(voter_count, dtype=np.int64)
+       for start in range(0, voter_count, ELECTION_CHUNK_SIZE):
+           stop = min(voter_count, start + ELECTION_CHUNK_SIZE)
+           ballot = candidates[group[start:stop]]
+           valid = ballot >= 0
+           ballot = np.where(valid, ballot, 0)
+           scores = world.population.trait_distance(voter_rows[start:stop, None], voter_rows[ballot])
+           scores *= -len(TRAIT_ORDER) / 200
+           scores += charisma[ballot] + np.random.uniform(-0.2, 0.2, size=ballot.shape)
+           scores[~valid] = -np.inf
+           best = scores.argmax(axis=1)
+           rows = np.arange(stop - start)
+           # Abstention based on apathy
+           voting = ((scores[rows, best] >= -0.5) &
+                     (np.random.random(stop - start) >= ELECTION_ABSTENTION_RATE))
+           votes += np.bincount(ballot[rows, best][voting], minlength=voter_count)
+
+       # Determine winners
+       candidate_votes = np.where(candidates >= 0, votes[np.maximum(candidates, 0)], -1)
+       best = candidate_votes.argmax(axis=1)
+       winner_votes = candidate_votes[np.arange(len(codes)), best]
+       filled = 0
+       for g in np.flatnonzero(winner_votes > 0):
+           winner = eligible_voters[candidates[g, best[g]]]
+           self.offices[level][self._constituency_label(level, int(codes[g]))] = winner.id
+           filled += 1
+       logger.info(f"{level.capitalize()} election: {filled} of {len(codes)} constituencies filled")
 
 class World:
    """Main world container and coordinator"""
@@ -1467,11 +2899,14 @@ class World:
        self.companies: Dict[str, Company] = {}
        self.buildings: Dict[str, Building] = {}
        self.memes: Dict[str, Meme] = {}
+       self.population = PopulationStore()
+       self.relationships = RelationshipGraph(self.population)
        
        # Systems
        self.market = Market()
        self.market.set_world(self)
        self.political_system = PoliticalSystem()
+       self.labor_market = LaborMarket(self)
        self.culture = CulturalDynamics(self)
        
        # Spatial grid: region -> district -> cells
@@ -1488,20 +2923,21 @@ class World:
        
        # Statistics tracking
        self.stats = {
-           'population': [],
-           'gdp': [],
-           'gini': [],
-           'happiness': [],
-           'knowledge': [],
-           'innovation': [],
            'births': 0,
            'deaths': 0,
            'companies_founded': 0,
            'companies_failed': 0,
            'buildings_constructed': 0,
-           'prime_discoveries': defaultdict(int),
-           'meme_spread': []
+           'prime_discoveries': defaultdict(int)
        }
+       for name in STATS_SERIES:
+           self.stats[name] = new_stats_series(name)
+       self.memo = DailyMemo()
+       self.graveyard: List[Tuple[str, Location, List[str]]] = []  # (id, location, parent ids) awaiting compaction
+       self.death_archive = DeathArchive(new_death_archive_path())
+       self.genealogy = GenealogyIndex()
+       self.dynasty_metrics = {name: StatsSeries() for name in ('day', 'dynasties', 'largest', 'top_wealth')}
+       self.last_compaction_day = 0
 
        self._population_by_region: Dict[int, int] = defaultdict(int)
        self._companies_by_region: Dict[int, int] = defaultdict(int)
@@ -1523,7 +2959,8 @@ class World:
            if person.age > 16 * 365:
                max_prime = min(7, 2 + person.age // (10 * 365))
                primes = [p for p in range(2, max_prime + 1) if is_prime(p)]
-               person.known_primes = set(primes[:random.randint(1, len(primes))])
+               for prime in primes[:random.randint(1, len(primes))]:
+                   person.learn_prime(prime)
            
            self.add_person(person)
 
@@ -1551,6 +2988,19 @@ class World:
            self.enable_region_threads = ENABLE_REGION_MULTITHREADING
        if not hasattr(self, 'region_thread_workers'):
            self.region_thread_workers = max(1, REGION_THREAD_WORKERS)
+       if not hasattr(self, 'labor_market'):
+           self.labor_market = LaborMarket(self)
+       if not hasattr(self, 'memo'):
+           self.memo = DailyMemo()
+       if not hasattr(self, 'graveyard'):
+           self.graveyard = []
+           self.last_compaction_day = self.current_day
+       if not hasattr(self, 'dynasty_metrics'):
+           self.dynasty_metrics = {name: StatsSeries() for name in ('day', 'dynasties', 'largest', 'top_wealth')}
+       for name in STATS_SERIES:
+           series = self.stats.get(name, ())
+           if not isinstance(series, StatsSeries):
+               self.stats[name] = new_stats_series(name, series)
 
    def _run_region_tasks(self, region_items: Dict[int, List[Any]], task_fn, min_items: int) -> List[Any]:
        """Run region tasks in parallel when worthwhile."""
@@ -1625,27 +3075,32 @@ class World:
        """Refresh regional stats and update cultural parameters."""
        self.region_stats = self._collect_region_stats()
        self.culture.update(self.region_stats)
+       self.memo.invalidate('opportunity')
 
    def get_cultural_params(self, region: int) -> Dict[str, float]:
        """Get current cultural parameters for a region."""
        return self.culture.get_params(region)
 
    def _get_recent_gdp_per_capita(self, window: int = 30) -> float:
-       """Estimate recent GDP per capita."""
+       """Estimate recent GDP per capita (memoized until stats are collected)."""
+       return self.memo.get(self.current_day, ('gdp_per_capita', window),
+                            lambda: self._compute_recent_gdp_per_capita(window))
+
+   def _compute_recent_gdp_per_capita(self, window: int) -> float:
        if not self.stats['gdp'] or not self.stats['population']:
            return 0.0
-       gdp_window = self.stats['gdp'][-window:]
-       pop_window = self.stats['population'][-window:]
-       if not gdp_window or not pop_window:
-           return 0.0
-       avg_gdp = sum(gdp_window) / len(gdp_window)
-       avg_population = sum(pop_window) / len(pop_window)
+       avg_gdp = self.stats['gdp'].rolling_mean(window)
+       avg_population = self.stats['population'].rolling_mean(window)
        if avg_population <= 0:
            return 0.0
        return avg_gdp / avg_population
 
    def _calculate_child_cost(self, region: int) -> float:
-       """Adjust child costs based on economy and market tightness."""
+       """Adjust child costs based on economy and market tightness (memoized per day)."""
+       return self.memo.get(self.current_day, ('child_cost', region),
+                            lambda: self._compute_child_cost(region))
+
+   def _compute_child_cost(self, region: int) -> float:
        gdp_per_capita = self._get_recent_gdp_per_capita()
        gdp_score = math.log1p(gdp_per_capita) / math.log1p(GDP_PER_CAPITA_NORM)
        gdp_score = min(1.0, max(0.0, gdp_score))
@@ -1663,7 +3118,11 @@ class World:
        return CHILD_COST * multiplier
 
    def _region_opportunity_score(self, region: int) -> float:
-       """Score regions for migration opportunities."""
+       """Score regions for migration opportunities (memoized until region stats refresh)."""
+       return self.memo.get(self.current_day, ('opportunity', region),
+                            lambda: self._compute_region_opportunity_score(region))
+
+   def _compute_region_opportunity_score(self, region: int) -> float:
        stats = self.region_stats.get(region, {})
        avg_resources = stats.get('avg_resources', 0.0)
        employment_rate = stats.get('employment_rate', 0.0)
@@ -1683,51 +3142,82 @@ class World:
                 0.15 * equality + 0.1 * starvation_relief + 0.05 * population_relief)
        return max(0.0, min(1.5, score))
 
-   def _calculate_reproduction_modifier(self, person: Person, partner: Optional[Person]) -> float:
-       """Combine genetics, knowledge, wellbeing, and economy into a fertility modifier."""
-       people = [person] + ([partner] if partner else [])
-       for p in people:
-           p._ensure_biological_params()
-
-       gene_scores = [
-           (p.nutrition_efficiency + p.starvation_resistance + p.health_resilience) / 3
-           for p in people
-       ]
-       gene_factor = max(0.7, min(1.3, sum(gene_scores) / len(gene_scores)))
-
-       avg_knowledge = sum(len(p.known_primes) for p in people) / len(people)
-       knowledge_score = math.log1p(avg_knowledge) / math.log1p(10)
-       knowledge_score = min(1.0, max(0.0, knowledge_score))
-       knowledge_factor = 0.8 + 0.5 * knowledge_score
-
-       wellbeing_scores = []
-       for p in people:
-           nutrition_norm = min(1.0, p.nutrition_level / max(NUTRITION_REQUIREMENT, 0.01))
-           wellbeing = (0.4 * (p.health / 100) + 0.4 * (p.happiness / 100) +
-                        0.2 * nutrition_norm)
-           wellbeing_scores.append(min(1.0, max(0.0, wellbeing)))
-       wellbeing_score = sum(wellbeing_scores) / len(wellbeing_scores)
-       wellbeing_factor = 0.7 + 0.6 * wellbeing_score
-
-       region = person.location.region
-       stats = self.region_stats.get(region, {})
-       avg_resources = stats.get('avg_resources', 0.0)
-       employment_rate = stats.get('employment_rate', 0.0)
-       gini = stats.get('gini', 0.0)
-       starvation_rate = stats.get('starvation_rate', 0.0)
-       res_norm = avg_resources / (avg_resources + 300) if avg_resources > 0 else 0.0
-       equality = 1 - min(1.0, max(0.0, gini))
-       starvation_relief = 1 - min(1.0, max(0.0, starvation_rate))
+   def _region_opportunity_scores(self) -> np.ndarray:
+       """Opportunity score of every region (memoized until region stats refresh)."""
+       return self.memo.get(self.current_day, ('opportunity', None), lambda: np.array(
+           [self._region_opportunity_score(region) for region in range(WORLD_REGIONS)]))
+
+   def _migration_destinations(self) -> Tuple[np.ndarray, np.ndarray]:
+       """Best destinations per source region as (regions padded with -1, count per source)."""
+       scores = self._region_opportunity_scores()
+       order = np.lexsort((-np.arange(WORLD_REGIONS), -scores))  # best first, ties to the higher region
+       better = scores[order][None, :] >= scores[:, None] + MIGRATION_OPPORTUNITY_THRESHOLD
+       better &= order[None, :] != np.arange(WORLD_REGIONS)[:, None]
+       destinations = np.full((WORLD_REGIONS, MIGRATION_TOP_REGIONS), -1, dtype=np.int64)
+       counts = np.zeros(WORLD_REGIONS, dtype=np.int64)
+       for region in range(WORLD_REGIONS):
+           top = order[better[region]][:MIGRATION_TOP_REGIONS]
+           destinations[region, :len(top)] = top
+           counts[region] = len(top)
+       return destinations, counts
+
+   def _migrate(self, sample: List[Person]):
+       """Decide migrations for a sample of adults in one vectorized pass and move the movers."""
+       n = len(sample)
+       happiness = np.fromiter((p.happiness for p in sample), dtype=np.float64, count=n)
+       resources = np.fromiter((p.resources for p in sample), dtype=np.float64, count=n)
+       last_move = np.fromiter((p.last_migration_day for p in sample), dtype=np.float64, count=n)
+       employed = np.fromiter((p.employer is not None for p in sample), dtype=bool, count=n)
+       regions = np.fromiter((p.location.region for p in sample), dtype=np.int64, count=n)
+       rows = np.fromiter((self.population.index[p.id] for p in sample), dtype=np.int64, count=n)
+       ambition = (self.population.traits[rows, Trait.HUMBLE_AMBITIOUS.column] + 100) / 200
+
+       drive = (0.5 + (1 - happiness / 100) * 0.6 +
+                (1 - np.minimum(1.0, resources / 500)) * 0.4 + ambition * 0.3)
+       drive = np.where(employed, drive * 0.6, drive)
+       moving = ((self.current_day - last_move >= MIGRATION_COOLDOWN_DAYS) &
+                 (resources >= MIGRATION_COST_BASE) &
+                 (np.random.random(n) <= MIGRATION_BASE_RATE * drive))
+
+       destinations, counts = self._migration_destinations()
+       moving &= counts[regions] > 0
+       picks = np.floor(np.random.random(n) * np.maximum(counts[regions], 1)).astype(np.int64)
+       chosen = destinations[regions, picks]
+       cost = MIGRATION_COST_BASE * (1 + np.abs(chosen - regions) / max(1, WORLD_REGIONS - 1) * 2)
+       moving &= resources >= cost
+
+       movers = np.flatnonzero(moving)
+       if not len(movers):
+           return
+       districts = np.random.randint(0, DISTRICTS_PER_REGION, len(movers))
+       cells = np.random.randint(0, 10, (len(movers), 2))
+       for i, district, (cell_x, cell_y) in zip(movers, districts, cells):
+           person = sample[i]
+           person.resources -= cost[i]
+           event_journal.record('migration', person.id, None, int(chosen[i]), float(cost[i]), float(regions[i]))
+           self.move_person(person, Location(region=int(chosen[i]), district=int(district),
+                                             cell_x=int(cell_x), cell_y=int(cell_y)))
+           person.last_migration_day = self.current_day
+
+   def _region_economy_factors(self) -> np.ndarray:
+       """Fertility factor from each region's economy (resources, jobs, equality, food, GDP)."""
        gdp_per_capita = self._get_recent_gdp_per_capita()
        gdp_score = math.log1p(gdp_per_capita) / math.log1p(GDP_PER_CAPITA_NORM)
        gdp_score = min(1.0, max(0.0, gdp_score))
-
-       economy_score = (0.35 * res_norm + 0.25 * employment_rate +
-                        0.15 * equality + 0.15 * starvation_relief + 0.1 * gdp_score)
-       economy_factor = 0.7 + 0.6 * min(1.0, max(0.0, economy_score))
-
-       modifier = gene_factor * knowledge_factor * wellbeing_factor * economy_factor
-       return max(REPRODUCTION_MODIFIER_MIN, min(REPRODUCTION_MODIFIER_MAX, modifier))
+       factors = np.empty(WORLD_REGIONS)
+       for region in range(WORLD_REGIONS):
+           stats = self.region_stats.get(region, {})
+           avg_resources = stats.get('avg_resources', 0.0)
+           employment_rate = stats.get('employment_rate', 0.0)
+           gini = stats.get('gini', 0.0)
+           starvation_rate = stats.get('starvation_rate', 0.0)
+           res_norm = avg_resources / (avg_resources + 300) if avg_resources > 0 else 0.0
+           equality = 1 - min(1.0, max(0.0, gini))
+           starvation_relief = 1 - min(1.0, max(0.0, starvation_rate))
+           economy_score = (0.35 * res_norm + 0.25 * employment_rate +
+                            0.15 * equality + 0.15 * starvation_relief + 0.1 * gdp_score)
+           factors[region] = 0.7 + 0.6 * min(1.0, max(0.0, economy_score))
+       return factors
 
    def _estimate_competency(self, person: Person) -> float:
        """Estimate a productivity score for salary offers."""
@@ -1842,7 +3332,7 @@ class World:
        """Find a viable product for a new company"""
        best_product = None
        best_score = -float('inf')
-       market_active = bool(self.stats['gdp'] and self.stats['gdp'][-1] > 0)
+       market_active = self.stats['gdp'].last() > 0
        for number in range(2, 10):
            if not self._can_produce_with_primes(number, known_primes):
                continue
@@ -1886,11 +3376,22 @@ class World:
    def add_person(self, person: Person):
        """Add a person to the world"""
        self.people[person.id] = person
+       self.relationships.reset_row(self.population.add(person))
+       self.genealogy.add(person)
        
        # Add to spatial grid
        loc = person.location
        self.grid[loc.region, loc.district, loc.cell_x, loc.cell_y]['people'].append(person.id)
 
+   def add_people(self, people: List[Person], traits: np.ndarray):
+       """Add newly created people in bulk with their trait matrix block."""
+       self.relationships.reset_row(self.population.add_many(people, traits))
+       for person in people:
+           self.people[person.id] = person
+           self.genealogy.add(person)
+           loc = person.location
+           self.grid[loc.region, loc.district, loc.cell_x, loc.cell_y]['people'].append(person.id)
+
    def move_person(self, person: Person, new_location: Location):
        """Move a person to a new location and update spatial grid."""
        old_loc = person.location
@@ -1900,26 +3401,51 @@ class World:
                cell_people.remove(person.id)
 
        person.location = new_location
+       self.population.set_location(person.id, new_location)
        self.grid[new_location.region, new_location.district, new_location.cell_x, new_location.cell_y]['people'].append(person.id)
 
        if person.employer and person.employer.location.region != new_location.region:
            person.employer.fire(person)
    
-   def remove_person(self, person: Person):
-       """Remove a person from the world"""
-       if person.id in self.people:
-           # Remove from grid
-           loc = person.location
-           cell_people = self.grid[loc.region, loc.district, loc.cell_x, loc.cell_y]['people']
-           if person.id in cell_people:
-               cell_people.remove(person.id)
-           
-           # Remove from employer
-           if person.employer:
-               person.employer.fire(person)
-           
-           del self.people[person.id]
-   
+   def bury_person(self, person: Person):
+       """Remove a dead person in O(1), leaving a tombstone for the next compaction."""
+       if person.id not in self.people:
+           return
+       if person.employer:
+           person.employer.fire(person)
+       parents = [person.family[key] for key in ('parent1', 'parent2') if key in person.family]
+       self.graveyard.append((person.id, person.location, parents))
+       self.death_archive.record(person, self.current_day)
+       event_journal.record('death', person.id, person.family.get('parent1'), person.age, person.resources)
+       self.population.tombstone(person)
+       self.genealogy.mark_dead(person.id)
+       del self.people[person.id]
+       self.stats['deaths'] += 1
+
+   def compact(self):
+       """Purge references to tombstoned agents in one batch and recycle their rows."""
+       rows = self.population.recycle_tombstones()
+       if len(rows):
+           self.relationships.forget_rows(rows)
+           for meme in self.memes.values():
+               meme.forget_row(rows)
+
+       # Grid cells: rebuild each touched cell list once
+       dead_by_cell: Dict[Tuple[int, int, int, int], Set[str]] = defaultdict(set)
+       for person_id, loc, parents in self.graveyard:
+           dead_by_cell[(loc.region, loc.district, loc.cell_x, loc.cell_y)].add(person_id)
+           for parent_id in parents:
+               parent = self.people.get(parent_id)
+               if parent is not None:
+                   parent.family.pop(f'child_{person_id}', None)
+       for key, dead_ids in dead_by_cell.items():
+           cell = self.grid[key]
+           cell['people'] = [pid for pid in cell['people'] if pid not in dead_ids]
+
+       self.graveyard = []
+       self.last_compaction_day = self.current_day
+       self.death_archive.flush()
+
    def get_nearby_people(self, location: Location, radius: float) -> List[Person]:
        """Get people within radius of location"""
        nearby = []
@@ -1957,7 +3483,7 @@ class World:
        self.market.start_day()
        self._refresh_market_cache()
        self._update_culture()
-       logger.info(f"Day {self.current_day} - Population: {len(self.people)}")
+       logger.info("Day %d - Population: %d", self.current_day, len(self.people))
        
        # Phase 1: Individual activities (40% of processing)
        self._phase_individual()
@@ -1979,6 +3505,7 @@ class World:
        
        # Auto-balancing
        self._auto_balance()
+       event_log.flush(self.current_day)
    
    def _phase_individual(self):
        """Individual daily routines"""
@@ -1991,25 +3518,30 @@ class World:
 
        # Daily routine is region-parallel; cross-region relationship outcomes
        # (e.g. reproduction checks) are committed sequentially to avoid locks.
-       self._run_region_tasks(region_people, self._process_region_individual_batch, MIN_PARALLEL_PEOPLE)
+       died = self._run_region_tasks(region_people, self._process_region_individual_batch, MIN_PARALLEL_PEOPLE)
        self._apply_daily_local_movement(people_list)
 
-       for person in people_list:
-           if person.is_alive and self._check_reproduction(person):
-               self._handle_birth(person)
+       self._phase_births(people_list)
 
-       # Remove dead people
-       dead = [p for p in self.people.values() if not p.is_alive]
-       for person in dead:
-           self.stats['deaths'] += 1
-           self.remove_person(person)
+       # Tombstone the dead; references to them are purged in periodic batches
+       for region_dead in died:
+           for person in region_dead:
+               self.bury_person(person)
+       if self.graveyard and (
+               self.current_day - self.last_compaction_day >= COMPACTION_INTERVAL_DAYS or
+               len(self.graveyard) > COMPACTION_TOMBSTONE_FRACTION * max(1, len(self.people))):
+           self.compact()
 
-   def _process_region_individual_batch(self, region: int, people: List[Person]):
-       """Process individual routines for one region partition."""
+   def _process_region_individual_batch(self, region: int, people: List[Person]) -> List[Person]:
+       """Process individual routines for one region partition; returns those who died."""
        random.shuffle(people)
+       died = []
        for person in people:
            if person.is_alive:
                person.daily_routine(self)
+               if not person.is_alive:
+                   died.append(person)
+       return died
 
    def _apply_daily_local_movement(self, people: List[Person]):
        """Apply short-range mobility so movement is visible and spatially dynamic."""
@@ -2046,29 +3578,17 @@ class World:
    
    def _phase_work(self):
        """Work and production phase"""
-       # Companies produce goods (region-partitioned); market orders are committed after workers finish.
-       region_companies: Dict[int, List[Company]] = defaultdict(list)
-       for company in self.companies.values():
-           if not company.is_bankrupt:
-               region_companies[company.location.region].append(company)
-
-       regional_orders = self._run_region_tasks(
-           region_companies,
-           self._process_region_company_batch,
-           MIN_PARALLEL_COMPANIES
-       )
-       for batch in regional_orders:
-           if not batch:
-               continue
-           for number, quantity, price, trader_id in batch:
-               self.market.place_order(number, quantity, price, False, trader_id)
-       
-       # Job market - unemployed look for work
-       unemployed = [p for p in self.people.values() 
+       # Companies produce goods in one vectorized pass; market orders are committed afterwards.
+       active_companies = [c for c in self.companies.values() if not c.is_bankrupt]
+       for number, quantity, price, trader_id in self._process_company_kernel(active_companies):
+           self.market.place_order(number, quantity, price, False, trader_id)
+       
+       # Job market - companies post vacancies, unemployed either found a company or queue for matching
+       self.labor_market.post_vacancies()
+       unemployed = [p for p in self.people.values()
                      if p.is_alive and p.age >= 16 * 365 and not p.employer]
-       
-       for person in unemployed[:min(1000, len(unemployed))]:  # Limit to prevent slowdown
-           # Look for job or start company
+       seekers = []
+       for person in self._sample_fraction(unemployed, JOB_SEARCH_SAMPLE_FRACTION):
            cultural_params = self.get_cultural_params(person.location.region)
            entry_chance = self._calculate_entry_chance(person.location.region, cultural_params)
            if random.random() < entry_chance:
@@ -2080,107 +3600,130 @@ class World:
                    self.companies[company.id] = company
                    self.stats['companies_founded'] += 1
                    self._companies_by_region[company.location.region] += 1
-           elif self.companies:
-               # Look for employment
-               for company in random.sample(list(self.companies.values()), 
-                                           min(5, len(self.companies))):
-                   company_params = self.get_cultural_params(company.location.region)
-                   if len(company.employees) < company_params['max_company_size']:  # Company size limit
-                       # Check if person's knowledge is useful
-                       salary = self._calculate_salary_offer(person, company)
-                       if company.capital > salary * company_params['hiring_capital_days']:  # Can afford for N days
-                           company.hire(person, salary)
-                           person.last_job_change_day = self.current_day
-                           break
+           else:
+               seekers.append(person)
+       self.labor_market.match(seekers)
 
        # Job switching for better offers
        employed = [p for p in self.people.values()
                    if p.is_alive and p.age >= 16 * 365 and p.employer]
-       for person in random.sample(employed, min(500, len(employed))):
+       switchers = []
+       for person in self._sample_fraction(employed, JOB_SWITCH_SAMPLE_FRACTION):
            if self.current_day - person.last_job_change_day < JOB_SWITCH_COOLDOWN_DAYS:
                continue
            switch_drive = (person.traits[Trait.HUMBLE_AMBITIOUS] + 100) / 200
            if random.random() > switch_drive:
                continue
-           best_offer = None
-           best_company = None
-           for company in random.sample(list(self.companies.values()),
-                                        min(3, len(self.companies))):
-               if company.is_bankrupt or company == person.employer:
-                   continue
-               cultural_params = self.get_cultural_params(company.location.region)
-               if len(company.employees) >= cultural_params['max_company_size']:
-                   continue
-               salary = self._calculate_salary_offer(person, company)
-               if company.capital <= salary * cultural_params['hiring_capital_days']:
-                   continue
-               if salary > person.salary * (1 + JOB_SWITCH_THRESHOLD):
-                   if best_offer is None or salary > best_offer:
-                       best_offer = salary
-                       best_company = company
-           if best_company and best_offer:
-               best_company.hire(person, best_offer)
-               person.last_job_change_day = self.current_day
-
-   def _process_region_company_batch(self, region: int, companies: List[Company]) -> List[Tuple[int, float, float, str]]:
-       """Process company activity for one region and return sell orders."""
+           switchers.append(person)
+       self.labor_market.match(switchers, switching=True)
+
+   @staticmethod
+   def _sample_fraction(items: List[Any], fraction: float) -> List[Any]:
+       """Randomly sample a fraction of items (all of them when fraction >= 1)."""
+       if fraction >= 1.0:
+           return items
+       count = int(round(len(items) * max(0.0, fraction)))
+       return random.sample(items, count)
+
+   def _regional_param_array(self, key: str) -> np.ndarray:
+       """Cultural parameter for every region as an array indexed by region."""
+       return np.array([self.get_cultural_params(r)[key] for r in range(WORLD_REGIONS)], dtype=float)
+
+   def _process_company_kernel(self, companies: List[Company]) -> List[Tuple[int, float, float, str]]:
+       """Apply the daily company update in bulk and return sell orders."""
        sell_orders: List[Tuple[int, float, float, str]] = []
+       if not companies:
+           return sell_orders
        for company in companies:
-           if company.is_bankrupt:
-               continue
            company.ensure_financial_params()
-           cultural_params = self.get_cultural_params(region)
-           local_stats = self.region_stats.get(region, {})
-
-           competition_pressure = 1 + local_stats.get('company_density', 0.0) * 2
-           raw_competition_cost = cultural_params['competition_cost'] * len(company.employees) * competition_pressure
-           if company.capital > 0:
-               affordable_cap = company.capital * COMPANY_COMPETITION_CAPITAL_FRACTION + raw_competition_cost * 0.1
-               competition_cost = min(raw_competition_cost, affordable_cap)
-           else:
-               competition_cost = raw_competition_cost * 0.1
-           company.capital -= competition_cost
-
-           if company.employees and company.capital > 0:
-               innovation_cost = cultural_params['innovation_cost'] * len(company.employees)
-               if company.capital > innovation_cost:
-                   company.capital -= innovation_cost
-                   training_boost = (innovation_cost / max(1, len(company.employees))) * 5
-                   for employee in random.sample(company.employees, min(3, len(company.employees))):
-                       employee.apply_training_boost(training_boost)
-
-           if company.employees:
-               profitable_products = []
-               for n in range(2, 20):
-                   if company.can_produce(n):
-                       efficiency = calculate_efficiency(n)
-                       price = self.market.get_price(n)
-                       profit_margin = price * efficiency
-                       profitable_products.append((profit_margin, n))
-
-               if profitable_products:
-                   if company.production_targets:
-                       profitable_products = [
-                           product for product in profitable_products
-                           if product[1] in company.production_targets
-                       ] or profitable_products
-                   profitable_products.sort(reverse=True)
-                   best_product = profitable_products[0][1]
-                   production_capacity = len(company.employees) * 10
-                   produced = company.produce(best_product, production_capacity)
-                   if produced > 0:
-                       price = self.market.get_price(best_product) * (1 - MARKET_FRICTION)
-                       sell_orders.append((best_product, produced, price, company.id))
-
-               company.pay_salaries()
-               salary_bill = company.total_salary_bill()
-               buffer_target = salary_bill * cultural_params['hiring_capital_days']
-               if company.capital < buffer_target * 0.6:
-                   self._seek_investment(company, cultural_params, buffer_target - company.capital)
-
-           company.update_financial_distress()
+       ledger = CompanyLedger(companies)
+       region = ledger.region
+       density = np.array([self.region_stats.get(r, {}).get('company_density', 0.0)
+                           for r in range(WORLD_REGIONS)], dtype=float)[region]
+       hiring_days = self._regional_param_array('hiring_capital_days')[region]
+       staffed = ledger.headcount > 0
+
+       # Competition cost
+       competition_pressure = 1 + density * 2
+       raw_competition_cost = self._regional_param_array('competition_cost')[region] * ledger.headcount * competition_pressure
+       affordable_cap = ledger.capital * COMPANY_COMPETITION_CAPITAL_FRACTION + raw_competition_cost * 0.1
+       ledger.capital -= np.where(ledger.capital > 0,
+                                  np.minimum(raw_competition_cost, affordable_cap),
+                                  raw_competition_cost * 0.1)
+
+       # Innovation spending funds training for a few employees
+       innovation_cost = self._regional_param_array('innovation_cost')[region] * ledger.headcount
+       innovating = staffed & (ledger.capital > 0) & (ledger.capital > innovation_cost)
+       ledger.capital[innovating] -= innovation_cost[innovating]
+       training_boost = innovation_cost / np.maximum(1, ledger.headcount) * 5
+       for i in np.flatnonzero(innovating):
+           employees = companies[i].employees
+           for employee in random.sample(employees, min(3, len(employees))):
+               employee.apply_training_boost(training_boost[i])
+
+       # Production of the best-priced producible product
+       products = np.zeros(len(companies), dtype=np.int64)
+       for i in np.flatnonzero(staffed):
+           company = companies[i]
+           menu = company.product_menu()
+           if company.production_targets:
+               menu = [item for item in menu if item[0] in company.production_targets] or menu
+           if menu:
+               products[i] = max((self.market.get_price(n) * efficiency, n) for n, efficiency in menu)[1]
+       weights = get_product_weights()[products]
+       quantity = ledger.headcount * 10.0
+       cost = weights * quantity
+       short = ledger.capital < cost
+       quantity[short] = np.maximum(0.0, ledger.capital[short] / np.maximum(weights[short], 1e-12))
+       producing = (products > 0) & (quantity > 0)
+       ledger.capital[producing] -= (weights * quantity)[producing]
+       produced = quantity * (1 - ENTROPY_LOSS)
+       for i in np.flatnonzero(producing):
+           company = companies[i]
+           number = int(products[i])
+           company.inventory[number] = company.inventory.get(number, 0) + float(produced[i])
+           price = self.market.get_price(number) * (1 - MARKET_FRICTION)
+           sell_orders.append((number, float(produced[i]), price, company.id))
+
+       # Salaries, with restructuring or bankruptcy for companies short of cash
+       paying = staffed & (ledger.payroll > 0)
+       restructuring = np.flatnonzero(paying & (ledger.capital < ledger.payroll * COMPANY_RESTRUCTURE_PAY_RATIO))
+       if len(restructuring):
+           ledger.push(restructuring)
+           for i in restructuring:
+               companies[i].restructure_if_needed()
+           ledger.pull(restructuring)
+           paying &= ledger.payroll > 0
+       payout = np.clip(ledger.capital, 0.0, ledger.payroll)
+       pay_ratio = np.divide(payout, ledger.payroll, out=np.zeros_like(payout), where=ledger.payroll > 0)
+       bankrupt = np.flatnonzero(paying & (pay_ratio <= 0) & (ledger.capital <= ledger.debt_limit()))
+       if len(bankrupt):
+           ledger.push(bankrupt)
+           for i in bankrupt:
+               companies[i].bankruptcy()
+           ledger.pull(bankrupt)
+           paying[bankrupt] = False
+       for i in np.flatnonzero(paying):
+           ratio = float(pay_ratio[i])
+           for employee in companies[i].employees:
+               employee.resources += employee.salary * ratio
+       ledger.capital[paying] -= payout[paying]
+
+       # Investment rounds for companies below their salary buffer
+       buffer_target = ledger.payroll * hiring_days
+       seeking = np.flatnonzero(staffed & (ledger.capital < buffer_target * 0.6))
+       if len(seeking):
+           ledger.push(seeking)
+           for i in seeking:
+               company = companies[i]
+               self._seek_investment(company, self.get_cultural_params(company.location.region),
+                                     float(buffer_target[i]) - company.capital)
+           ledger.pull(seeking)
+
+       ledger.update_financial_distress()
+       ledger.push()
        return sell_orders
-   
+
    def _phase_market(self):
        """Market transactions and price discovery"""
        # People buy food (numbers for nutrition)
@@ -2250,22 +3793,21 @@ class World:
        if random.random() < 0.001:  # 0.1% chance per day
            creator = random.choice(list(self.people.values()))
            if creator.is_alive:
-               meme = Meme(creator, f"Meme_{self.current_day}")
+               meme = Meme(creator, self.population, f"Meme_{self.current_day}")
                meme.created_day = self.current_day
                self.memes[meme.id] = meme
+       if not self.memes:
+           return
        
-       # Spread existing memes
+       # Spread existing memes: each carrier contacts a few nearby people
+       contact_index = self.population.contact_index()
        for meme in list(self.memes.values()):
-           carriers = [self.people[pid] for pid in meme.carriers if pid in self.people]
-           
-           for carrier in carriers:
-               if not carrier.is_alive:
-                   continue
-               
-               # Try to spread to nearby people
-               nearby = self.get_nearby_people(carrier.location, 2)
-               for person in nearby[:3]:  # Limit spread attempts
-                   meme.spread(carrier, person)
+           carriers = meme.carriers.rows()
+           for start in range(0, len(carriers), MEME_SPREAD_CHUNK_SIZE):
+               sources = carriers[start:start + MEME_SPREAD_CHUNK_SIZE]
+               targets = self.population.sample_contacts(contact_index, sources,
+                                                         MEME_CONTACTS_PER_CARRIER, MEME_CONTACT_RADIUS)
+               meme.spread_to(targets)
            
            # Natural decay
            meme.decay()
@@ -2284,51 +3826,9 @@ class World:
 
        # Migration pressure
        candidates = [p for p in self.people.values() if p.is_alive and p.age >= 16 * 365]
-       if candidates:
-           sample = random.sample(candidates, min(1500, len(candidates)))
-           for person in sample:
-               if self.current_day - person.last_migration_day < MIGRATION_COOLDOWN_DAYS:
-                   continue
-               if person.resources < MIGRATION_COST_BASE:
-                   continue
-               base_drive = 0.5 + (1 - person.happiness / 100) * 0.6
-               resource_pressure = 1 - min(1.0, person.resources / 500)
-               ambition = (person.traits[Trait.HUMBLE_AMBITIOUS] + 100) / 200
-               drive = base_drive + resource_pressure * 0.4 + ambition * 0.3
-               if person.employer:
-                   drive *= 0.6
-               move_chance = MIGRATION_BASE_RATE * drive
-               if random.random() > move_chance:
-                   continue
-
-               current_region = person.location.region
-               current_score = self._region_opportunity_score(current_region)
-               region_scores = []
-               for region in range(WORLD_REGIONS):
-                   if region == current_region:
-                       continue
-                   score = self._region_opportunity_score(region)
-                   if score >= current_score + MIGRATION_OPPORTUNITY_THRESHOLD:
-                       region_scores.append((score, region))
-               if not region_scores:
-                   continue
-               region_scores.sort(reverse=True)
-               top_regions = region_scores[:5]
-               chosen_region = random.choice([r for _, r in top_regions])
-
-               distance = abs(chosen_region - current_region) / max(1, WORLD_REGIONS - 1)
-               cost = MIGRATION_COST_BASE * (1 + distance * 2)
-               if person.resources < cost:
-                   continue
-               person.resources -= cost
-               new_location = Location(
-                   region=chosen_region,
-                   district=random.randint(0, DISTRICTS_PER_REGION - 1),
-                   cell_x=random.randint(0, 9),
-                   cell_y=random.randint(0, 9)
-               )
-               self.move_person(person, new_location)
-               person.last_migration_day = self.current_day
+       sample = self._sample_fraction(candidates, MIGRATION_SAMPLE_FRACTION)
+       if sample:
+           self._migrate(sample)
        
        # Startup wellbeing support
        if self.current_day <= STARTUP_WELLBEING_DAYS:
@@ -2377,102 +3877,120 @@ class World:
            for prime in person.known_primes:
                if prime not in self.stats['prime_discoveries']:
                    self.stats['prime_discoveries'][prime] = self.current_day
-                   logger.info(f"Prime {prime} discovered on day {self.current_day}")
+                   event_log.count('primes discovered')
+                   logger.debug("Prime %d discovered on day %d", prime, self.current_day)
    
-   def _check_reproduction(self, person: Person) -> bool:
-       """Check if person should reproduce"""
-       if not person.is_alive:
-           return False
-       
-       age_years = person.age / 365
-       if age_years < MIN_REPRODUCTION_AGE or age_years > MAX_REPRODUCTION_AGE:
-           return False
-       
-       # Need resources
-       child_cost = self._calculate_child_cost(person.location.region)
-       if person.resources < child_cost * 0.5:
-           return False
-       
-       # Find potential partner
-       partner = None
-       relationship_score = 0.0
-       if person.relationships:
-           best_relationship = max(person.relationships.items(), key=lambda x: x[1])
-           if best_relationship[1] > REPRODUCTION_RELATIONSHIP_THRESHOLD:  # Relationship threshold
-               partner_id = best_relationship[0]
-               if partner_id in self.people:
-                   candidate = self.people[partner_id]
-                   candidate_age = candidate.age / 365
-                   if (candidate.is_alive and candidate.resources > child_cost * 0.5 and
-                           MIN_REPRODUCTION_AGE <= candidate_age <= MAX_REPRODUCTION_AGE):
-                       partner = candidate
-                       relationship_score = best_relationship[1]
-       
-       if partner:
-           combined_resources = (person.resources + partner.resources) / (child_cost * 2)
-           happiness_factor = (person.happiness + partner.happiness) / 200
-           relationship_factor = max(0.2, relationship_score / 100)
-           chance = BASE_REPRODUCTION_CHANCE * (0.5 + combined_resources) * (0.5 + happiness_factor)
-           chance *= relationship_factor
-           modifier = self._calculate_reproduction_modifier(person, partner)
-           chance *= modifier
-           max_chance = BASE_REPRODUCTION_CAP * modifier
-           return random.random() < min(chance, max_chance)
-       
-       # Allow single-parent births at a lower rate
-       resource_factor = min(1.5, person.resources / child_cost)
-       happiness_factor = person.happiness / 100
-       chance = SINGLE_PARENT_REPRODUCTION_CHANCE * (0.5 + resource_factor) * (0.5 + happiness_factor)
-       modifier = self._calculate_reproduction_modifier(person, None)
-       chance *= modifier
-       max_chance = SINGLE_PARENT_REPRODUCTION_CAP * modifier
-       return random.random() < min(chance, max_chance)
-   
-   def _handle_birth(self, parent: Person):
-       """Handle birth of new person"""
-       # Find partner
-       partner = None
-       if parent.relationships:
-           best_relationship = max(parent.relationships.items(), key=lambda x: x[1])
-           if best_relationship[1] > REPRODUCTION_RELATIONSHIP_THRESHOLD:
-               partner_id = best_relationship[0]
-               if partner_id in self.people:
-                   candidate = self.people[partner_id]
-                   candidate_age = candidate.age / 365
-                   if (candidate.is_alive and candidate.resources > CHILD_COST * 0.5 and
-                           MIN_REPRODUCTION_AGE <= candidate_age <= MAX_REPRODUCTION_AGE):
-                       partner = candidate
-       
-       # Create child
-       if partner:
-           child = Person(parents=(parent, partner))
-       else:
-           child = Person(parents=(parent, parent))  # Single parent
-       
-       child.birth_day = self.current_day
-       child.location = parent.location
-       
-       # Parents pay cost
-       child_cost = self._calculate_child_cost(parent.location.region)
-       if partner:
-           parent.resources -= child_cost / 2
-           partner.resources -= child_cost / 2
-       else:
-           parent.resources -= child_cost
-       
-       # Family relationships
-       child.family['parent1'] = parent.id
-       if partner:
-           child.family['parent2'] = partner.id
-       
-       parent.family[f'child_{child.id}'] = child.id
-       if partner:
-           partner.family[f'child_{child.id}'] = child.id
-       
-       self.add_person(child)
-       self.stats['births'] += 1
-       
-       logger.debug(f"Birth: {child.id} born to {parent.id}")
+   def _phase_births(self, people: List[Person]):
+       """Two-stage reproduction: vectorized birth draws, then bulk child allocation."""
+       parents, partners, costs = self._draw_births(people)
+       if parents:
+           self._allocate_children(parents, partners, costs)
+
+   def _draw_births(self, people: List[Person]) -> Tuple[List[Person], List[Optional[Person]], np.ndarray]:
+       """Decide who has a child today as (parents, partners or None, child costs)."""
+       adults = [p for p in people if p.is_alive and
+                 MIN_REPRODUCTION_AGE <= p.age / 365 <= MAX_REPRODUCTION_AGE]
+       if not adults:
+           return [], [], np.zeros(0)
+       n = len(adults)
+
+       def column(getter, dtype=np.float64) -> np.ndarray:
+           return np.fromiter((getter(p) for p in adults), dtype=dtype, count=n)
+
+       resources = column(lambda p: p.resources)
+       happiness = column(lambda p: p.happiness)
+       health = column(lambda p: p.health)
+       nutrition = column(lambda p: p.nutrition_level)
+       knowledge = column(lambda p: len(p.known_primes))
+       genes = column(lambda p: sum(getattr(p, gene, 1.0) for gene in GENE_NAMES) / len(GENE_NAMES))
+       regions = column(lambda p: p.location.region, np.int64)
+       rows = self.population.rows(adults)
+
+       child_cost = np.array([self._calculate_child_cost(r) for r in range(WORLD_REGIONS)])[regions]
+       eligible = resources >= child_cost * 0.5
+
+       # Partner: strongest tie, if it is strong enough and an eligible adult too
+       adult_of_row = np.full(self.population.capacity, -1, dtype=np.int64)
+       adult_of_row[rows] = np.arange(n)
+       partner_rows, strength = self.relationships.best_partners(rows, self.current_day)
+       partner = np.where(partner_rows >= 0, adult_of_row[np.maximum(partner_rows, 0)], -1)
+       partner[strength <= REPRODUCTION_RELATIONSHIP_THRESHOLD] = -1
+       other = np.maximum(partner, 0)
+       paired = (partner >= 0) & (resources[other] > child_cost * 0.5)
+
+       def couple_mean(values: np.ndarray) -> np.ndarray:
+           return np.where(paired, (values + values[other]) / 2, values)
+
+       # Fertility modifier from genetics, knowledge, wellbeing and the regional economy
+       nutrition_norm = np.minimum(1.0, nutrition / max(NUTRITION_REQUIREMENT, 0.01))
+       wellbeing = np.clip(0.4 * (health / 100) + 0.4 * (happiness / 100) + 0.2 * nutrition_norm, 0.0, 1.0)
+       gene_factor = np.clip(couple_mean(genes), 0.7, 1.3)
+       knowledge_score = np.clip(np.log1p(couple_mean(knowledge)) / math.log1p(10), 0.0, 1.0)
+       modifier = (gene_factor * (0.8 + 0.5 * knowledge_score) * (0.7 + 0.6 * couple_mean(wellbeing)) *
+                   self._region_economy_factors()[regions])
+       modifier = np.clip(modifier, REPRODUCTION_MODIFIER_MIN, REPRODUCTION_MODIFIER_MAX)
+
+       couple_chance = (BASE_REPRODUCTION_CHANCE *
+                        (0.5 + (resources + resources[other]) / (child_cost * 2)) *
+                        (0.5 + (happiness + happiness[other]) / 200) *
+                        np.maximum(0.2, strength / 100))
+       couple_chance = np.minimum(couple_chance * modifier, BASE_REPRODUCTION_CAP * modifier)
+       single_chance = (SINGLE_PARENT_REPRODUCTION_CHANCE *
+                        (0.5 + np.minimum(1.5, resources / child_cost)) * (0.5 + happiness / 100))
+       single_chance = np.minimum(single_chance * modifier, SINGLE_PARENT_REPRODUCTION_CAP * modifier)
+       chance = np.where(paired, couple_chance, single_chance)
+
+       births = np.flatnonzero(eligible & (np.random.random(n) < chance))
+       parents = [adults[i] for i in births]
+       partners = [adults[partner[i]] if paired[i] else None for i in births]
+       return parents, partners, child_cost[births]
+
+   def _allocate_children(self, parents: List[Person], partners: List[Optional[Person]], costs: np.ndarray):
+       """Create children in bulk with inherited traits and genetics, and charge their parents."""
+       count = len(parents)
+       other_parents = [partner or parent for parent, partner in zip(parents, partners)]
+       rows_a = self.population.rows(parents)
+       rows_b = self.population.rows(other_parents)
+       traits = self.population.traits
+       child_traits = (traits[rows_a] + traits[rows_b]) / 2 + np.random.uniform(
+           -TRAIT_INHERITANCE_VARIANCE, TRAIT_INHERITANCE_VARIANCE, (count, len(TRAIT_ORDER)))
+       child_traits = np.clip(child_traits, -100, 100).astype(np.float32)
+
+       genes_a = np.array([[getattr(p, gene, 1.0) for gene in GENE_NAMES] for p in parents])
+       genes_b = np.array([[getattr(p, gene, 1.0) for gene in GENE_NAMES] for p in other_parents])
+       mutations = np.random.random(genes_a.shape) < GENETIC_MUTATION_RATE
+       child_genes = (genes_a + genes_b) / 2 + mutations * np.random.uniform(-0.05, 0.05, genes_a.shape)
+       child_genes = np.clip(child_genes, GENE_MIN, GENE_MAX)
+
+       # One entropy read for every child id instead of a uuid4() call each
+       entropy = os.urandom(16 * count)
+       children = []
+       for i, (parent, partner) in enumerate(zip(parents, partners)):
+           child = Person(traits=dict(zip(TRAIT_ORDER, child_traits[i].tolist())),
+                          genetics=dict(zip(GENE_NAMES, child_genes[i].tolist())),
+                          location=parent.location,
+                          person_id=str(uuid.UUID(bytes=entropy[16 * i:16 * i + 16], version=4)))
+           child.birth_day = self.current_day
+           event_journal.record('birth', child.id, parent.id, child.location.region, float(costs[i]))
+
+           # Parents pay cost
+           if partner:
+               parent.resources -= costs[i] / 2
+               partner.resources -= costs[i] / 2
+           else:
+               parent.resources -= costs[i]
+
+           # Family relationships
+           child.family['parent1'] = parent.id
+           parent.family[f'child_{child.id}'] = child.id
+           if partner:
+               child.family['parent2'] = partner.id
+               partner.family[f'child_{child.id}'] = child.id
+           children.append(child)
+
+       self.add_people(children, child_traits)
+       self.stats['births'] += count
+       event_log.count('births', count)
    
    def _collect_stats(self):
        """Collect daily statistics"""
@@ -2509,6 +4027,21 @@ class World:
        # Meme spread
        total_meme_carriers = sum(len(m.carriers) for m in self.memes.values())
        self.stats['meme_spread'].append(total_meme_carriers)
+       self.memo.invalidate('gdp_per_capita')
+
+       if self.current_day % DYNASTY_SAMPLE_DAYS == 0:
+           self._sample_dynasties()
+
+   def _sample_dynasties(self):
+       """Append a dynasty metric sample from the genealogy index."""
+       stats = self.genealogy.dynasty_stats(self.people)
+       descendants = stats['descendants']
+       dynasties = descendants > DYNASTY_MIN_DESCENDANTS
+       metrics = self.dynasty_metrics
+       metrics['day'].append(self.current_day)
+       metrics['dynasties'].append(int(dynasties.sum()))
+       metrics['largest'].append(int(descendants.max()) if len(descendants) else 0)
+       metrics['top_wealth'].append(float(stats['wealth'][dynasties].max()) if dynasties.any() else 0.0)
    
    def _calculate_gini(self, resources: List[float]) -> float:
        """Calculate Gini coefficient"""
@@ -2532,12 +4065,13 @@ class World:
                immigrant = Person()
                immigrant.age = random.randint(20 * 365, 40 * 365)
                immigrant.resources = random.uniform(100, 500)
-               immigrant.known_primes = {2, 3, 5}
+               for prime in (2, 3, 5):
+                   immigrant.learn_prime(prime)
                self.add_person(immigrant)
        
        # Prevent economic collapse
        if self.current_day > STARTUP_WELLBEING_DAYS and len(self.stats['gdp']) >= 14:
-           avg_gdp = np.mean(self.stats['gdp'][-14:])
+           avg_gdp = self.stats['gdp'].rolling_mean(14)
            gdp_per_capita = avg_gdp / max(1, population)
            resources = [p.resources for p in self.people.values() if p.is_alive]
            avg_resources = np.mean(resources) if resources else 0
@@ -2591,14 +4125,13 @@ class Visualizer:
            return
        
        stats = self.world.stats
-       days = range(len(stats['population']))
        
        # Clear all axes
        for ax in self.axes.flat:
            ax.clear()
        
        # Population
-       self.axes[0, 0].plot(days, stats['population'], 'b-')
+       self.axes[0, 0].plot(stats['population'].days(), stats['population'].values, 'b-')
        self.axes[0, 0].set_xlabel('Days')
        self.axes[0, 0].set_ylabel('Population')
        self.axes[0, 0].set_title('Population')
@@ -2606,7 +4139,7 @@ class Visualizer:
        
        # GDP
        if stats['gdp']:
-           self.axes[0, 1].plot(days, stats['gdp'], 'g-')
+           self.axes[0, 1].plot(stats['gdp'].days(), stats['gdp'].values, 'g-')
            self.axes[0, 1].set_xlabel('Days')
            self.axes[0, 1].set_ylabel('GDP')
            self.axes[0, 1].set_title('Economic Activity')
@@ -2614,7 +4147,7 @@ class Visualizer:
        
        # Gini
        if stats['gini']:
-           self.axes[0, 2].plot(days, stats['gini'], 'r-')
+           self.axes[0, 2].plot(stats['gini'].days(), stats['gini'].values, 'r-')
            self.axes[0, 2].set_xlabel('Days')
            self.axes[0, 2].set_ylabel('Gini Coefficient')
            self.axes[0, 2].set_title('Inequality')
@@ -2623,7 +4156,7 @@ class Visualizer:
        
        # Happiness
        if stats['happiness']:
-           self.axes[1, 0].plot(days, stats['happiness'], 'm-')
+           self.axes[1, 0].plot(stats['happiness'].days(), stats['happiness'].values, 'm-')
            self.axes[1, 0].set_xlabel('Days')
            self.axes[1, 0].set_ylabel('Average Happiness')
            self.axes[1, 0].set_title('Well-being')
@@ -2632,7 +4165,7 @@ class Visualizer:
        
        # Knowledge
        if stats['knowledge']:
-           self.axes[1, 1].plot(days, stats['knowledge'], 'c-')
+           self.axes[1, 1].plot(stats['knowledge'].days(), stats['knowledge'].values, 'c-')
            self.axes[1, 1].set_xlabel('Days')
            self.axes[1, 1].set_ylabel('Avg Known Primes')
            self.axes[1, 1].set_title('Knowledge Level')
@@ -2641,10 +4174,10 @@ class Visualizer:
        # Innovation and Memes
        if stats['innovation']:
            ax = self.axes[1, 2]
-           ax.plot(days, stats['innovation'], 'b-', label='Primes Discovered')
+           ax.plot(stats['innovation'].days(), stats['innovation'].values, 'b-', label='Primes Discovered')
            if stats['meme_spread']:
                ax2 = ax.twinx()
-               ax2.plot(days, stats['meme_spread'], 'orange', label='Meme Carriers')
+               ax2.plot(stats['meme_spread'].days(), stats['meme_spread'].values, 'orange', label='Meme Carriers')
                ax2.set_ylabel('Meme Carriers', color='orange')
            ax.set_xlabel('Days')
            ax.set_ylabel('Cumulative Discoveries', color='b')
@@ -2834,8 +4367,8 @@ class PygameViewer:
    def _append_metrics(self):
        stats = self.world.stats
        self.metric_history['population'].append(float(len(self.world.people)))
-       self.metric_history['gdp'].append(float(stats['gdp'][-1]) if stats['gdp'] else 0.0)
-       self.metric_history['happiness'].append(float(stats['happiness'][-1]) if stats['happiness'] else 0.0)
+       self.metric_history['gdp'].append(stats['gdp'].last())
+       self.metric_history['happiness'].append(stats['happiness'].last())
        self.metric_history['companies'].append(float(len(self.world.companies)))
        self.metric_history['births'].append(float(stats['births']))
        self.metric_history['deaths'].append(float(stats['deaths']))
@@ -2965,9 +4498,9 @@ class PygameViewer:
            f"Day: {self.world.current_day}",
            f"Population: {len(self.world.people)}",
            f"Companies: {len(self.world.companies)}",
-           f"GDP: {stats['gdp'][-1]:.2f}" if stats['gdp'] else "GDP: 0.00",
-           f"Happiness: {stats['happiness'][-1]:.2f}" if stats['happiness'] else "Happiness: 0.00",
-           f"Gini: {stats['gini'][-1]:.3f}" if stats['gini'] else "Gini: 0.000",
+           f"GDP: {stats['gdp'].last():.2f}",
+           f"Happiness: {stats['happiness'].last():.2f}",
+           f"Gini: {stats['gini'].last():.3f}",
            f"Births: {stats['births']}  Deaths: {stats['deaths']}",
            f"Moved people/day: {moved_people}",
            f"Moved companies/day: {moved_companies}",
@@ -3046,6 +4579,1103 @@ class PygameViewer:
 
 # ============= CHECKPOINT SYSTEM =============
 
+def pack_ragged(groups: List[List], dtype) -> Tuple[np.ndarray, np.ndarray]:
+   """Flatten a list of lists into (offsets, values) columns."""
+   offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+   offsets[1:] = np.cumsum([len(group) for group in groups])
+   values = np.array([value for group in groups for value in group], dtype=dtype)
+   return offsets, values.reshape(-1)
+
+def unpack_ragged(offsets: np.ndarray, values: np.ndarray) -> List[List]:
+   flat = values.tolist()
+   bounds = offsets.tolist()
+   return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+PERSON_FLOAT_COLUMNS = (
+   'happiness', 'health', 'nutrition_efficiency', 'starvation_resistance', 'health_resilience',
+   'intelligence', 'charisma', 'investment_appetite', 'investment_sentiment', 'resources',
+   'nutrition_level', 'energy', 'stress', 'metabolism', 'salary', 'owned_space', 'rented_space',
+   'reputation'
+)
+PERSON_INT_COLUMNS = ('age', 'birth_day', 'last_job_change_day', 'last_migration_day', 'life_expectancy_days')
+PERSON_ATTRS = set(PERSON_FLOAT_COLUMNS + PERSON_INT_COLUMNS) | {
+   'id', 'is_alive', 'death_day', 'traits', 'employer', 'political_leaning', 'location',
+   'known_primes', 'learning_progress', 'family', 'memory'
+}
+COMPANY_FLOAT_COLUMNS = ('capital', 'payroll', 'efficiency', 'reputation', 'market_share', 'shares_outstanding')
+COMPANY_INT_COLUMNS = ('founded_day', 'last_funding_day', 'distress_days')
+COMPANY_ATTRS = set(COMPANY_FLOAT_COLUMNS + COMPANY_INT_COLUMNS) | {
+   'id', 'name', 'founder_id', 'location', 'is_bankrupt', 'employees', 'inventory', '_product_menu',
+   'collective_knowledge', 'knowledge_counts', '_counted_primes', 'production_targets', 'shareholders'
+}
+LOCATION_COLUMNS = ('region', 'district', 'cell_x', 'cell_y')
+
+def _array_state(obj, skip=()) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+   """Split an object's attributes into copies of its NumPy arrays and the remaining plain state."""
+   arrays, plain = {}, {}
+   for key, value in vars(obj).items():
+       if key in skip:
+           continue
+       if isinstance(value, np.ndarray):
+           arrays[key] = value.copy()
+       else:
+           plain[key] = value
+   return arrays, plain
+
+# How each table is cut in a delta checkpoint: people aligned by id,
+# row-aligned tables by position, stats by the samples appended since the
+# base. Tables not listed are stored whole: companies (their rosters hold
+# people rows, which shift with every birth and death) and orders (the book
+# is mostly rewritten daily) are each a few percent of a checkpoint.
+DELTA_TABLES = {'people': 'id', 'population': 'position', 'relationships': 'position',
+                'genealogy': 'position', 'grid': 'position', 'stats': 'append'}
+DELTA_META_COLUMNS = {'population': ('ids', 'free_rows', 'tombstones'), 'grid': ('shape',)}
+
+def _table_layout(name: str, columns) -> Tuple[List[str], Dict[str, List[str]], Tuple[str, ...]]:
+   """Split a table's columns into row-aligned columns, ragged groups and whole-table metadata."""
+   meta = DELTA_META_COLUMNS.get(name, ())
+   keys = [key for key in columns if not key.startswith('_delta.')]
+   ragged = {key: [other for other in keys if other != key and other.startswith(key[:-len('offsets')])]
+             for key in keys if key.endswith('.offsets')}
+   grouped = set(ragged) | {key for values in ragged.values() for key in values}
+   rows = [key for key in keys if key not in grouped and key not in meta]
+   return rows, ragged, meta
+
+def column_hashes(column: np.ndarray) -> np.ndarray:
+   """64-bit FNV-style hash of every row of a column (rows are compared, not stored)."""
+   n = len(column)
+   raw = np.ascontiguousarray(column).reshape(n, -1).view(np.uint8) if n else np.zeros((0, 8), np.uint8)
+   if raw.shape[1] % 8:
+       raw = np.hstack([raw, np.zeros((n, 8 - raw.shape[1] % 8), dtype=np.uint8)])
+   words = raw.view(np.uint64)
+   hashes = np.full(n, 0xcbf29ce484222325, dtype=np.uint64)
+   for j in range(words.shape[1]):
+       hashes ^= words[:, j]
+       hashes *= np.uint64(0x100000001b3)
+   return hashes
+
+def ragged_digests(offsets: np.ndarray, values: List[np.ndarray]) -> np.ndarray:
+   """16-byte digest of every row of a ragged group."""
+   bounds = [(np.asarray(offsets) * column.itemsize).tolist() for column in values]
+   data = [np.ascontiguousarray(column).tobytes() for column in values]
+   digests = []
+   for i in range(len(offsets) - 1):
+       digest = hashlib.blake2b(digest_size=16)
+       for chunk, bound in zip(data, bounds):
+           digest.update(chunk[bound[i]:bound[i + 1]])
+       digests.append(digest.digest())
+   return np.array(digests, dtype='S16')
+
+def take_ragged(offsets: np.ndarray, values: Dict[str, np.ndarray], index: np.ndarray) -> Dict[str, np.ndarray]:
+   """Rows `index` of a ragged group as new offsets plus the matching values."""
+   offsets = np.asarray(offsets)
+   index = np.asarray(index, dtype=np.int64)
+   starts = offsets[index]
+   lengths = offsets[index + 1] - starts
+   new_offsets = np.zeros(len(index) + 1, dtype=np.int64)
+   new_offsets[1:] = np.cumsum(lengths)
+   flat = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+   return {'offsets': new_offsets, **{key: np.asarray(column)[flat] for key, column in values.items()}}
+
+class DeltaBase:
+   """Row hashes of the last full checkpoint, used to cut delta checkpoints against it.
+
+   Deltas are column-granular: for every row-aligned column only the rows
+   whose value changed since the base are stored, next to their indices.
+   """
+
+   def __init__(self, name: str):
+       self.name = name
+       self.hashes: Dict[str, Dict[str, np.ndarray]] = {}
+       self.person_rows: Dict[bytes, int] = {}
+       self.series: Dict[str, Tuple[int, int]] = {}  # name -> (offset, in-memory size)
+
+   @staticmethod
+   def _hashes(name: str, columns) -> Dict[str, np.ndarray]:
+       rows, ragged, _ = _table_layout(name, columns)
+       hashes = {key: column_hashes(np.asarray(columns[key])) for key in rows}
+       for offsets_key, value_keys in ragged.items():
+           hashes[offsets_key] = ragged_digests(columns[offsets_key], [np.asarray(columns[k]) for k in value_keys])
+       return hashes
+
+   def record(self, name: str, columns, checkpoint: 'WorldCheckpoint'):
+       mode = DELTA_TABLES.get(name)
+       if mode == 'append':
+           self.series = {series: (meta['offset'], len(columns[f'{series}.values']))
+                          for series, meta in checkpoint.plain_state['series'].items()}
+           return
+       if mode == 'id':
+           self.person_rows = {pid: row for row, pid in enumerate(columns['id'].tolist())}
+       if mode is not None:
+           self.hashes[name] = self._hashes(name, columns)
+
+   def delta(self, name: str, columns, checkpoint: 'WorldCheckpoint') -> Dict[str, np.ndarray]:
+       """Reduce a full table to what changed since the base."""
+       mode = DELTA_TABLES.get(name)
+       if mode is None:
+           return columns
+       if mode == 'append':
+           delta = {}
+           for series, meta in checkpoint.plain_state['series'].items():
+               values = columns[f'{series}.values']
+               offset, size = self.series.get(series, (-1, 0))
+               if offset == meta['offset'] and len(values) >= size:
+                   delta[f'{series}.tail'] = values[size:]
+               else:
+                   delta[f'{series}.values'] = values
+                   delta[f'{series}.prefix'] = columns[f'{series}.prefix']
+           return delta
+
+       rows, ragged, meta = _table_layout(name, columns)
+       base = self.hashes[name]
+       n = len(columns[rows[0]])
+       if mode == 'id':
+           pick = np.array([self.person_rows.get(pid, -1) for pid in columns['id'].tolist()], dtype=np.int64)
+           delta = {'_delta.ids': columns['id']}
+       else:
+           base_rows = len(base[rows[0]])
+           pick = np.where(np.arange(n) < base_rows, np.arange(n), -1)
+           delta = {'_delta.count': np.array([n], dtype=np.int64)}
+       known = pick >= 0
+       safe_pick = np.where(known, pick, 0)
+
+       def changed_rows(key: str, current: np.ndarray) -> np.ndarray:
+           previous = base[key][safe_pick] if len(base[key]) else np.zeros(n, dtype=current.dtype)
+           return np.flatnonzero(~known | (current != previous))
+
+       for key in rows:
+           if key == 'id' and mode == 'id':
+               continue
+           column = np.asarray(columns[key])
+           changed = changed_rows(key, column_hashes(column))
+           delta[key] = column[changed]
+           delta[f'_delta.rows.{key}'] = changed
+       for offsets_key, value_keys in ragged.items():
+           values = {key: np.asarray(columns[key]) for key in value_keys}
+           changed = changed_rows(offsets_key, ragged_digests(columns[offsets_key], list(values.values())))
+           group = take_ragged(columns[offsets_key], values, changed)
+           delta[offsets_key] = group.pop('offsets')
+           delta.update(group)
+           delta[f'_delta.rows.{offsets_key}'] = changed
+       for key in meta:
+           delta[key] = np.asarray(columns[key])
+       return delta
+
+   @staticmethod
+   def merge(name: str, mode: str, base, delta) -> Dict[str, np.ndarray]:
+       """Rebuild a full table from the base table and a delta against it."""
+       if mode == 'append':
+           merged = {}
+           for key in delta:
+               if key.endswith('.tail'):
+                   series = key[:-len('.tail')]
+                   prefix = np.asarray(base[f'{series}.prefix'])
+                   merged[f'{series}.values'] = np.concatenate([base[f'{series}.values'], delta[key]])
+                   merged[f'{series}.prefix'] = np.concatenate(
+                       [prefix, np.cumsum(np.concatenate([prefix[-1:], delta[key]]))[1:]])
+               else:
+                   merged[key] = delta[key]
+           return merged
+
+       rows, ragged, meta = _table_layout(name, base)
+       if mode == 'id':
+           base_index = {pid: row for row, pid in enumerate(base['id'].tolist())}
+           pick = np.array([base_index.get(pid, -1) for pid in delta['_delta.ids'].tolist()], dtype=np.int64)
+       else:
+           n = int(delta['_delta.count'][0])
+           base_rows = len(base[rows[0]])
+           pick = np.where(np.arange(n) < base_rows, np.arange(n), -1)
+       safe_pick = np.where(pick >= 0, pick, 0)
+
+       merged = {}
+       for key in rows:
+           if key == 'id' and mode == 'id':
+               merged[key] = np.asarray(delta['_delta.ids'])
+               continue
+           column = np.asarray(base[key])
+           update = np.asarray(delta[key])
+           if len(column):
+               merged[key] = column[safe_pick].astype(np.result_type(column, update))
+           else:
+               merged[key] = np.zeros((len(pick),) + update.shape[1:], dtype=update.dtype)
+           merged[key][np.asarray(delta[f'_delta.rows.{key}'])] = update
+       for offsets_key, value_keys in ragged.items():
+           changed = np.asarray(delta[f'_delta.rows.{offsets_key}'])
+           base_offsets = np.asarray(base[offsets_key])
+           combined_offsets = np.concatenate([base_offsets, np.asarray(delta[offsets_key])[1:] + base_offsets[-1]])
+           combined = {key: np.concatenate([base[key], delta[key]]) for key in value_keys}
+           index = safe_pick.copy()
+           index[changed] = len(base_offsets) - 1 + np.arange(len(changed))
+           group = take_ragged(combined_offsets, combined, index)
+           merged[offsets_key] = group.pop('offsets')
+           merged.update(group)
+       for key in meta:
+           merged[key] = np.asarray(delta[key])
+       return merged
+
+class _CheckpointPickler(pickle.Pickler):
+   """Pickler that stores people, companies and columnar tables by reference."""
+
+   def __init__(self, file, checkpoint: 'WorldCheckpoint'):
+       super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+       self.checkpoint = checkpoint
+       world = checkpoint.world
+       self.references = {
+           id(world): ('world',),
+           id(world.population): ('population',),
+           id(world.relationships): ('relationships',),
+           id(world.market.order_book): ('orders',),
+           id(world.grid): ('grid',),
+           id(world.stats): ('stats',),
+       }
+
+   def persistent_id(self, obj):
+       if isinstance(obj, Person):
+           row = self.checkpoint.person_rows.get(obj.id)
+           if row is not None and self.checkpoint.people[row] is obj:
+               return ('person', row)
+       elif isinstance(obj, Company):
+           row = self.checkpoint.company_rows.get(obj.id)
+           if row is not None and self.checkpoint.companies[row] is obj:
+               return ('company', row)
+       return self.references.get(id(obj))
+
+class _CheckpointUnpickler(pickle.Unpickler):
+   def __init__(self, file, references: Dict[str, Any], people: List[Person], companies: List[Company]):
+       super().__init__(file)
+       self.references = references
+       self.people = people
+       self.companies = companies
+
+   def persistent_load(self, pid):
+       kind = pid[0]
+       if kind == 'person':
+           return self.people[pid[1]]
+       if kind == 'company':
+           return self.companies[pid[1]]
+       return self.references[kind]
+
+# Tunable model parameters, recorded in checkpoint manifests and restored on resume.
+# Schema tables, session settings and I/O options are deliberately not listed.
+SIMULATION_PARAMETERS = (
+   'INITIAL_POPULATION', 'WORLD_REGIONS', 'DISTRICTS_PER_REGION', 'CELLS_PER_DISTRICT', 'SPACE_PER_CELL',
+   'DAILY_ONE_PRODUCTION', 'NUTRITION_REQUIREMENT', 'STARVATION_THRESHOLD', 'NUTRITION_ABSORPTION_RATE',
+   'NUTRITION_BUFFER_TARGET', 'MAX_NUTRITION_LEVEL', 'HEALTH_RECOVERY_RATE', 'STARVATION_DAMAGE_BASE',
+   'STARVATION_DAMAGE_SCALE',
+   'GENETIC_MUTATION_RATE', 'GENE_MIN', 'GENE_MAX',
+   'PRIME_DISCOVERY_COST_MULTIPLIER', 'PRIME_DISCOVERY_TIME_MULTIPLIER', 'ENTROPY_LOSS', 'MARKET_FRICTION',
+   'KNOWLEDGE_DECAY_RATE', 'KNOWLEDGE_TRANSFER_RATE', 'START_COMPANY_RESOURCE_THRESHOLD', 'BASE_SALARY',
+   'HIRING_CAPITAL_DAYS', 'MAX_COMPANY_SIZE', 'GLOBAL_COMPANY_POP_RATIO', 'REGION_COMPANY_POP_RATIO',
+   'REGION_MARKET_MIN_POP', 'MIN_PROFIT_MARGIN', 'MARKET_DEMAND_LOOKBACK_DAYS', 'MIN_MARKET_DEMAND',
+   'COMPETITION_COST_BASE', 'INNOVATION_COST_BASE', 'ENTRY_COST_MULTIPLIER_BASE', 'BASE_ENTRY_CHANCE',
+   'MIN_ENTRY_CHANCE', 'INVESTMENT_SENTIMENT_BASE', 'STOCK_OPTION_DISCOUNT', 'INVESTMENT_COOLDOWN_DAYS',
+   'MAX_INVESTORS_PER_ROUND', 'MAX_INVESTMENT_FRACTION', 'COMPETENCY_SALARY_WEIGHT', 'KNOWLEDGE_SALARY_BONUS',
+   'JOB_SWITCH_THRESHOLD', 'JOB_SWITCH_COOLDOWN_DAYS', 'JOB_SEARCH_SAMPLE_FRACTION', 'JOB_SWITCH_SAMPLE_FRACTION',
+   'LABOR_MARKET_SEARCH_DEPTH', 'LABOR_MARKET_CROSS_REGION', 'MIGRATION_BASE_RATE', 'MIGRATION_COST_BASE',
+   'MIGRATION_COOLDOWN_DAYS', 'MIGRATION_OPPORTUNITY_THRESHOLD', 'MIGRATION_SAMPLE_FRACTION',
+   'MIGRATION_TOP_REGIONS', 'DAILY_LOCAL_MOVE_RATE', 'DAILY_DISTRICT_MOVE_RATE', 'COMPANY_DISTRESS_DEBT_FACTOR',
+   'COMPANY_MIN_DEBT_LIMIT', 'COMPANY_MAX_DISTRESS_DAYS', 'COMPANY_RESTRUCTURE_PAY_RATIO',
+   'COMPANY_RESTRUCTURE_MIN_EMPLOYEES', 'COMPANY_RESTRUCTURE_LAYOFF_SHARE', 'COMPANY_COMPETITION_CAPITAL_FRACTION',
+   'COMPANY_MAX_PRODUCT',
+   'CULTURE_DIM', 'CULTURE_COMPETITION_RATE', 'CULTURE_DRIFT', 'CULTURE_TOP_FRACTION', 'CULTURE_PARAM_SWING',
+   'TRAIT_INHERITANCE_VARIANCE', 'TRAIT_MUTATION_RATE', 'RELATIONSHIP_DISTANCE_THRESHOLD', 'RELATIONSHIP_DECAY',
+   'RELATIONSHIP_DEGREE_CAP', 'RELATIONSHIP_PRUNE_THRESHOLD', 'CHILD_COST', 'MIN_REPRODUCTION_AGE',
+   'MAX_REPRODUCTION_AGE', 'BASE_REPRODUCTION_CHANCE', 'SINGLE_PARENT_REPRODUCTION_CHANCE',
+   'REPRODUCTION_RELATIONSHIP_THRESHOLD', 'BASE_REPRODUCTION_CAP', 'SINGLE_PARENT_REPRODUCTION_CAP',
+   'REPRODUCTION_MODIFIER_MIN', 'REPRODUCTION_MODIFIER_MAX', 'GDP_PER_CAPITA_NORM', 'CHILD_COST_MULTIPLIER_MIN',
+   'CHILD_COST_MULTIPLIER_MAX',
+   'LIFE_STAGES', 'BASE_LIFE_EXPECTANCY', 'MAX_AGE',
+   'ELECTION_CYCLES', 'CORRUPTION_THRESHOLD', 'ELECTION_MAX_CANDIDATES', 'ELECTION_VOTERS_PER_CANDIDATE',
+   'ELECTION_MIN_VOTERS', 'ELECTION_ABSTENTION_RATE', 'QUARTER_CELLS',
+   'STARTUP_WELLBEING_DAYS', 'STARTUP_DAILY_NUTRITION', 'STARTUP_DAILY_STIPEND', 'INITIAL_RESOURCE_GRANT',
+   'INITIAL_NUTRITION_RESERVE',
+   'HUNGER_WORK_THRESHOLD', 'SURVIVAL_WORK_ENERGY', 'SURVIVAL_WORK_GAIN',
+   'MEME_SPREAD_BASE_RATE', 'MEME_DECAY_RATE', 'MEME_MUTATION_CHANCE', 'MEME_CONTACTS_PER_CARRIER',
+   'MEME_CONTACT_RADIUS',
+   'COMPACTION_INTERVAL_DAYS', 'COMPACTION_TOMBSTONE_FRACTION', 'DYNASTY_SAMPLE_DAYS', 'DYNASTY_MIN_DESCENDANTS',
+)
+def config_constants() -> Dict[str, Any]:
+   """Current values of SIMULATION_PARAMETERS, recorded in every checkpoint manifest."""
+   return {name: globals()[name] for name in SIMULATION_PARAMETERS}
+
+def _coerce_like(current: Any, value: Any) -> Any:
+   if isinstance(current, bool):
+       if isinstance(value, bool):
+           return value
+   elif isinstance(current, (int, float)):
+       if isinstance(value, (int, float)) and not isinstance(value, bool):
+           if isinstance(current, float):
+               return float(value)
+           if float(value).is_integer():
+               return int(value)
+   elif isinstance(current, str):
+       if isinstance(value, str):
+           return value
+   elif isinstance(current, (tuple, list)):
+       if isinstance(value, (tuple, list)):
+           return type(current)(_coerce_like(current[0], item) if current else item for item in value)
+   elif isinstance(current, dict):
+       if isinstance(value, dict) and set(value) == set(current):
+           return {key: _coerce_like(current[key], item) for key, item in value.items()}
+   raise ValueError(f"expected {type(current).__name__} like {current!r}, got {value!r}")
+
+def coerce_parameter(name: str, value: Any) -> Any:
+   """`value` converted to the type of simulation parameter `name`; raises ValueError."""
+   if name not in SIMULATION_PARAMETERS:
+       raise ValueError(f"Unknown simulation parameter: {name}")
+   try:
+       return _coerce_like(globals()[name], value)
+   except ValueError as e:
+       raise ValueError(f"Invalid value for {name}: {e}")
+
+def apply_config(config: Dict[str, Any]) -> List[str]:
+   """Restore simulation parameters recorded by config_constants(); returns the names changed.
+
+   Anything outside SIMULATION_PARAMETERS is ignored, so schema tables and
+   session settings always come from the running code and command line.
+   """
+   changed = []
+   for name, value in config.items():
+       if name not in SIMULATION_PARAMETERS:
+           continue
+       try:
+           value = coerce_parameter(name, value)
+       except ValueError as e:
+           logger.warning(f"Checkpoint setting ignored: {e}")
+           continue
+       if globals()[name] != value:
+           globals()[name] = value
+           changed.append(name)
+   return changed
+
+def rng_state() -> Dict[str, Any]:
+   """State of every random generator the simulation draws from."""
+   state = {'random': random.getstate(), 'numpy': np.random.get_state()}
+   if TORCH_AVAILABLE:
+       state['torch'] = torch.get_rng_state()
+   return state
+
+def set_rng_state(state: Dict[str, Any]):
+   random.setstate(state['random'])
+   np.random.set_state(state['numpy'])
+   if TORCH_AVAILABLE and 'torch' in state:
+       torch.set_rng_state(state['torch'])
+
+def _path_bytes(path: str) -> int:
+   if os.path.isdir(path):
+       return sum(os.path.getsize(os.path.join(root, name))
+                  for root, _, names in os.walk(path) for name in names)
+   return os.path.getsize(path)
+
+def compress_chunk(codec: str, level: int, data) -> bytes:
+   if codec == 'zlib':
+       return zlib.compress(data, level)
+   if codec == 'lzma':
+       return lzma.compress(data, preset=level)
+   if codec == 'bz2':
+       return bz2.compress(data, max(1, level))
+   return bytes(data)
+
+def decompress_chunk(codec: str, data: bytes) -> bytes:
+   if codec == 'zlib':
+       return zlib.decompress(data)
+   if codec == 'lzma':
+       return lzma.decompress(data)
+   if codec == 'bz2':
+       return bz2.decompress(data)
+   return data
+
+def write_chunks(f, pool: ThreadPoolExecutor, data, codec: str, level: int) -> List[List[int]]:
+   """Compress `data` in CHECKPOINT_CHUNK_SIZE pieces on the pool and append them to `f`.
+
+   Returns [offset, stored length, raw length, crc32 of stored bytes] per chunk.
+   """
+   view = memoryview(data).cast('B')
+   pieces = [view[start:start + CHECKPOINT_CHUNK_SIZE] for start in range(0, len(view), CHECKPOINT_CHUNK_SIZE)]
+   chunks = []
+   for piece, stored in zip(pieces, pool.map(lambda piece: compress_chunk(codec, level, piece), pieces)):
+       chunks.append([f.tell(), len(stored), len(piece), zlib.crc32(stored)])
+       f.write(stored)
+   return chunks
+
+def read_stored_chunks(path: str, chunks: List[List[int]]) -> List[bytes]:
+   """Read chunks as stored and check their crc32; raises ValueError on corruption."""
+   stored = []
+   with open(path, 'rb') as f:
+       for offset, length, _, crc in chunks:
+           f.seek(offset)
+           data = f.read(length)
+           if len(data) != length or zlib.crc32(data) != crc:
+               raise ValueError(f"Corrupt chunk at offset {offset} in {os.path.basename(path)}")
+           stored.append(data)
+   return stored
+
+def read_chunks(path: str, chunks: List[List[int]], codec: str, pool: ThreadPoolExecutor) -> bytearray:
+   """Read, verify and decompress chunks written by write_chunks into one buffer."""
+   stored = read_stored_chunks(path, chunks)
+   buffer = bytearray(sum(chunk[2] for chunk in chunks))
+   position = 0
+   for chunk, raw in zip(chunks, pool.map(lambda data: decompress_chunk(codec, data), stored)):
+       if len(raw) != chunk[2]:
+           raise ValueError(f"Chunk at offset {chunk[0]} in {os.path.basename(path)} decompressed to the wrong size")
+       buffer[position:position + len(raw)] = raw
+       position += len(raw)
+   return buffer
+
+def column_bytes(column: np.ndarray) -> np.ndarray:
+   return np.ascontiguousarray(column).reshape(-1).view(np.uint8)
+
+class ChunkedTable:
+   """Lazy column mapping over a table file of compressed chunks"""
+
+   def __init__(self, path: str, columns: Dict[str, Dict[str, Any]], codec: str, pool: ThreadPoolExecutor):
+       self.path = path
+       self.columns = columns
+       self.codec = codec
+       self.pool = pool
+       self.cache: Dict[str, np.ndarray] = {}
+
+   def __contains__(self, key: str) -> bool:
+       return key in self.columns
+
+   def __iter__(self):
+       return iter(self.columns)
+
+   def __getitem__(self, key: str) -> np.ndarray:
+       if key not in self.cache:
+           entry = self.columns[key]
+           dtype = np.dtype(entry['dtype'])
+           if 0 in entry['shape']:
+               column = np.zeros(entry['shape'], dtype=dtype)
+           else:
+               buffer = read_chunks(self.path, entry['chunks'], self.codec, self.pool)
+               column = np.frombuffer(buffer, dtype=dtype).reshape(entry['shape'])
+           self.cache[key] = column
+       return self.cache[key]
+
+   def close(self):
+       self.cache.clear()
+
+class MappedTable:
+   """Lazy column mapping over a directory of .npy files.
+
+   Columns are opened copy-on-write with np.load(mmap_mode='c'): pages are
+   read from disk only when touched and private copies are made only for
+   pages the simulation writes to.
+   """
+
+   def __init__(self, path: str, columns: Dict[str, Dict[str, Any]]):
+       self.path = path
+       self.columns = columns
+
+   def __contains__(self, key: str) -> bool:
+       return key in self.columns
+
+   def __iter__(self):
+       return iter(self.columns)
+
+   def __getitem__(self, key: str) -> np.ndarray:
+       filename = os.path.join(self.path, self.columns[key]['file'])
+       if 0 in self.columns[key]['shape']:
+           return np.load(filename)
+       return np.load(filename, mmap_mode='c').view(np.ndarray)
+
+   def close(self):
+       pass
+
+class WorldCheckpoint:
+   """Columnar checkpoint of a World.
+
+   Bulky state is split into tables of NumPy columns (population,
+   relationships, people, companies, orders, grid, stats), each stored as
+   its own file. Everything else is pickled into a single objects blob in
+   which people, companies and the tables appear as persistent references.
+   """
+
+   TABLE_ATTRS = ('people', 'companies', 'population', 'relationships', 'genealogy', 'grid', 'stats')
+   TABLES = ('population', 'relationships', 'genealogy', 'people', 'companies', 'orders', 'grid', 'stats')
+
+   def __init__(self, world: 'World', base: Optional[DeltaBase] = None, track: Optional[str] = None):
+       """With `base`, row-aligned tables are cut to a delta against it; with
+       `track`, row digests are recorded as a new DeltaBase of that name."""
+       self.world = world
+       self.base = base
+       self.new_base = DeltaBase(track) if track else None
+       self.people = list(world.people.values())
+       self.companies = list(world.companies.values())
+       self.person_rows = {person.id: row for row, person in enumerate(self.people)}
+       self.company_rows = {company.id: row for row, company in enumerate(self.companies)}
+       self.person_extras: Dict[int, Dict[str, Any]] = {}
+       self.company_extras: Dict[int, Dict[str, Any]] = {}
+       self.grid_extras: Dict[int, Dict[str, Any]] = {}
+       self.plain_state: Dict[str, Dict[str, Any]] = {}
+
+   # ----- saving -----
+
+   def tables(self):
+       """Yield (name, columns) one table at a time."""
+       for name in self.TABLES:
+           columns = getattr(self, f'_{name}_table')()
+           if self.new_base is not None:
+               self.new_base.record(name, columns, self)
+           if self.base is not None:
+               columns = self.base.delta(name, columns, self)
+           yield name, columns
+
+   def manifest_fields(self) -> Dict[str, Any]:
+       fields = {
+           'population': len(self.world.people),
+           'companies': len(self.world.companies),
+           'seed': GLOBAL_SEED,
+           'config': config_constants(),
+           'kind': 'full',
+       }
+       if self.base is not None:
+           fields.update(kind='delta', base=self.base.name,
+                         delta_tables={name: mode for name, mode in DELTA_TABLES.items()})
+       return fields
+
+   def objects(self) -> bytes:
+       """Pickle the remaining world state; call after all tables were produced."""
+       payload = {
+           'world': {k: v for k, v in vars(self.world).items() if k not in self.TABLE_ATTRS},
+           'plain': self.plain_state,
+           'person_extras': self.person_extras,
+           'company_extras': self.company_extras,
+           'grid_extras': self.grid_extras,
+           'rng': rng_state(),
+       }
+       buffer = io.BytesIO()
+       _CheckpointPickler(buffer, self).dump(payload)
+       return buffer.getvalue()
+
+   def _population_table(self) -> Dict[str, np.ndarray]:
+       population = self.world.population
+       columns, self.plain_state['population'] = _array_state(
+           population, skip=('ids', 'index', 'free_rows', 'tombstones'))
+       columns['ids'] = np.array([encode_person_id(pid) for pid in population.ids], dtype='S16')
+       columns['free_rows'] = np.array(population.free_rows, dtype=np.int64)
+       columns['tombstones'] = np.array(population.tombstones, dtype=np.int64)
+       return columns
+
+   def _relationships_table(self) -> Dict[str, np.ndarray]:
+       columns, self.plain_state['relationships'] = _array_state(self.world.relationships)
+       return columns
+
+   def _genealogy_table(self) -> Dict[str, np.ndarray]:
+       genealogy = self.world.genealogy
+       columns, self.plain_state['genealogy'] = _array_state(genealogy, skip=('node_of', 'founder_ids'))
+       ids = [b''] * len(genealogy.generation)
+       for person_id, node in genealogy.node_of.items():
+           ids[node] = encode_person_id(person_id)
+       for node, person_id in genealogy.founder_ids.items():
+           ids[node] = encode_person_id(person_id)
+       columns['ids'] = np.array(ids, dtype='S16')
+       columns['founder'] = np.zeros(len(ids), dtype=bool)
+       columns['founder'][list(genealogy.founder_ids)] = True
+       return columns
+
+   def _company_ref(self, company: Optional[Company]) -> int:
+       if company is None:
+           return -1
+       row = self.company_rows.get(company.id)
+       return row if row is not None and self.companies[row] is company else -2
+
+   def _people_table(self) -> Dict[str, np.ndarray]:
+       people = self.people
+       n = len(people)
+       population = self.world.population
+       columns = {'id': np.array([encode_person_id(p.id) for p in people], dtype='S16')}
+       for attr in PERSON_FLOAT_COLUMNS:
+           columns[attr] = np.fromiter((getattr(p, attr) for p in people), dtype=np.float64, count=n)
+       for attr in PERSON_INT_COLUMNS:
+           columns[attr] = np.fromiter((getattr(p, attr) for p in people), dtype=np.int64, count=n)
+       columns['is_alive'] = np.fromiter((p.is_alive for p in people), dtype=bool, count=n)
+       columns['death_day'] = np.fromiter((-1 if p.death_day is None else p.death_day for p in people),
+                                          dtype=np.int64, count=n)
+       columns['row'] = np.fromiter((p.traits.row if isinstance(p.traits, TraitRow) and p.traits.store is population
+                                     else -1 for p in people), dtype=np.int64, count=n)
+       columns['employer'] = np.fromiter((self._company_ref(p.employer) for p in people), dtype=np.int64, count=n)
+       columns['political_leaning'] = np.array([p.political_leaning for p in people], dtype=np.float64).reshape(n, 2)
+       for attr in LOCATION_COLUMNS:
+           columns[f'location.{attr}'] = np.fromiter((getattr(p.location, attr) for p in people),
+                                                      dtype=np.int64, count=n)
+       columns['location.z'] = np.fromiter((p.location.z for p in people), dtype=np.float64, count=n)
+       columns['known_primes.offsets'], columns['known_primes.values'] = pack_ragged(
+           [list(p.known_primes) for p in people], np.int64)
+       columns['learning.offsets'], columns['learning.primes'] = pack_ragged(
+           [list(p.learning_progress.keys()) for p in people], np.int64)
+       _, columns['learning.progress'] = pack_ragged(
+           [list(p.learning_progress.values()) for p in people], np.float64)
+
+       families = []
+       for row, person in enumerate(people):
+           entries = []
+           for key, member in person.family.items():
+               if key in ('parent1', 'parent2'):
+                   entries.append((0 if key == 'parent1' else 1, member))
+               elif key == f'child_{member}':
+                   entries.append((2, member))
+               else:
+                   self.person_extras.setdefault(row, {})['family'] = person.family
+                   entries = []
+                   break
+           families.append(entries)
+       columns['family.offsets'], columns['family.role'] = pack_ragged(
+           [[role for role, _ in entries] for entries in families], np.int8)
+       _, columns['family.member'] = pack_ragged(
+           [[encode_person_id(member) for _, member in entries] for entries in families], 'S16')
+
+       # Anything the columns cannot express is kept per person in the objects blob
+       for row, person in enumerate(people):
+           state = vars(person)
+           extras = {key: state[key] for key in state.keys() - PERSON_ATTRS}
+           if columns['row'][row] < 0:
+               extras['traits'] = person.traits
+           if columns['employer'][row] == -2:
+               extras['employer'] = person.employer
+           if person.memory:
+               extras['memory'] = person.memory
+           if extras:
+               self.person_extras.setdefault(row, {}).update(extras)
+       return columns
+
+   def _companies_table(self) -> Dict[str, np.ndarray]:
+       companies = self.companies
+       n = len(companies)
+       columns = {
+           'id': np.array([encode_person_id(c.id) for c in companies], dtype='S16'),
+           'founder_id': np.array([encode_person_id(c.founder_id) for c in companies], dtype='S16'),
+           'name': np.array([c.name for c in companies], dtype=str),
+           'is_bankrupt': np.fromiter((c.is_bankrupt for c in companies), dtype=bool, count=n),
+       }
+       for attr in COMPANY_FLOAT_COLUMNS:
+           columns[attr] = np.fromiter((getattr(c, attr) for c in companies), dtype=np.float64, count=n)
+       for attr in COMPANY_INT_COLUMNS:
+           columns[attr] = np.fromiter((getattr(c, attr) for c in companies), dtype=np.int64, count=n)
+       for attr in LOCATION_COLUMNS:
+           columns[f'location.{attr}'] = np.fromiter((getattr(c.location, attr) for c in companies),
+                                                      dtype=np.int64, count=n)
+       columns['location.z'] = np.fromiter((c.location.z for c in companies), dtype=np.float64, count=n)
+
+       rosters = []
+       for row, company in enumerate(companies):
+           roster = [self.person_rows.get(e.id, -1) for e in company.employees]
+           if any(r < 0 or self.people[r] is not e for r, e in zip(roster, company.employees)):
+               self.company_extras.setdefault(row, {})['employees'] = company.employees
+               roster = []
+           rosters.append(roster)
+       columns['employees.offsets'], columns['employees.rows'] = pack_ragged(rosters, np.int64)
+       counted = [list(company._counted_primes.get(employee.id, ()))
+                  for company in companies for employee in company.employees]
+       columns['counted.offsets'], columns['counted.primes'] = pack_ragged(counted, np.int64)
+       columns['knowledge.offsets'], columns['knowledge.primes'] = pack_ragged(
+           [list(c.knowledge_counts.keys()) for c in companies], np.int64)
+       _, columns['knowledge.counts'] = pack_ragged([list(c.knowledge_counts.values()) for c in companies], np.int64)
+       columns['collective.offsets'], columns['collective.primes'] = pack_ragged(
+           [list(c.collective_knowledge) for c in companies], np.int64)
+       columns['inventory.offsets'], columns['inventory.numbers'] = pack_ragged(
+           [list(c.inventory.keys()) for c in companies], np.int64)
+       _, columns['inventory.quantity'] = pack_ragged([list(c.inventory.values()) for c in companies], np.float64)
+       columns['targets.offsets'], columns['targets.numbers'] = pack_ragged(
+           [list(c.production_targets) for c in companies], np.int64)
+       columns['shareholders.offsets'], columns['shareholders.ids'] = pack_ragged(
+           [[encode_person_id(pid) for pid in c.shareholders] for c in companies], 'S16')
+       _, columns['shareholders.shares'] = pack_ragged([list(c.shareholders.values()) for c in companies], np.float64)
+
+       for row, company in enumerate(companies):
+           state = vars(company)
+           extras = {key: state[key] for key in state.keys() - COMPANY_ATTRS}
+           if set(company._counted_primes) != {e.id for e in company.employees}:
+               extras['_counted_primes'] = company._counted_primes
+           if extras:
+               self.company_extras.setdefault(row, {}).update(extras)
+       return columns
+
+   def _orders_table(self) -> Dict[str, np.ndarray]:
+       book = self.world.market.order_book
+       entries = [(number, side, order) for number, orders in book.items()
+                  for side, key in enumerate(('bids', 'asks')) for order in orders[key]]
+       return {
+           'book_numbers': np.array(list(book.keys()), dtype=np.int64),
+           'number': np.array([number for number, _, _ in entries], dtype=np.int64),
+           'side': np.array([side for _, side, _ in entries], dtype=np.int8),
+           'price_key': np.array([order[0] for _, _, order in entries], dtype=np.float64),
+           'quantity': np.array([order[1] for _, _, order in entries], dtype=np.float64),
+           'trader': np.array([encode_person_id(order[2]) for _, _, order in entries], dtype='S16'),
+       }
+
+   def _grid_table(self) -> Dict[str, np.ndarray]:
+       grid = self.world.grid
+       cells = grid.ravel()
+       for position, cell in enumerate(cells):
+           extras = {key: value for key, value in cell.items() if key not in ('people', 'resources')}
+           if extras != {'buildings': []}:
+               self.grid_extras[position] = extras
+       columns = {
+           'shape': np.array(grid.shape, dtype=np.int64),
+           'resources': np.fromiter((cell['resources'] for cell in cells), dtype=np.float64, count=len(cells)),
+       }
+       columns['people.offsets'], columns['people.ids'] = pack_ragged(
+           [[encode_person_id(pid) for pid in cell['people']] for cell in cells], 'S16')
+       return columns
+
+   def _stats_table(self) -> Dict[str, np.ndarray]:
+       columns = {}
+       plain = {}
+       for name, value in self.world.stats.items():
+           if isinstance(value, StatsSeries):
+               columns[f'{name}.values'] = value._values[:value._size].copy()
+               columns[f'{name}.prefix'] = value._prefix[:value._size + 1].copy()
+               plain[name] = StatsSeries
+           else:
+               plain[name] = value
+       self.plain_state['stats'] = plain
+       self.plain_state['series'] = {name: {'offset': value.offset, 'spill_path': value.spill_path}
+                                     for name, value in self.world.stats.items()
+                                     if isinstance(value, StatsSeries)}
+       return columns
+
+   # ----- loading -----
+
+   @classmethod
+   def restore(cls, world: 'World', read_table, objects: bytes):
+       """Rebuild `world` in place from a table reader (name -> columns mapping) and the objects blob."""
+       people_table = read_table('people')
+       companies_table = read_table('companies')
+       people = [Person.__new__(Person) for _ in range(len(people_table['id']))]
+       companies = [Company.__new__(Company) for _ in range(len(companies_table['id']))]
+       population = PopulationStore.__new__(PopulationStore)
+       relationships = RelationshipGraph.__new__(RelationshipGraph)
+       order_book: Dict[int, Dict[str, List]] = {}
+       grid_table = read_table('grid')
+       grid = np.empty(tuple(grid_table['shape'].tolist()), dtype=object)
+       stats: Dict[str, Any] = {}
+       references = {'world': world, 'population': population, 'relationships': relationships,
+                     'orders': order_book, 'grid': grid, 'stats': stats}
+       payload = _CheckpointUnpickler(io.BytesIO(objects), references, people, companies).load()
+       plain = payload['plain']
+
+       cls._restore_population(population, read_table('population'), plain['population'])
+       columns = read_table('relationships')
+       relationships.__dict__.update(plain['relationships'])
+       for key in columns:
+           setattr(relationships, key, columns[key])
+       cls._restore_people(people, companies, population, people_table, payload['person_extras'])
+       cls._restore_companies(companies, people, companies_table, payload['company_extras'])
+       cls._restore_orders(order_book, read_table('orders'))
+       cls._restore_grid(grid, grid_table, payload['grid_extras'])
+       cls._restore_stats(stats, read_table('stats'), plain)
+
+       world.__dict__.update(payload['world'])
+       if 'genealogy' not in payload['world']:  # version 2 checkpoints pickled the index whole
+           world.genealogy = cls._restore_genealogy(read_table('genealogy'), plain['genealogy'])
+       world.people = {person.id: person for person in people}
+       world.companies = {company.id: company for company in companies}
+       world.population = population
+       world.relationships = relationships
+       world.grid = grid
+       world.stats = stats
+       if 'rng' in payload:
+           set_rng_state(payload['rng'])
+
+   @staticmethod
+   def _restore_population(population: PopulationStore, columns, plain: Dict[str, Any]):
+       population.__dict__.update(plain)
+       for key in columns:
+           if key not in ('ids', 'free_rows', 'tombstones'):
+               setattr(population, key, columns[key])
+       population.ids = [decode_person_id(raw) if raw else None for raw in columns['ids'].tolist()]
+       population.index = {pid: row for row, pid in enumerate(population.ids) if pid is not None}
+       population.free_rows = columns['free_rows'].tolist()
+       population.tombstones = columns['tombstones'].tolist()
+
+   @staticmethod
+   def _restore_genealogy(columns, plain: Dict[str, Any]) -> GenealogyIndex:
+       genealogy = GenealogyIndex.__new__(GenealogyIndex)
+       genealogy.__dict__.update(plain)
+       for key in columns:
+           if key not in ('ids', 'founder'):
+               setattr(genealogy, key, columns[key])
+       ids = columns['ids'][:genealogy.size].tolist()
+       genealogy.node_of = {decode_person_id(ids[node]): node
+                            for node in np.flatnonzero(genealogy.alive[:genealogy.size]).tolist()}
+       genealogy.founder_ids = {node: decode_person_id(ids[node])
+                                for node in np.flatnonzero(columns['founder'][:genealogy.size]).tolist()}
+       return genealogy
+
+   @staticmethod
+   def _restore_people(people: List[Person], companies: List[Company], population: PopulationStore,
+                       columns, extras: Dict[int, Dict[str, Any]]):
+       states = [person.__dict__ for person in people]
+
+       def assign(attr: str, values):
+           for state, value in zip(states, values):
+               state[attr] = value
+
+       assign('id', [decode_person_id(raw) for raw in columns['id'].tolist()])
+       for attr in PERSON_FLOAT_COLUMNS + PERSON_INT_COLUMNS + ('is_alive',):
+           assign(attr, columns[attr].tolist())
+       assign('death_day', [None if day < 0 else day for day in columns['death_day'].tolist()])
+       assign('traits', [TraitRow(population, row) if row >= 0 else None for row in columns['row'].tolist()])
+       assign('employer', [companies[row] if row >= 0 else None for row in columns['employer'].tolist()])
+       assign('political_leaning', columns['political_leaning'].tolist())
+       location_columns = [columns[f'location.{attr}'].tolist() for attr in LOCATION_COLUMNS]
+       assign('location', [Location(*cell, z=z) for *cell, z in
+                           zip(*location_columns, columns['location.z'].tolist())])
+       assign('known_primes', [set(primes) for primes in
+                               unpack_ragged(columns['known_primes.offsets'], columns['known_primes.values'])])
+       learning_offsets = columns['learning.offsets']
+       assign('learning_progress', [dict(zip(primes, progress)) for primes, progress in zip(
+           unpack_ragged(learning_offsets, columns['learning.primes']),
+           unpack_ragged(learning_offsets, columns['learning.progress']))])
+       family_offsets = columns['family.offsets']
+       families = []
+       for roles, members in zip(unpack_ragged(family_offsets, columns['family.role']),
+                                 unpack_ragged(family_offsets, columns['family.member'])):
+           family = {}
+           for role, raw in zip(roles, members):
+               member = decode_person_id(raw)
+               family['parent1' if role == 0 else 'parent2' if role == 1 else f'child_{member}'] = member
+           families.append(family)
+       assign('family', families)
+       for state in states:
+           state['memory'] = deque(maxlen=1000)
+       for row, values in extras.items():
+           states[row].update(values)
+
+   @staticmethod
+   def _restore_companies(companies: List[Company], people: List[Person], columns,
+                          extras: Dict[int, Dict[str, Any]]):
+       states = [company.__dict__ for company in companies]
+
+       def assign(attr: str, values):
+           for state, value in zip(states, values):
+               state[attr] = value
+
+       assign('id', [decode_person_id(raw) for raw in columns['id'].tolist()])
+       assign('founder_id', [decode_person_id(raw) for raw in columns['founder_id'].tolist()])
+       assign('name', columns['name'].tolist())
+       assign('is_bankrupt', columns['is_bankrupt'].tolist())
+       for attr in COMPANY_FLOAT_COLUMNS + COMPANY_INT_COLUMNS:
+           assign(attr, columns[attr].tolist())
+       location_columns = [columns[f'location.{attr}'].tolist() for attr in LOCATION_COLUMNS]
+       assign('location', [Location(*cell, z=z) for *cell, z in
+                           zip(*location_columns, columns['location.z'].tolist())])
+       rosters = [[people[row] for row in rows] for rows in
+                  unpack_ragged(columns['employees.offsets'], columns['employees.rows'])]
+       assign('employees', [EmployeeRoster(roster) for roster in rosters])
+       counted = iter(unpack_ragged(columns['counted.offsets'], columns['counted.primes']))
+       assign('_counted_primes', [{employee.id: set(next(counted)) for employee in roster} for roster in rosters])
+       knowledge_offsets = columns['knowledge.offsets']
+       assign('knowledge_counts', [dict(zip(primes, counts)) for primes, counts in zip(
+           unpack_ragged(knowledge_offsets, columns['knowledge.primes']),
+           unpack_ragged(knowledge_offsets, columns['knowledge.counts']))])
+       assign('collective_knowledge', [set(primes) for primes in
+                                       unpack_ragged(columns['collective.offsets'], columns['collective.primes'])])
+       inventory_offsets = columns['inventory.offsets']
+       assign('inventory', [dict(zip(numbers, quantity)) for numbers, quantity in zip(
+           unpack_ragged(inventory_offsets, columns['inventory.numbers']),
+           unpack_ragged(inventory_offsets, columns['inventory.quantity']))])
+       assign('production_targets', unpack_ragged(columns['targets.offsets'], columns['targets.numbers']))
+       shareholder_offsets = columns['shareholders.offsets']
+       assign('shareholders', [{decode_person_id(raw): shares for raw, shares in zip(ids, values)}
+                               for ids, values in zip(
+                                   unpack_ragged(shareholder_offsets, columns['shareholders.ids']),
+                                   unpack_ragged(shareholder_offsets, columns['shareholders.shares']))])
+       assign('_product_menu', [None] * len(companies))
+       for row, values in extras.items():
+           states[row].update(values)
+
+   @staticmethod
+   def _restore_orders(order_book: Dict[int, Dict[str, List]], columns):
+       for number in columns['book_numbers'].tolist():
+           order_book[number] = {'bids': [], 'asks': []}
+       for number, side, price_key, quantity, trader in zip(
+               columns['number'].tolist(), columns['side'].tolist(), columns['price_key'].tolist(),
+               columns['quantity'].tolist(), columns['trader'].tolist()):
+           order_book[number]['asks' if side else 'bids'].append((price_key, quantity, decode_person_id(trader)))
+
+   @staticmethod
+   def _restore_grid(grid: np.ndarray, columns, extras: Dict[int, Dict[str, Any]]):
+       cells = grid.reshape(-1)
+       people = unpack_ragged(columns['people.offsets'], columns['people.ids'])
+       for position, (ids, resources) in enumerate(zip(people, columns['resources'].tolist())):
+           cell = {'people': [decode_person_id(raw) for raw in ids], 'buildings': [], 'resources': resources}
+           if position in extras:
+               cell = {'people': cell['people'], **extras[position], 'resources': resources}
+           cells[position] = cell
+
+   @staticmethod
+   def _restore_stats(stats: Dict[str, Any], columns, plain: Dict[str, Any]):
+       for name, value in plain['stats'].items():
+           if value is StatsSeries:
+               series = StatsSeries.__new__(StatsSeries)
+               series.__dict__.update(plain['series'][name])
+               series._values = np.array(columns[f'{name}.values'], dtype=np.float64)
+               series._prefix = np.array(columns[f'{name}.prefix'], dtype=np.float64)
+               series._size = len(series._values)
+               stats[name] = series
+           else:
+               stats[name] = value
+
+   # ----- files -----
+
+   def snapshot(self) -> 'CheckpointSnapshot':
+       """Capture every table and the objects blob; the world may change freely afterwards."""
+       tables = list(self.tables())
+       return CheckpointSnapshot(self.world.current_day, tables, self.objects(), self.manifest_fields())
+
+   def save(self, path: str, codec: str = None) -> Dict[str, Any]:
+       """Write a checkpoint directory table by table; returns the manifest."""
+       return self.write(path, self.world.current_day, self.tables(), self.objects, codec,
+                         self.manifest_fields)
+
+   @staticmethod
+   def write(path: str, day: int, tables, objects, codec: str = None, fields=None,
+             level: int = None) -> Dict[str, Any]:
+       """Write (name, columns) tables and the objects blob (bytes or a callable
+       producing them) as a checkpoint directory; returns the manifest.
+
+       Each table is one file of independently compressed chunks, compressed
+       in parallel on a thread pool. With codec 'none' tables are directories
+       of .npy files instead, which are memory-mapped on load.
+       """
+       codec = codec or CHECKPOINT_CODEC
+       level = CHECKPOINT_LEVEL if level is None else level
+       if codec not in CHECKPOINT_CODECS:
+           raise ValueError(f"Unknown checkpoint codec: {codec}")
+       staging = path + '.partial'
+       shutil.rmtree(staging, ignore_errors=True)
+       os.makedirs(staging)
+       manifest = {
+           'format': CHECKPOINT_FORMAT,
+           'version': CHECKPOINT_VERSION,
+           'day': day,
+           'created': datetime.now().isoformat(timespec='seconds'),
+           'codec': codec,
+           'level': level,
+           'tables': {},
+       }
+       with ThreadPoolExecutor(max_workers=CHECKPOINT_COMPRESSION_WORKERS) as pool:
+           for name, columns in tables:
+               entry = {'columns': {key: {'dtype': column.dtype.str, 'shape': list(column.shape)}
+                                    for key, column in columns.items()}}
+               if codec == 'none':
+                   entry['dir'] = name
+                   os.makedirs(os.path.join(staging, name))
+                   for key, column in columns.items():
+                       entry['columns'][key]['file'] = f'{key}.npy'
+                       np.save(os.path.join(staging, name, f'{key}.npy'), column, allow_pickle=False)
+               else:
+                   entry['file'] = f'{name}.bin'
+                   with open(os.path.join(staging, entry['file']), 'wb') as f:
+                       for key, column in columns.items():
+                           entry['columns'][key]['chunks'] = write_chunks(f, pool, column_bytes(column), codec, level)
+               entry['bytes'] = _path_bytes(os.path.join(staging, entry.get('file') or entry['dir']))
+               manifest['tables'][name] = entry
+               del columns
+           if callable(objects):
+               objects = objects()
+           manifest.update(fields() if callable(fields) else fields or {})
+           with open(os.path.join(staging, 'objects.pkl'), 'wb') as f:
+               manifest['objects'] = {'file': 'objects.pkl', 'chunks': write_chunks(f, pool, objects, codec, level)}
+           manifest['objects']['bytes'] = os.path.getsize(os.path.join(staging, 'objects.pkl'))
+       manifest['bytes'] = (sum(entry['bytes'] for entry in manifest['tables'].values()) +
+                            manifest['objects']['bytes'])
+       with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+           json.dump(manifest, f, indent=2)
+       shutil.rmtree(path, ignore_errors=True)
+       os.replace(staging, path)
+       return manifest
+
+   @classmethod
+   def load(cls, world: 'World', path: str) -> Dict[str, Any]:
+       """Restore `world` in place from a checkpoint directory; returns the manifest."""
+       manifest = cls.read_manifest(path)
+       open_files = []
+       pool = ThreadPoolExecutor(max_workers=CHECKPOINT_COMPRESSION_WORKERS)
+       read_table = cls._table_reader(path, manifest, open_files, pool)
+       if manifest.get('kind') == 'delta':
+           # Replay: every table is the base table with the delta's rows laid over it
+           base_path = os.path.join(os.path.dirname(path), manifest['base'])
+           if not os.path.isdir(base_path):
+               raise FileNotFoundError(f"Base checkpoint {manifest['base']} of delta {os.path.basename(path)} is missing")
+           read_base = cls._table_reader(base_path, cls.read_manifest(base_path), open_files, pool)
+           read_delta = read_table
+           modes = manifest['delta_tables']
+
+           def read_table(name: str):
+               if name not in modes:
+                   return read_delta(name)
+               return DeltaBase.merge(name, modes[name], read_base(name), read_delta(name))
+
+       try:
+           objects = manifest['objects']
+           objects = read_chunks(os.path.join(path, objects['file']), objects['chunks'], manifest['codec'], pool)
+           cls.restore(world, read_table, bytes(objects))
+       finally:
+           for table in open_files:
+               table.close()
+           pool.shutdown()
+       return manifest
+
+   @classmethod
+   def verify(cls, path: str) -> List[str]:
+       """Check a checkpoint directory without restoring it; returns the problems found.
+
+       Chunk checksums are compared on the stored bytes, so nothing is decompressed.
+       """
+       try:
+           manifest = cls.read_manifest(path)
+       except (OSError, ValueError) as e:
+           return [f"manifest: {e}"]
+       problems = []
+       for name, entry in manifest['tables'].items():
+           try:
+               if 'dir' in entry:
+                   for key, column in entry['columns'].items():
+                       array = np.load(os.path.join(path, entry['dir'], column['file']), mmap_mode='r')
+                       if list(array.shape) != column['shape'] or array.dtype.str != column['dtype']:
+                           problems.append(f"{name}.{key}: shape or dtype differs from the manifest")
+               else:
+                   for column in entry['columns'].values():
+                       read_stored_chunks(os.path.join(path, entry['file']), column['chunks'])
+               if _path_bytes(os.path.join(path, entry.get('file') or entry['dir'])) != entry['bytes']:
+                   problems.append(f"{name}: size differs from the manifest")
+           except (OSError, ValueError) as e:
+               problems.append(f"{name}: {e}")
+       objects = manifest['objects']
+       try:
+           read_stored_chunks(os.path.join(path, objects['file']), objects['chunks'])
+       except (OSError, ValueError) as e:
+           problems.append(f"objects: {e}")
+       if manifest.get('kind') == 'delta':
+           base_path = os.path.join(os.path.dirname(path), manifest['base'])
+           if not os.path.isdir(base_path):
+               problems.append(f"base checkpoint {manifest['base']} is missing")
+       return problems
+
+   @staticmethod
+   def read_manifest(path: str) -> Dict[str, Any]:
+       with open(os.path.join(path, 'manifest.json')) as f:
+           manifest = json.load(f)
+       if manifest.get('format') != CHECKPOINT_FORMAT or manifest.get('version', 0) > CHECKPOINT_VERSION:
+           raise ValueError(f"Unsupported checkpoint format {manifest.get('format')} v{manifest.get('version')}")
+       return manifest
+
+   @staticmethod
+   def _table_reader(path: str, manifest: Dict[str, Any], open_files: List, pool: ThreadPoolExecutor):
+       def read_table(name: str):
+           entry = manifest['tables'][name]
+           if 'dir' in entry:
+               table = MappedTable(os.path.join(path, entry['dir']), entry['columns'])
+           else:
+               table = ChunkedTable(os.path.join(path, entry['file']), entry['columns'], manifest['codec'], pool)
+           open_files.append(table)
+           return table
+       return read_table
+
 class CheckpointManager:
    """Handles saving and loading simulation state"""
    
@@ -3057,54 +5687,105 @@ class CheckpointManager:
        os.makedirs(self.checkpoint_dir, exist_ok=True)
        
        self.checkpoints = []
+       self.writer: Optional[CheckpointWriter] = None
+       self.delta_base: Optional[DeltaBase] = None  # last full checkpoint written by this manager
+       self.lock = threading.Lock()  # checkpoints and delta_base also change on the writer thread
        self.load_checkpoint_list()
    
    def load_checkpoint_list(self):
        """Load list of available checkpoints"""
-       self.checkpoints = []
+       checkpoints = []
        if os.path.exists(self.checkpoint_dir):
            for file in os.listdir(self.checkpoint_dir):
-               if file.endswith('.checkpoint'):
-                   self.checkpoints.append(file)
-       self.checkpoints.sort()
+               if file.endswith('.checkpoint') or file.endswith('.ckpt'):
+                   checkpoints.append(file)
+       with self.lock:
+           self.checkpoints = sorted(checkpoints)
    
-   def save_checkpoint(self, label: str = None):
-       """Save current world state"""
+   def save_checkpoint(self, label: str = None, background: bool = False, delta: bool = False):
+       """Save current world state.
+
+       With `background` the snapshot is taken now and written by a
+       CheckpointWriter thread while the simulation continues. With `delta`
+       only what changed since the last full checkpoint is stored.
+       """
+       with self.lock:
+           base = self.delta_base if delta else None
+       if delta and base is None:
+           logger.info("No full checkpoint to build a delta on - saving a full checkpoint")
+           delta = False
        if not label:
-           label = f"day_{self.world.current_day}"
+           label = f"day_{self.world.current_day}" + ("_delta" if delta else "")
        
-       filename = f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.checkpoint"
+       filename = f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ckpt"
        filepath = os.path.join(self.checkpoint_dir, filename)
        
-       # Prepare state dictionary
-       state = {
-           'day': self.world.current_day,
-           'people': self.world.people,
-           'companies': self.world.companies,
-           'buildings': self.world.buildings,
-           'memes': self.world.memes,
-           'market': self.world.market,
-           'political_system': self.world.political_system,
-           'stats': self.world.stats,
-           'grid': self.world.grid
-       }
-       
-       # Compress and save
        try:
-           with open(filepath, 'wb') as f:
-               compressed = zlib.compress(pickle.dumps(state))
-               f.write(compressed)
+           self.world.death_archive.flush()
+           track = filename if DELTA_CHECKPOINT_FREQUENCY > 0 and not delta else None
+           checkpoint = WorldCheckpoint(self.world, base=base, track=track)
+           if background:
+               start = time.perf_counter()
+               snapshot = checkpoint.snapshot()
+               if track:
+                   with self.lock:
+                       self.delta_base = checkpoint.new_base
+               if self.writer is None:
+                   self.writer = CheckpointWriter(on_written=self._checkpoint_written,
+                                                  on_failed=self._checkpoint_failed)
+               self.writer.submit(snapshot, filepath)
+               logger.info(f"Checkpoint snapshot taken: {filename} ({time.perf_counter() - start:.2f}s)")
+               return
+           checkpoint.save(filepath)
+           if track:
+               with self.lock:
+                   self.delta_base = checkpoint.new_base
            
            logger.info(f"Checkpoint saved: {filename}")
-           self.checkpoints.append(filename)
-           
-           # Remove old checkpoints if exceeding limit
-           if len(self.checkpoints) > MAX_CHECKPOINTS:
-               oldest = self.checkpoints.pop(0)
-               os.remove(os.path.join(self.checkpoint_dir, oldest))
+           self._checkpoint_written(filename)
                
        except Exception as e:
            logger.error(f"Failed to save checkpoint: {e}")
+           self._checkpoint_failed(filename)
+
+   def _checkpoint_failed(self, filename: str):
+       # Deltas must not be cut against a base that never reached the disk
+       with self.lock:
+           if self.delta_base is not None and self.delta_base.name == filename:
+               self.delta_base = None
+
+   def _checkpoint_written(self, filename: str):
+       with self.lock:
+           self.checkpoints.append(filename)
+
+           # Remove old checkpoints if exceeding limit
+           if len(self.checkpoints) > MAX_CHECKPOINTS:
+               self._remove_checkpoint(self.checkpoints.pop(0))
+
+   def close(self):
+       """Finish pending background writes."""
+       if self.writer is not None:
+           self.writer.close()
+           metrics = self.writer.metrics
+           logger.info(f"Checkpoint writer: {metrics['written']} written, {metrics['failed']} failed, "
+                       f"{metrics['write_seconds']:.1f}s writing, {metrics['blocked_seconds']:.1f}s blocked")
+           self.writer = None
+
+   def _remove_checkpoint(self, filename: str):
+       path = os.path.join(self.checkpoint_dir, filename)
+       if os.path.isdir(path):
+           shutil.rmtree(path)
+           # Deltas cannot be restored without their base
+           for other in list(self.checkpoints):
+               try:
+                   base = WorldCheckpoint.read_manifest(os.path.join(self.checkpoint_dir, other)).get('base')
+               except (OSError, ValueError):
+                   continue
+               if base == filename:
+                   self.checkpoints.remove(other)
+                   self._remove_checkpoint(other)
+       elif os.path.exists(path):
+           os.remove(path)
    
    def load_checkpoint(self, filename: str):
        """Load world state from checkpoint"""
@@ -3114,6 +5795,33 @@ class CheckpointManager:
            logger.error(f"Checkpoint not found: {filename}")
            return False
        
+       if os.path.isdir(filepath):
+           global GLOBAL_SEED
+           with self.lock:
+               self.delta_base = None
+           try:
+               manifest = WorldCheckpoint.load(self.world, filepath)
+           except Exception as e:
+               logger.error(f"Failed to load checkpoint: {e}")
+               return False
+           GLOBAL_SEED = manifest['seed']
+           changed = apply_config(manifest['config'])
+           if changed:
+               logger.info(f"Restored checkpoint settings: {', '.join(changed)}")
+           # Threading belongs to this session, not to the saved world
+           self.world.enable_region_threads = ENABLE_REGION_MULTITHREADING
+           self.world.region_thread_workers = max(1, REGION_THREAD_WORKERS)
+           if ENABLE_REGION_MULTITHREADING and REGION_THREAD_WORKERS > 1:
+               logger.info("Region threads are enabled - the resumed run will not be bit-identical "
+                           "to an uninterrupted one (use --threads 1 for that)")
+           # Region caches and culture come back with the world; simulate_day refreshes both anyway
+           self.world.death_archive.resume()
+           self.world._ensure_runtime_params()
+           set_current_day(self.world.current_day)
+           logger.info(f"Checkpoint loaded: {filename} (Day {self.world.current_day})")
+           return True
+       
+       # Legacy pickled checkpoint
        try:
            with open(filepath, 'rb') as f:
                compressed = f.read()
@@ -3129,6 +5837,14 @@ class CheckpointManager:
            self.world.political_system = state['political_system']
            self.world.stats = state['stats']
            self.world.grid = state['grid']
+           self.world.population = PopulationStore.from_people(self.world.people)
+           for meme in self.world.memes.values():
+               meme.bind(self.world.population)
+           self.world.relationships = RelationshipGraph.from_people(
+               self.world.population, self.world.people, state['day']
+           )
+           self.world.death_archive = DeathArchive(new_death_archive_path())
+           self.world.genealogy = GenealogyIndex.from_people(self.world.people)
            self.world.market.set_world(self.world)
            self.world._ensure_runtime_params()
            self.world._refresh_market_cache()
@@ -3142,6 +5858,65 @@ class CheckpointManager:
            logger.error(f"Failed to load checkpoint: {e}")
            return False
    
+   def checkpoint_info(self, filename: str) -> Dict[str, Any]:
+       """Manifest of a checkpoint, read without touching its tables.
+
+       Legacy single-file checkpoints only report their size.
+       """
+       path = os.path.join(self.checkpoint_dir, filename)
+       if not os.path.isdir(path):
+           return {'kind': 'legacy', 'bytes': os.path.getsize(path)}
+       try:
+           return WorldCheckpoint.read_manifest(path)
+       except (OSError, ValueError) as e:
+           return {'kind': 'unreadable', 'error': str(e)}
+
+   def find_checkpoint(self, max_day: int = None, kind: str = None) -> Optional[str]:
+       """Checkpoint with the highest day not after `max_day`, optionally of one kind."""
+       self.load_checkpoint_list()
+       best, best_day = None, -1
+       for filename in self.checkpoints:
+           info = self.checkpoint_info(filename)
+           day = info.get('day')
+           if day is None or (max_day is not None and day > max_day) or (kind and info.get('kind') != kind):
+               continue
+           if day >= best_day:
+               best, best_day = filename, day
+       return best
+
+   def verify_checkpoint(self, filename: str) -> List[str]:
+       """Integrity problems of one checkpoint (empty when it is sound)."""
+       path = os.path.join(self.checkpoint_dir, filename)
+       if os.path.isdir(path):
+           return WorldCheckpoint.verify(path)
+       try:
+           decompressor = zlib.decompressobj()
+           with open(path, 'rb') as f:
+               for block in iter(lambda: f.read(1 << 20), b''):
+                   decompressor.decompress(block, 0)
+           if not decompressor.eof:
+               return ["truncated compressed stream"]
+       except (OSError, zlib.error) as e:
+           return [str(e)]
+       return []
+
+   def verify_checkpoints(self, filename: str = None) -> bool:
+       """Verify one or all checkpoints, printing a line per checkpoint."""
+       self.load_checkpoint_list()
+       names = [filename] if filename else self.checkpoints
+       sound = True
+       for name in names:
+           if not os.path.exists(os.path.join(self.checkpoint_dir, name)):
+               print(f"MISSING  {name}")
+               sound = False
+               continue
+           problems = self.verify_checkpoint(name)
+           print(f"{'OK' if not problems else 'CORRUPT':8} {name}")
+           for problem in problems:
+               print(f"         - {problem}")
+           sound = sound and not problems
+       return sound
+
    def list_checkpoints(self):
        """List available checkpoints"""
        self.load_checkpoint_list()
@@ -3152,14 +5927,92 @@ class CheckpointManager:
        
        print("\nAvailable checkpoints:")
        for i, checkpoint in enumerate(self.checkpoints):
-           # Extract info from filename
-           parts = checkpoint.split('_')
-           if len(parts) >= 2:
-               label = '_'.join(parts[:-2])
-               timestamp = parts[-2] + '_' + parts[-1].replace('.checkpoint', '')
-               print(f"{i+1}. {label} - {timestamp}")
+           info = self.checkpoint_info(checkpoint)
+           size = f"{info['bytes'] / 1e6:.1f} MB" if 'bytes' in info else "?"
+           if 'day' in info:
+               detail = (f"day {info['day']}, {info['population']} people, "
+                         f"{info['companies']} companies, {info['kind']}, "
+                         f"{info['codec']}, seed {info['seed']}, {size}")
+               if info['kind'] == 'delta':
+                   detail += f", base {info['base']}"
            else:
-               print(f"{i+1}. {checkpoint}")
+               detail = f"{info['kind']}, {size}"
+           print(f"{i+1}. {checkpoint} - {detail}")
+
+@dataclass
+class CheckpointSnapshot:
+   """Detached copy of a world's checkpoint tables, ready to be written off-thread"""
+   day: int
+   tables: List[Tuple[str, Dict[str, np.ndarray]]]
+   objects: bytes
+   fields: Dict[str, Any]
+
+class CheckpointWriter:
+   """Background thread writing checkpoint snapshots from a bounded queue.
+
+   `submit` blocks while CHECKPOINT_QUEUE_SIZE snapshots are already
+   waiting, so a slow disk throttles the simulation instead of piling
+   up snapshots in memory. Deltas queued against a base that failed to
+   write are dropped rather than written unrestorable.
+   """
+
+   def __init__(self, on_written=None, on_failed=None, queue_size: int = CHECKPOINT_QUEUE_SIZE):
+       self.on_written = on_written
+       self.on_failed = on_failed
+       self.queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+       self.metrics = {'written': 0, 'failed': 0, 'write_seconds': 0.0,
+                       'last_write_seconds': 0.0, 'blocked_seconds': 0.0}
+       self.failed: Set[str] = set()  # names of snapshots that never reached the disk
+       self.thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+       self.thread.start()
+
+   def submit(self, snapshot: CheckpointSnapshot, path: str, codec: str = None):
+       start = time.perf_counter()
+       self.queue.put((snapshot, path, codec))
+       waited = time.perf_counter() - start
+       self.metrics['blocked_seconds'] += waited
+       if waited > 1.0:
+           logger.warning(f"Checkpoint queue full - simulation waited {waited:.1f}s for the writer")
+
+   def _run(self):
+       while True:
+           item = self.queue.get()
+           try:
+               if item is None:
+                   return
+               snapshot, path, codec = item
+               name = os.path.basename(path)
+               start = time.perf_counter()
+               try:
+                   base = snapshot.fields.get('base')
+                   if base in self.failed:
+                       raise RuntimeError(f"its base checkpoint {base} was not written")
+                   WorldCheckpoint.write(path, snapshot.day, snapshot.tables, snapshot.objects, codec,
+                                         snapshot.fields)
+               except Exception as e:
+                   self.failed.add(name)
+                   self.metrics['failed'] += 1
+                   logger.error(f"Failed to write checkpoint {name}: {e}")
+                   if self.on_failed:
+                       self.on_failed(name)
+                   continue
+               elapsed = time.perf_counter() - start
+               self.metrics['written'] += 1
+               self.metrics['write_seconds'] += elapsed
+               self.metrics['last_write_seconds'] = elapsed
+               logger.info(f"Checkpoint written in background: {name} ({elapsed:.2f}s)")
+               if self.on_written:
+                   self.on_written(name)
+           finally:
+               self.queue.task_done()
+
+   def wait(self):
+       """Block until every submitted snapshot has been written."""
+       self.queue.join()
+
+   def close(self):
+       self.queue.put(None)
+       self.thread.join()
 
 # ============= MAIN SIMULATION CONTROLLER =============
 
@@ -3174,6 +6027,7 @@ class SimulationController:
        self.running = False
        self.target_days = 1000
        self.last_checkpoint_day = 0
+       self.last_delta_day = 0
    
    def run(self, days: int = None):
        """Run simulation for specified number of days"""
@@ -3202,10 +6056,15 @@ class SimulationController:
                if ENABLE_GRAPHS and self.world.current_day % GRAPH_UPDATE_FREQUENCY == 0:
                    self.visualizer.update_plots()
                
-               # Auto checkpoint
+               # Auto checkpoint: periodic full bases with deltas in between
                if AUTO_SAVE and self.world.current_day - self.last_checkpoint_day >= CHECKPOINT_FREQUENCY:
-                   self.checkpoint_manager.save_checkpoint()
+                   self.checkpoint_manager.save_checkpoint(background=ASYNC_CHECKPOINTS)
                    self.last_checkpoint_day = self.world.current_day
+                   self.last_delta_day = self.world.current_day
+               elif (AUTO_SAVE and DELTA_CHECKPOINT_FREQUENCY > 0 and
+                     self.world.current_day - self.last_delta_day >= DELTA_CHECKPOINT_FREQUENCY):
+                   self.checkpoint_manager.save_checkpoint(background=ASYNC_CHECKPOINTS, delta=True)
+                   self.last_delta_day = self.world.current_day
                
                # Check for simulation end conditions
                if len(self.world.people) == 0:
@@ -3220,6 +6079,8 @@ class SimulationController:
        finally:
            self.running = False
            self.pygame_viewer.close()
+           self.world.death_archive.flush()
+           self.checkpoint_manager.close()
            
            # Final statistics
            self.print_final_stats()
@@ -3248,13 +6109,13 @@ class SimulationController:
            print(f"Total primes discovered: {len(stats['prime_discoveries'])}")
        
        if stats['gini']:
-           print(f"\nFinal Gini coefficient: {stats['gini'][-1]:.3f}")
+           print(f"\nFinal Gini coefficient: {stats['gini'].last():.3f}")
        
        if stats['happiness']:
-           print(f"Average happiness: {stats['happiness'][-1]:.1f}")
+           print(f"Average happiness: {stats['happiness'].last():.1f}")
        
        if stats['knowledge']:
-           print(f"Average knowledge: {stats['knowledge'][-1]:.2f} primes")
+           print(f"Average knowledge: {stats['knowledge'].last():.2f} primes")
        
        print("\nActive memes: {}".format(len(self.world.memes)))
        print("Active companies: {}".format(len(self.world.companies)))
@@ -3278,7 +6139,8 @@ def main():
    """Main entry point with CLI arguments"""
    global INITIAL_POPULATION, AUTO_SAVE, ENABLE_GRAPHS, ENABLE_PYGAME_VIEWER
    global ENABLE_REGION_MULTITHREADING, REGION_THREAD_WORKERS, PYGAME_VIEWER_FPS
-   global GLOBAL_SEED
+   global GLOBAL_SEED, ENABLE_DEATH_ARCHIVE, CHECKPOINT_CODEC, CHECKPOINT_LEVEL
+   global ENABLE_EVENT_JOURNAL, EVENT_JOURNAL_DIR
 
    parser = argparse.ArgumentParser(
        description='Prime Society Simulator - A socio-economic simulation based on prime numbers'
@@ -3310,6 +6172,35 @@ def main():
        help='List available checkpoints and exit'
    )
    
+   parser.add_argument(
+       '--verify-checkpoints',
+       nargs='?',
+       const='',
+       metavar='CHECKPOINT',
+       help='Check the integrity of one checkpoint (or all) and exit'
+   )
+   
+   parser.add_argument(
+       '--branch',
+       action='append',
+       metavar='SPEC',
+       help='Run a what-if branch from the loaded world instead of the main run; '
+            'SPEC is a scenario, NAME=VALUE overrides, or scenario:NAME=VALUE,... (repeatable)'
+   )
+   
+   parser.add_argument(
+       '--branch-days',
+       type=int,
+       default=BRANCH_DAYS,
+       help=f'Days each branch runs (default: {BRANCH_DAYS})'
+   )
+   
+   parser.add_argument(
+       '--branch-report',
+       type=str,
+       help='Also write the branch comparison as JSON to this path'
+   )
+   
    parser.add_argument(
        '--no-graphs',
        action='store_true',
@@ -3349,6 +6240,35 @@ def main():
        help='Enable automatic checkpointing'
    )
    
+   parser.add_argument(
+       '--checkpoint-codec',
+       choices=CHECKPOINT_CODECS,
+       default=CHECKPOINT_CODEC,
+       help=f'Checkpoint compression codec; none writes memory-mappable tables (default: {CHECKPOINT_CODEC})'
+   )
+   
+   parser.add_argument(
+       '--checkpoint-level',
+       type=int,
+       default=CHECKPOINT_LEVEL,
+       help=f'Checkpoint compression level 0-9 (default: {CHECKPOINT_LEVEL})'
+   )
+   
+   parser.add_argument(
+       '--no-death-archive',
+       action='store_true',
+       help='Do not archive deceased agents to disk'
+   )
+   
+   parser.add_argument(
+       '--event-journal',
+       nargs='?',
+       const=EVENT_JOURNAL_DIR,
+       default=None,
+       metavar='DIR',
+       help=f'Write a binary journal of births, deaths, hires, trades, foundings, bankruptcies and migrations (default dir: {EVENT_JOURNAL_DIR})'
+   )
+   
    parser.add_argument(
        '--log-level',
        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -3356,6 +6276,19 @@ def main():
        help='Set logging level'
    )
    
+   parser.add_argument(
+       '--log-file',
+       type=str,
+       default=LOG_FILE,
+       help=f'Log file path, empty to log to the console only (default: {LOG_FILE})'
+   )
+   
+   parser.add_argument(
+       '--sync-logging',
+       action='store_true',
+       help='Write log records inline instead of on a background thread'
+   )
+   
    parser.add_argument(
        '--seed',
        type=int,
@@ -3371,7 +6304,7 @@ def main():
    args = parser.parse_args()
    
    # Configure logging
-   logging.getLogger().setLevel(getattr(logging, args.log_level))
+   configure_logging(args.log_file or None, not args.sync_logging, getattr(logging, args.log_level))
    
    # Set random seed (auto-generate if not provided)
    if args.seed is None:
@@ -3396,21 +6329,49 @@ def main():
    REGION_THREAD_WORKERS = max(1, args.threads)
    ENABLE_REGION_MULTITHREADING = REGION_THREAD_WORKERS > 1
    AUTO_SAVE = args.auto_save
+   ENABLE_DEATH_ARCHIVE = not args.no_death_archive
+   ENABLE_EVENT_JOURNAL = args.event_journal is not None
+   CHECKPOINT_CODEC = args.checkpoint_codec
+   CHECKPOINT_LEVEL = min(9, max(0, args.checkpoint_level))
    
-   # Create simulation controller
-   sim = SimulationController()
-   
-   # Handle checkpoint operations
+   # Handle checkpoint operations that only read manifests, before building a world
    if args.list_checkpoints:
-       sim.checkpoint_manager.list_checkpoints()
+       CheckpointManager(None).list_checkpoints()
+       return
+   
+   if args.verify_checkpoints is not None:
+       if not CheckpointManager(None).verify_checkpoints(args.verify_checkpoints or None):
+           sys.exit(1)
        return
    
+   if ENABLE_EVENT_JOURNAL:
+       EVENT_JOURNAL_DIR = args.event_journal
+       event_journal.open(new_event_journal_dir())
+   
+   # Create simulation controller
+   sim = SimulationController()
+   
    if args.load:
        if not sim.checkpoint_manager.load_checkpoint(args.load):
            print(f"Failed to load checkpoint: {args.load}")
            return
        print(f"Loaded checkpoint: {args.load}")
    
+   if args.branch:
+       branching = ScenarioBranches(sim.world)
+       try:
+           branches = [ScenarioBranches.parse(spec) for spec in args.branch]
+           results = branching.run(branches, args.branch_days)
+       except ValueError as e:
+           print(f"Invalid branch: {e}")
+           return
+       print(ScenarioBranches.report(results))
+       if args.branch_report:
+           with open(args.branch_report, 'w') as f:
+               json.dump(results, f, indent=2)
+       sim.pygame_viewer.close()
+       return
+   
    # Run simulation
    if args.profile:
        import cProfile
@@ -3425,6 +6386,10 @@ def main():
        stats = pstats.Stats(profiler)
        stats.sort_stats('cumulative')
        stats.print_stats(20)
+
+       print("Memo cache hit rates:")
+       for name, (hits, misses, rate) in sim.world.memo.hit_rates().items():
+           print(f"  {name}: {rate:.1%} ({hits} hits, {misses} misses)")
    else:
        sim.run(args.days)
    
@@ -3446,7 +6411,8 @@ class Scenarios:
        # Give everyone more resources
        for person in world.people.values():
            person.resources *= 3
-           person.known_primes.update([2, 3, 5, 7])
+           for prime in (2, 3, 5, 7):
+               person.learn_prime(prime)
        
        # Create several companies
        wealthy = [p for p in world.people.values() if p.resources > 1000]
@@ -3462,7 +6428,8 @@ class Scenarios:
        for person in world.people.values():
            # Everyone knows first 10 primes
            primes = [p for p in range(2, 30) if is_prime(p)]
-           person.known_primes.update(primes[:10])
+           for prime in primes[:10]:
+               person.learn_prime(prime)
            person.intelligence = min(200, person.intelligence * 1.5)
        
        logger.info("Knowledge society scenario initialized")
@@ -3489,7 +6456,7 @@ class Scenarios:
            leader = max(world.people.values(), key=lambda p: p.charisma)
            
            # Create revolutionary meme
-           meme = Meme(leader, "Revolution")
+           meme = Meme(leader, world.population, "Revolution")
            meme.transmissibility = 2.0  # Highly contagious
            
            # Strong effects on traits
@@ -3516,8 +6483,6 @@ class Analytics:
    @staticmethod
    def analyze_social_mobility(world: World, days: int = 365):
        """Analyze social mobility over time"""
-       if days > len(world.stats['population']):
-           days = len(world.stats['population'])
        
        # Track resource percentiles over time
        mobility_data = []
@@ -3525,7 +6490,7 @@ class Analytics:
        # This would require tracking individual wealth over time
        # Simplified version:
        if world.stats['gini']:
-           recent_gini = world.stats['gini'][-days:]
+           recent_gini = world.stats['gini'].tail(days)
            mobility = np.std(recent_gini)  # Higher variance = more mobility
            
            return {
@@ -3537,59 +6502,21 @@ class Analytics:
    
    @staticmethod
    def detect_dynasties(world: World):
-       """Identify family dynasties"""
+       """Identify family dynasties (founders living or dead, descendants through either parent)"""
+       genealogy = world.genealogy
+       stats = genealogy.dynasty_stats(world.people)
        dynasties = []
        
-       for person in world.people.values():
-           if 'parent1' not in person.family:
-               # Potential dynasty founder
-               descendants = Analytics._count_descendants(person, world)
-               if descendants > 5:
-                   total_wealth = Analytics._dynasty_wealth(person, world)
-                   dynasties.append({
-                       'founder': person.id,
-                       'descendants': descendants,
-                       'total_wealth': total_wealth,
-                       'avg_knowledge': Analytics._dynasty_knowledge(person, world)
-                   })
+       for node in np.flatnonzero(stats['descendants'] > DYNASTY_MIN_DESCENDANTS):
+           dynasties.append({
+               'founder': genealogy.founder_ids[int(node)],
+               'descendants': int(stats['descendants'][node]),
+               'total_wealth': float(stats['wealth'][node]),
+               'avg_knowledge': float(stats['avg_knowledge'][node])
+           })
        
        return sorted(dynasties, key=lambda x: x['total_wealth'], reverse=True)
    
-   @staticmethod
-   def _count_descendants(person: Person, world: World) -> int:
-       """Count all descendants of a person"""
-       count = 0
-       for key, child_id in person.family.items():
-           if key.startswith('child_') and child_id in world.people:
-               count += 1
-               count += Analytics._count_descendants(world.people[child_id], world)
-       return count
-   
-   @staticmethod
-   def _dynasty_wealth(person: Person, world: World) -> float:
-       """Calculate total wealth of a dynasty"""
-       wealth = person.resources if person.is_alive else 0
-       
-       for key, child_id in person.family.items():
-           if key.startswith('child_') and child_id in world.people:
-               child = world.people[child_id]
-               wealth += Analytics._dynasty_wealth(child, world)
-       
-       return wealth
-   
-   @staticmethod
-   def _dynasty_knowledge(person: Person, world: World) -> float:
-       """Calculate average knowledge in a dynasty"""
-       knowledge = [len(person.known_primes)] if person.is_alive else []
-       
-       for key, child_id in person.family.items():
-           if key.startswith('child_') and child_id in world.people:
-               child = world.people[child_id]
-               if child.is_alive:
-                   knowledge.append(len(child.known_primes))
-       
-       return np.mean(knowledge) if knowledge else 0
-   
    @staticmethod
    def identify_market_bubbles(world: World):
        """Detect potential market bubbles"""
@@ -3634,8 +6561,8 @@ class Analytics:
        
        # Love stories
        for person in world.people.values():
-           if person.relationships:
-               best_rel = max(person.relationships.items(), key=lambda x: x[1])
+           best_rel = world.relationships.best_partner(person.id, world.current_day)
+           if best_rel[0] is not None:
                if best_rel[1] > 90:
                    events.append({
                        'type': 'true_love',
@@ -3676,8 +6603,9 @@ class ExperimentalFeatures:
                
                person.location.region = new_region
                person.location.district = random.randint(0, DISTRICTS_PER_REGION - 1)
+               event_journal.record('migration', person.id, None, new_region, 0.0, float(current_region))
                
-               logger.debug(f"Person {person.id} migrated from region {current_region} to {new_region}")
+               logger.debug("Person %s migrated from region %d to %d", person.id, current_region, new_region)
    
    @staticmethod
    def enable_innovation_clusters(world: World):
@@ -3730,11 +6658,188 @@ class ExperimentalFeatures:
            # Spread knowledge
            for person in random.sample(list(world.people.values()), 
                                       min(100, len(world.people))):
-               person.known_primes.add(highest_prime)
+               person.learn_prime(highest_prime)
            
            # Economic boom
            world.market.prices = {k: v * 0.8 for k, v in world.market.prices.items()}
 
+# ============= SCENARIO BRANCHING =============
+
+class ScenarioBranches:
+   """What-if runs branched from one loaded world.
+
+   Each branch applies a Scenarios method and/or constant overrides and
+   runs for a number of days. With os.fork the branches are child processes
+   sharing the parent's memory copy-on-write and running in parallel;
+   elsewhere each branch runs in turn on an in-memory clone. All branches
+   start from the same RNG state, so differences between them come from
+   the scenario rather than from chance.
+   """
+
+   def __init__(self, world: World):
+       self.world = world
+
+   @staticmethod
+   def parse(spec: str) -> Dict[str, Any]:
+       """Parse 'scenario', 'NAME=VALUE,...' or 'scenario:NAME=VALUE,...' into a branch."""
+       scenario, _, assignments = spec.partition(':')
+       if '=' in scenario:
+           scenario, assignments = '', spec
+       overrides = {}
+       for assignment in filter(None, assignments.split(',')):
+           name, _, raw = assignment.partition('=')
+           try:
+               overrides[name.strip()] = json.loads(raw)
+           except ValueError:
+               overrides[name.strip()] = raw
+       return {'name': spec, 'scenario': scenario or None, 'overrides': overrides}
+
+   @staticmethod
+   def validate(branch: Dict[str, Any]):
+       scenario = branch.get('scenario')
+       if scenario and not callable(getattr(Scenarios, scenario, None)):
+           raise ValueError(f"Unknown scenario: {scenario}")
+       overrides = branch.get('overrides', {})
+       for name, value in overrides.items():
+           overrides[name] = coerce_parameter(name, value)
+
+   def run(self, branches: List[Dict[str, Any]], days: int = BRANCH_DAYS,
+           include_baseline: bool = True, max_parallel: int = None) -> Dict[str, Dict[str, Any]]:
+       """Run every branch for `days` days; returns a summary per branch name."""
+       branches = list(branches)
+       for branch in branches:
+           self.validate(branch)
+       if include_baseline and not any(b['name'] == 'baseline' for b in branches):
+           branches.insert(0, {'name': 'baseline', 'scenario': None, 'overrides': {}})
+       self.world.death_archive.flush()
+       event_journal.flush()
+       if hasattr(os, 'fork'):
+           return self._run_forked(branches, days, max_parallel or os.cpu_count() or 1)
+       return self._run_cloned(branches, days)
+
+   def _run_branch(self, world: World, branch: Dict[str, Any], days: int) -> Dict[str, Any]:
+       # Branches must not append to the parent's files
+       world.death_archive = DeathArchive(None)
+       for value in world.stats.values():
+           if isinstance(value, StatsSeries):
+               value.spill_path = None
+       start = time.perf_counter()
+       start_day = world.current_day
+       counts = {key: world.stats[key] for key in ('births', 'deaths', 'companies_founded', 'companies_failed')}
+       for name, value in branch.get('overrides', {}).items():
+           globals()[name] = value
+       if branch.get('scenario'):
+           getattr(Scenarios, branch['scenario'])(world)
+       for _ in range(days):
+           world.simulate_day()
+           if not world.people:
+               break
+       summary = {
+           'scenario': branch.get('scenario'),
+           'overrides': branch.get('overrides', {}),
+           'days': world.current_day - start_day,
+           'population': len(world.people),
+           'companies': len(world.companies),
+           'seconds': time.perf_counter() - start,
+           'metrics': {name: world.stats[name].tail(world.current_day - start_day).tolist()
+                       for name in BRANCH_METRICS if name in world.stats},
+       }
+       summary.update({key: world.stats[key] - value for key, value in counts.items()})
+       return summary
+
+   def _run_forked(self, branches: List[Dict[str, Any]], days: int, max_parallel: int) -> Dict[str, Dict[str, Any]]:
+       results: Dict[str, Dict[str, Any]] = {}
+       running: List[Tuple[int, int, str]] = []
+       pending = list(branches)
+       state = rng_state()  # the random module reseeds itself in forked children
+       stop_log_listener()  # fork only from a single-threaded process
+       sys.stdout.flush()
+       sys.stderr.flush()
+       try:
+           self._fork_loop(pending, running, results, state, days, max_parallel)
+       finally:
+           start_log_listener()
+       for name, result in results.items():
+           if 'error' in result:
+               logger.error(f"Branch {name} failed: {result['error']}")
+       return results
+
+   def _fork_loop(self, pending, running, results, state, days: int, max_parallel: int):
+       while pending or running:
+           while pending and len(running) < max_parallel:
+               branch = pending.pop(0)
+               read_fd, write_fd = os.pipe()
+               pid = os.fork()
+               if pid == 0:
+                   os.close(read_fd)
+                   inline_logging()
+                   event_journal.detach()
+                   set_rng_state(state)
+                   try:
+                       payload = self._run_branch(self.world, branch, days)
+                   except BaseException:
+                       payload = {'error': traceback.format_exc()}
+                   with os.fdopen(write_fd, 'wb') as pipe:
+                       pickle.dump(payload, pipe)
+                   os._exit(0)
+               os.close(write_fd)
+               running.append((pid, read_fd, branch['name']))
+           pid, read_fd, name = running.pop(0)
+           with os.fdopen(read_fd, 'rb') as pipe:
+               data = pipe.read()
+           os.waitpid(pid, 0)
+           try:
+               results[name] = pickle.loads(data)
+           except Exception:
+               results[name] = {'error': 'branch process exited without a result'}
+
+   def _run_cloned(self, branches: List[Dict[str, Any]], days: int) -> Dict[str, Dict[str, Any]]:
+       snapshot = WorldCheckpoint(self.world).snapshot()
+       tables = dict(snapshot.tables)
+       saved = {name: globals()[name] for branch in branches for name in branch.get('overrides', {})}
+       results: Dict[str, Dict[str, Any]] = {}
+       journaling, event_journal.enabled = event_journal.enabled, False
+       for branch in branches:
+           clone = World.__new__(World)
+           WorldCheckpoint.restore(clone, lambda name: {key: column.copy() for key, column in tables[name].items()},
+                                   snapshot.objects)
+           clone._ensure_runtime_params()
+           try:
+               results[branch['name']] = self._run_branch(clone, branch, days)
+           except Exception:
+               results[branch['name']] = {'error': traceback.format_exc()}
+               logger.error(f"Branch {branch['name']} failed: {results[branch['name']]['error']}")
+           finally:
+               globals().update(saved)
+               set_current_day(self.world.current_day)
+       event_journal.enabled = journaling
+       return results
+
+   @staticmethod
+   def report(results: Dict[str, Dict[str, Any]]) -> str:
+       """Side-by-side comparison of branch outcomes, relative to the baseline when present."""
+       baseline = results.get('baseline')
+       lines = [f"{'branch':<32}{'days':>6}{'pop':>8}{'births':>8}{'deaths':>8}{'firms':>7}"
+                + ''.join(f"{name:>12}" for name in BRANCH_METRICS)]
+       for name, result in results.items():
+           if 'error' in result:
+               lines.append(f"{name:<32} failed")
+               continue
+           row = (f"{name[:31]:<32}{result['days']:>6}{result['population']:>8}{result['births']:>8}"
+                  f"{result['deaths']:>8}{result['companies']:>7}")
+           for metric in BRANCH_METRICS:
+               series = result['metrics'].get(metric) or [0.0]
+               value = series[-1]
+               if baseline and name != 'baseline' and 'error' not in baseline:
+                   reference = (baseline['metrics'].get(metric) or [0.0])[-1]
+                   row += f"{(value - reference) / abs(reference) * 100 if reference else 0.0:>+11.1f}%"
+               else:
+                   row += f"{value:>12.3g}"
+           lines.append(row)
+       if baseline:
+           lines.append("(metrics of non-baseline branches are % change against the baseline)")
+       return "\n".join(lines)
+
 # ============= RUN SIMULATION =============
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+import importlib.util
+import logging
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prime-society.py')
+
+@pytest.fixture(scope='session')
+def ps():
+   """The simulator module (its file name is not importable as-is)."""
+   spec = importlib.util.spec_from_file_location('prime_society', MODULE_PATH)
+   module = importlib.util.module_from_spec(spec)
+   sys.modules['prime_society'] = module  # pickled checkpoints refer to classes by module name
+   spec.loader.exec_module(module)
+   module.configure_logging(None, False, logging.WARNING)
+   return module
+
+@pytest.fixture(autouse=True)
+def sandbox(ps, tmp_path, monkeypatch):
+   """Small single-threaded worlds writing under tmp_path; parameters restored afterwards."""
+   parameters = {name: getattr(ps, name) for name in ps.SIMULATION_PARAMETERS}
+   monkeypatch.setattr(ps, 'INITIAL_POPULATION', 150)
+   monkeypatch.setattr(ps, 'ENABLE_PYGAME_VIEWER', False)
+   monkeypatch.setattr(ps, 'ENABLE_GRAPHS', False)
+   monkeypatch.setattr(ps, 'ENABLE_REGION_MULTITHREADING', False)
+   monkeypatch.setattr(ps, 'ASYNC_CHECKPOINTS', False)
+   monkeypatch.setattr(ps, 'CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+   monkeypatch.setattr(ps, 'DEATH_ARCHIVE_DIR', str(tmp_path / 'archive'))
+   monkeypatch.setattr(ps, 'EVENT_JOURNAL_DIR', str(tmp_path / 'journal'))
+   monkeypatch.setattr(ps, 'GLOBAL_SEED', 7)
+   random.seed(7)
+   np.random.seed(7)
+   yield
+   ps.event_journal.close()
+   for name, value in parameters.items():
+      setattr(ps, name, value)
+
+@pytest.fixture
+def world(ps):
+   world = ps.World()
+   for _ in range(5):
+      world.simulate_day()
+   return world
+
+def fingerprint(world):
+   """Comparable summary of a world's state, independent of agent ids."""
+   return {
+      'day': world.current_day,
+      'stats': {name: value.values.tolist() for name, value in world.stats.items()
+                if not isinstance(value, (dict, int, float))},
+      'counts': {name: value for name, value in world.stats.items() if isinstance(value, (int, float))},
+      'people': sorted((p.age, p.resources, p.health, p.happiness, len(p.known_primes))
+                       for p in world.people.values()),
+      'companies': sorted((c.capital, len(c.employees), sorted(c.collective_knowledge))
+                          for c in world.companies.values()),
+      'prices': sorted(world.market.prices.items()),
+   }
+
+@pytest.fixture
+def world_fingerprint():
+   return fingerprint
+
+@pytest.fixture
+def load_latest(ps):
+   """Load the newest checkpoint (or the one whose name starts with `prefix`) into a fresh world."""
+   def load(prefix: str = ''):
+      world = ps.World.__new__(ps.World)
+      manager = ps.CheckpointManager(world)
+      name = [c for c in manager.checkpoints if c.startswith(prefix)][-1]
+      assert manager.load_checkpoint(name)
+      return world
+   return load
+
+@pytest.fixture
+def round_trip(ps, load_latest):
+   """Save `world` (through `manager` when given), load it into a fresh world and check they match."""
+   def save_and_load(world, label: str = 'round_trip', manager=None, **options):
+      (manager or ps.CheckpointManager(world)).save_checkpoint(label, **options)
+      restored = load_latest(label)
+      assert fingerprint(restored) == fingerprint(world)
+      return restored
+   return save_and_load
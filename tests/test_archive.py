@@ -0,0 +1,63 @@
+import copy
+
+def bury_with_parents(world):
+   person, mother, father = list(world.people.values())[:3]
+   person.family['parent1'] = mother.id
+   person.family['parent2'] = father.id
+   person.age = 40 * 365
+   world.bury_person(person)
+   return person, mother, father
+
+def test_reader_decodes_buried_person(ps, world):
+   before = len(world.death_archive.reader())
+   person, mother, father = bury_with_parents(world)
+
+   reader = world.death_archive.reader()
+   assert len(reader) == before + 1
+   record = reader.records[-1]
+   assert ps.decode_person_id(record['id']) == person.id
+   assert ps.decode_person_id(record['parent1']) == mother.id
+   assert ps.decode_person_id(record['parent2']) == father.id
+   assert record['death_day'] == world.current_day
+   assert record['birth_day'] == world.current_day - 40 * 365
+   assert record['known_primes'] == len(person.known_primes)
+
+def test_reader_of_missing_archive_is_empty(ps, tmp_path):
+   assert len(ps.DeathArchiveReader(None)) == 0
+   assert len(ps.DeathArchiveReader(str(tmp_path / 'nothing.bin'))) == 0
+
+def test_resume_copies_instead_of_truncating(ps, world):
+   world.death_archive.flush()
+   saved = copy.deepcopy(world.death_archive)
+   for person in list(world.people.values())[:4]:
+      world.bury_person(person)
+   assert len(world.death_archive.reader()) == saved.count + 4
+
+   saved.resume()
+   assert saved.path != world.death_archive.path
+   assert len(saved.reader()) == saved.count
+   assert len(world.death_archive.reader()) == saved.count + 4
+
+def test_resume_at_end_of_file_keeps_appending(ps, world):
+   world.death_archive.flush()
+   path = world.death_archive.path
+   world.death_archive.resume()
+   assert world.death_archive.path == path
+
+def test_older_checkpoint_leaves_later_ones_intact(ps, world, load_latest):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('older')
+   count = len(world.death_archive.reader())
+   person, _, _ = bury_with_parents(world)
+   manager.save_checkpoint('later')
+
+   older = load_latest('older')
+   assert older.death_archive.path != world.death_archive.path
+   assert len(older.death_archive.reader()) == count
+   for survivor in list(older.people.values())[:3]:
+      older.bury_person(survivor)
+   assert len(older.death_archive.reader()) == count + 3
+
+   later = load_latest('later')
+   assert len(later.death_archive.reader()) == count + 1
+   assert ps.decode_person_id(later.death_archive.reader().records[-1]['id']) == person.id
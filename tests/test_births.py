@@ -0,0 +1,62 @@
+import uuid
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def couples(ps, world, monkeypatch):
+   """Eight rich adults with hand-set ties, in a world where every eligible adult gives birth."""
+   monkeypatch.setattr(ps.np.random, 'random', lambda size=None: np.zeros(size))
+   monkeypatch.setattr(ps.np.random, 'uniform', lambda low, high, size=None: np.zeros(size))
+   world.relationships = ps.RelationshipGraph(world.population)
+   people = list(world.people.values())[:8]
+   for person in people:
+      person.is_alive = True
+      person.age = 30 * 365
+      person.resources = 1e5
+   a, b, c, d, e, f, g, h = people
+   day = world.current_day
+   world.relationships.strengthen(a.id, b.id, 60.0, day)  # strong tie: a couple
+   world.relationships.strengthen(a.id, c.id, 40.0, day)  # weaker than b, ignored
+   world.relationships.strengthen(c.id, d.id, 10.0, day)  # below the reproduction threshold
+   world.relationships.strengthen(e.id, f.id, 60.0, day)
+   f.resources = 0.0  # partner cannot afford a child
+   world.relationships.strengthen(g.id, h.id, 60.0, day)
+   h.age = 80 * 365  # partner past reproductive age
+   return people
+
+def test_draw_births_picks_strongest_eligible_partner(ps, world, couples):
+   a, b, c, d, e, f, g, h = couples
+   parents, partners, costs = world._draw_births(couples)
+   chosen = {parent.id: partner and partner.id for parent, partner in zip(parents, partners)}
+   assert chosen == {a.id: b.id, b.id: None, c.id: None, d.id: None, e.id: None, g.id: None}
+   assert len(costs) == len(parents) and (costs > 0).all()
+
+def test_children_inherit_parent_traits_and_location(ps, world, couples):
+   a, b, _, _, e, *_ = couples
+   for person in (a, b, e):
+      person.nutrition_efficiency, person.starvation_resistance, person.health_resilience = 1.0, 1.1, 1.2
+   b.nutrition_efficiency = 1.2
+   traits = {p.id: np.array(p.traits.values()) for p in (a, b, e)}
+   resources = {p.id: p.resources for p in (a, b, e)}
+   population = len(world.people)
+
+   world._allocate_children([a, e], [b, None], np.array([100.0, 80.0]))
+
+   assert len(world.people) == population + 2
+   first, second = list(world.people.values())[-2:]
+   assert first.family == {'parent1': a.id, 'parent2': b.id}
+   assert second.family == {'parent1': e.id}
+   assert b.family[f'child_{first.id}'] == first.id
+
+   np.testing.assert_allclose(first.traits.values(), (traits[a.id] + traits[b.id]) / 2, atol=1e-4)
+   np.testing.assert_allclose(second.traits.values(), traits[e.id], atol=1e-4)
+   assert first.nutrition_efficiency == pytest.approx(1.1)
+   assert second.health_resilience == pytest.approx(1.2)
+
+   assert first.location is a.location and second.location is e.location
+   assert first.birth_day == second.birth_day == world.current_day
+   assert uuid.UUID(first.id).version == 4 and first.id != second.id
+   assert a.resources == resources[a.id] - 50 and b.resources == resources[b.id] - 50
+   assert e.resources == resources[e.id] - 80
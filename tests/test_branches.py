@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+def test_parse(ps):
+   assert ps.ScenarioBranches.parse('economic_boom:MIGRATION_BASE_RATE=0.05,LABEL=boom') == {
+      'name': 'economic_boom:MIGRATION_BASE_RATE=0.05,LABEL=boom',
+      'scenario': 'economic_boom',
+      'overrides': {'MIGRATION_BASE_RATE': 0.05, 'LABEL': 'boom'},
+   }
+   assert ps.ScenarioBranches.parse('knowledge_society')['overrides'] == {}
+
+def test_parse_and_validate_coerce_overrides(ps):
+   branch = ps.ScenarioBranches.parse('MIGRATION_BASE_RATE=1')
+   ps.ScenarioBranches.validate(branch)
+   assert branch['scenario'] is None
+   assert branch['overrides'] == {'MIGRATION_BASE_RATE': 1.0}
+   assert isinstance(branch['overrides']['MIGRATION_BASE_RATE'], float)
+
+@pytest.mark.parametrize('spec', ['no_such_scenario', 'NOT_A_CONSTANT=1', 'migration_base_rate=1',
+                                  'PERSON_FLOAT_COLUMNS=[]', 'MIGRATION_BASE_RATE=abc', 'LOG_FILE="x.log"'])
+def test_validate_rejects(ps, spec):
+   with pytest.raises(ValueError):
+      ps.ScenarioBranches.validate(ps.ScenarioBranches.parse(spec))
+
+def summary(result):
+   return {key: value for key, value in result.items() if key != 'seconds'}
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_and_cloned_branches_agree(ps, world):
+   rate = ps.MIGRATION_BASE_RATE
+   branches = [ps.ScenarioBranches.parse('MIGRATION_BASE_RATE=0.05')]
+   runner = ps.ScenarioBranches(world)
+   forked = runner.run(branches, days=3)
+   for branch in branches:
+      runner.validate(branch)
+   branches.insert(0, {'name': 'baseline', 'scenario': None, 'overrides': {}})
+   cloned = runner._run_cloned(branches, 3)
+
+   assert set(forked) == set(cloned) == {'baseline', 'MIGRATION_BASE_RATE=0.05'}
+   for name in forked:
+      assert 'error' not in forked[name]
+      assert summary(forked[name]) == summary(cloned[name])
+   assert ps.MIGRATION_BASE_RATE == rate
+   assert world.current_day == 5
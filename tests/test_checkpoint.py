@@ -0,0 +1,83 @@
+import os
+import pickle
+import zlib
+
+import pytest
+
+def test_round_trip_restores_world(world, round_trip):
+   restored = round_trip(world)
+   assert list(restored.people) == list(world.people)
+   assert set(restored.companies) == set(world.companies)
+   for company_id, company in world.companies.items():
+      copy = restored.companies[company_id]
+      assert [e.id for e in copy.employees] == [e.id for e in company.employees]
+      assert all(e.employer is copy for e in copy.employees)
+      assert copy.payroll == company.payroll
+
+def test_restored_world_keeps_running(world, round_trip):
+   restored = round_trip(world)
+   for _ in range(3):
+      restored.simulate_day()
+   assert restored.current_day == world.current_day + 3
+   assert restored.stats['population'].total == world.current_day + 3
+
+@pytest.mark.parametrize('codec', ['zlib', 'lzma', 'bz2', 'none'])
+def test_every_codec_round_trips(ps, world, round_trip, monkeypatch, codec):
+   monkeypatch.setattr(ps, 'CHECKPOINT_CODEC', codec)
+   monkeypatch.setattr(ps, 'CHECKPOINT_CHUNK_SIZE', 4096)  # several chunks per table
+   round_trip(world, codec).simulate_day()
+
+def test_manifest_records_run_metadata(ps, world):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('meta')
+   info = manager.checkpoint_info(manager.checkpoints[-1])
+   assert info['kind'] == 'full'
+   assert info['day'] == world.current_day
+   assert info['seed'] == 7
+   assert info['population'] == len(world.people)
+   assert info['config']['INITIAL_POPULATION'] == 150
+   assert set(info['config']) == set(ps.SIMULATION_PARAMETERS)
+
+def test_verify_flags_corrupted_table(ps, world):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('sound')
+   name = manager.checkpoints[-1]
+   assert manager.verify_checkpoint(name) == []
+
+   table = os.path.join(manager.checkpoint_dir, name, 'people.bin')
+   with open(table, 'r+b') as f:
+      f.seek(os.path.getsize(table) // 2)
+      byte = f.read(1)
+      f.seek(-1, os.SEEK_CUR)
+      f.write(bytes([byte[0] ^ 0xFF]))
+   problems = manager.verify_checkpoint(name)
+   assert problems and all(p.startswith('people') for p in problems)
+
+def test_loads_pickled_baseline_checkpoint(ps, world):
+   state = {'day': world.current_day, 'people': world.people, 'companies': world.companies,
+            'buildings': world.buildings, 'memes': world.memes, 'market': world.market,
+            'political_system': world.political_system, 'stats': world.stats, 'grid': world.grid}
+   os.makedirs(ps.CHECKPOINT_DIR, exist_ok=True)
+   with open(os.path.join(ps.CHECKPOINT_DIR, 'old_20200101_000000.checkpoint'), 'wb') as f:
+      f.write(zlib.compress(pickle.dumps(state)))
+
+   restored = ps.World()  # as the command line does before loading
+   assert ps.CheckpointManager(restored).load_checkpoint('old_20200101_000000.checkpoint')
+   assert set(restored.people) == set(world.people)
+   assert len(restored.genealogy.node_of) == len(world.people)
+   assert restored.death_archive.count == 0
+   restored.simulate_day()
+
+def test_close_flushes_background_saves(ps, world, load_latest, world_fingerprint):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('early', background=True)
+   expected = world_fingerprint(world)
+   world.simulate_day()  # the snapshot is detached from later changes
+   manager.save_checkpoint('late', background=True)
+   manager.close()
+
+   assert manager.writer is None
+   assert [c.split('_')[0] for c in manager.checkpoints] == ['early', 'late']
+   assert not [f for f in os.listdir(manager.checkpoint_dir) if f.endswith('.partial')]
+   assert world_fingerprint(load_latest('early')) == expected
+   assert world_fingerprint(load_latest('late')) == world_fingerprint(world)
@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+
+
+def ties(world, person_id):
+   """Current {partner id: strength} of one person."""
+   graph = world.relationships
+   row = world.population.index[person_id]
+   graph._refresh(row, world.current_day)
+   return {world.population.ids[other]: float(weight)
+           for other, weight in zip(graph.partner[row], graph.weight[row]) if other >= 0}
+
+def cell_ids(world):
+   return [pid for cell in world.grid.flat for pid in cell['people']]
+
+def test_compaction_keeps_survivors_and_purges_the_dead(ps, world):
+   people = list(world.people.values())
+   rng = random.Random(38)
+   for _ in range(400):  # a dense web of ties across the whole population
+      a, b = rng.sample(people, 2)
+      world.relationships.strengthen(a.id, b.id, rng.uniform(5, 60), world.current_day)
+   meme = ps.Meme(people[0], world.population, 'compaction')
+   world.memes[meme.id] = meme
+   for person in people[::2]:
+      meme.carriers.add(person.id)
+   for person in people[1::3]:
+      meme.immunity.add(person.id)
+
+   dead = {p.id for p in rng.sample(people, len(people) // 2)}
+   survivors = [p for p in people if p.id not in dead]
+   expected_ties = {p.id: {other: w for other, w in ties(world, p.id).items() if other not in dead}
+                    for p in survivors}
+   expected_carriers = {pid for pid in meme.carriers if pid not in dead}
+   expected_immunity = {pid for pid in meme.immunity if pid not in dead}
+   assert dead & set(meme.carriers) and any(len(t) < len(ties(world, pid)) for pid, t in expected_ties.items())
+
+   for person in people:
+      if person.id in dead:
+         person.is_alive = False
+         world.bury_person(person)
+   tombstones = list(world.population.tombstones)
+   world.compact()
+
+   assert not world.population.tombstones and not world.graveyard
+   assert set(tombstones) <= set(world.population.free_rows)
+   for person in survivors:
+      assert ties(world, person.id) == expected_ties[person.id]
+      assert not any(key.startswith('child_') and value in dead for key, value in person.family.items())
+   assert set(meme.carriers) == expected_carriers
+   assert set(meme.immunity) == expected_immunity
+
+   ids = cell_ids(world)
+   assert not dead & set(ids)
+   assert sorted(ids) == sorted(p.id for p in survivors)
+
+   # Newcomers reuse the recycled rows without inheriting anything from the dead
+   newcomers = [ps.Person() for _ in range(len(tombstones))]
+   for newcomer in newcomers:
+      world.add_person(newcomer)
+   rows = world.population.rows(newcomers)
+   assert set(rows.tolist()) == set(tombstones)
+   assert all(not ties(world, newcomer.id) for newcomer in newcomers)
+   assert not meme.carriers.fit()[rows].any() and not meme.immunity.fit()[rows].any()
+   for person in survivors:
+      assert ties(world, person.id) == expected_ties[person.id]
+   np.testing.assert_array_equal(world.population.live[rows], True)
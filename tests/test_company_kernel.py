@@ -0,0 +1,75 @@
+import random
+
+def scalar_company_update(ps, world, companies):
+   """The per-company update the kernel replaced: produce, pay_salaries, bankruptcy, investment."""
+   sell_orders = []
+   for company in companies:
+      company.ensure_financial_params()
+      region = company.location.region
+      params = world.get_cultural_params(region)
+      pressure = 1 + world.region_stats.get(region, {}).get('company_density', 0.0) * 2
+      raw_cost = params['competition_cost'] * len(company.employees) * pressure
+      if company.capital > 0:
+         company.capital -= min(raw_cost, company.capital * ps.COMPANY_COMPETITION_CAPITAL_FRACTION + raw_cost * 0.1)
+      else:
+         company.capital -= raw_cost * 0.1
+
+      if company.employees and company.capital > 0:
+         innovation_cost = params['innovation_cost'] * len(company.employees)
+         if company.capital > innovation_cost:
+            company.capital -= innovation_cost
+            boost = innovation_cost / max(1, len(company.employees)) * 5
+            for employee in random.sample(company.employees, min(3, len(company.employees))):
+               employee.apply_training_boost(boost)
+
+      if company.employees:
+         products = [(world.market.get_price(n) * efficiency, n) for n, efficiency in company.product_menu()]
+         if products:
+            if company.production_targets:
+               products = [p for p in products if p[1] in company.production_targets] or products
+            best = max(products)[1]
+            produced = company.produce(best, len(company.employees) * 10)
+            if produced > 0:
+               sell_orders.append((best, produced, world.market.get_price(best) * (1 - ps.MARKET_FRICTION), company.id))
+         company.pay_salaries()
+         buffer_target = company.total_salary_bill() * params['hiring_capital_days']
+         if company.capital < buffer_target * 0.6:
+            world._seek_investment(company, params, buffer_target - company.capital)
+      company.update_financial_distress()
+   return sell_orders
+
+def snapshot(world):
+   companies = {cid: (round(c.capital, 6), c.distress_days, round(c.reputation, 6), c.is_bankrupt,
+                      round(c.payroll, 6), sorted(e.id for e in c.employees),
+                      sorted((n, round(q, 6)) for n, q in c.inventory.items()))
+                for cid, c in world.companies.items()}
+   people = {pid: (round(p.resources, 6), p.salary, sorted(p.learning_progress.items()), sorted(p.known_primes))
+             for pid, p in world.people.items()}
+   return companies, people
+
+def test_kernel_matches_per_company_update(ps, world, load_latest, monkeypatch):
+   investments = []
+   monkeypatch.setattr(ps.World, '_seek_investment',
+                       lambda self, company, params, need: investments.append((company.id, round(need, 6))))
+   monkeypatch.setattr(ps.random, 'shuffle', lambda items: None)  # layoffs in roster order on both paths
+   for i, company in enumerate(world.companies.values()):  # founding order; ids are unseeded uuids
+      company.capital = (1.0, -1e4, company.capital, 5e4)[i % 4]
+      company.distress_days = 3
+   ps.CheckpointManager(world).save_checkpoint('kernel')
+
+   results = []
+   for update in (lambda w, active: w._process_company_kernel(active),
+                  lambda w, active: scalar_company_update(ps, w, active)):
+      copy = load_latest('kernel')
+      active = [c for c in copy.companies.values() if not c.is_bankrupt]
+      random.seed(11)
+      investments.clear()
+      orders = [(n, round(q, 6), round(price, 6), trader) for n, q, price, trader in update(copy, active)]
+      results.append((orders, list(investments), snapshot(copy)))
+
+   kernel, scalar = results
+   assert kernel == scalar
+   companies = kernel[2][0]
+   assert any(state[3] for state in companies.values()), "no bankruptcy exercised"
+   assert kernel[0], "no production exercised"
+   assert kernel[1], "no investment round exercised"
@@ -0,0 +1,57 @@
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+def test_apply_config_ignores_non_parameters(ps):
+   columns, log_file, archive = ps.PERSON_FLOAT_COLUMNS, ps.LOG_FILE, ps.ENABLE_DEATH_ARCHIVE
+   changed = ps.apply_config({'PERSON_FLOAT_COLUMNS': [], 'LOG_FILE': '/tmp/elsewhere.log',
+                              'ENABLE_DEATH_ARCHIVE': not archive, 'NOT_A_SETTING': 1})
+   assert changed == []
+   assert ps.PERSON_FLOAT_COLUMNS == columns
+   assert ps.LOG_FILE == log_file
+   assert ps.ENABLE_DEATH_ARCHIVE == archive
+
+def test_apply_config_coerces_and_rejects(ps):
+   assert ps.apply_config({'MIGRATION_BASE_RATE': 1}) == ['MIGRATION_BASE_RATE']
+   assert ps.MIGRATION_BASE_RATE == 1.0 and isinstance(ps.MIGRATION_BASE_RATE, float)
+
+   assert ps.apply_config({'MIGRATION_BASE_RATE': 'abc', 'INITIAL_POPULATION': 2.5}) == []
+   assert ps.MIGRATION_BASE_RATE == 1.0
+   assert ps.INITIAL_POPULATION == 150
+
+def test_coerce_parameter(ps):
+   assert ps.coerce_parameter('INITIAL_POPULATION', 200.0) == 200
+   with pytest.raises(ValueError):
+      ps.coerce_parameter('PERSON_FLOAT_COLUMNS', [])
+   with pytest.raises(ValueError):
+      ps.coerce_parameter('MIGRATION_BASE_RATE', True)
+
+def test_tampered_manifest_cannot_change_schema(ps, world, world_fingerprint, load_latest, round_trip):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('tampered')
+   path = os.path.join(manager.checkpoint_dir, manager.checkpoints[-1], 'manifest.json')
+   with open(path) as f:
+      manifest = json.load(f)
+   manifest['config']['PERSON_FLOAT_COLUMNS'] = []
+   with open(path, 'w') as f:
+      json.dump(manifest, f)
+
+   restored = load_latest('tampered')
+   assert ps.PERSON_FLOAT_COLUMNS
+   assert world_fingerprint(restored) == world_fingerprint(world)
+   round_trip(restored, 'resaved')
+
+def test_resume_is_bit_identical(ps, world, world_fingerprint, load_latest):
+   ps.CheckpointManager(world).save_checkpoint('resume')
+   for _ in range(4):
+      world.simulate_day()
+
+   random.seed(999)
+   np.random.seed(999)
+   restored = load_latest('resume')
+   for _ in range(4):
+      restored.simulate_day()
+   assert world_fingerprint(restored) == world_fingerprint(world)
@@ -0,0 +1,83 @@
+import os
+import threading
+
+def test_delta_restores_world(ps, world, round_trip):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('base')
+   for _ in range(3):
+      world.simulate_day()
+   restored = round_trip(world, 'changes', manager, delta=True)
+   restored.simulate_day()
+
+   name = manager.checkpoints[-1]
+   info = manager.checkpoint_info(name)
+   assert info['kind'] == 'delta'
+   assert info['base'].startswith('base')
+   assert manager.verify_checkpoint(name) == []
+
+def test_delta_without_base_saves_full(ps, world):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('lonely', delta=True)
+   assert manager.checkpoint_info(manager.checkpoints[-1])['kind'] == 'full'
+
+def test_delta_with_missing_base_is_flagged(ps, world):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('base')
+   world.simulate_day()
+   manager.save_checkpoint('changes', delta=True)
+   base = [c for c in manager.checkpoints if c.startswith('base')][0]
+   os.rename(os.path.join(manager.checkpoint_dir, base), os.path.join(manager.checkpoint_dir, 'moved'))
+   assert any('missing' in problem for problem in manager.verify_checkpoint(manager.checkpoints[-1]))
+
+def test_queued_delta_on_failed_base_is_dropped(ps, world, monkeypatch):
+   monkeypatch.setattr(ps, 'DELTA_CHECKPOINT_FREQUENCY', 1)
+   write = ps.WorldCheckpoint.write
+   release = threading.Event()
+   attempts = []
+   def failing_base(path, *args, **kwargs):
+      attempts.append(os.path.basename(path))
+      if os.path.basename(path).startswith('base'):
+         release.wait(10)  # hold the writer until the delta is queued behind the base
+         raise OSError('disk full')
+      return write(path, *args, **kwargs)
+   monkeypatch.setattr(ps.WorldCheckpoint, 'write', staticmethod(failing_base))
+
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('base', background=True)
+   world.simulate_day()
+   manager.save_checkpoint('changes', background=True, delta=True)
+   release.set()
+   writer = manager.writer
+   manager.close()
+
+   assert [a.split('_')[0] for a in attempts] == ['base']
+   assert writer.metrics['failed'] == 2 and writer.metrics['written'] == 0
+   assert manager.checkpoints == [] and manager.delta_base is None
+   assert os.listdir(manager.checkpoint_dir) == []
+   manager.save_checkpoint('next', delta=True)  # nothing to build on any more
+   assert manager.checkpoint_info(manager.checkpoints[-1])['kind'] == 'full'
+
+def test_delta_restores_genealogy(ps, world, round_trip):
+   manager = ps.CheckpointManager(world)
+   manager.save_checkpoint('base')
+   for _ in range(10):
+      world.simulate_day()
+   for person in list(world.people.values())[:10]:
+      person.is_alive = False
+      world.bury_person(person)
+   assert world.stats['births']
+   restored = round_trip(world, 'changes', manager, delta=True)
+
+   original, copy = world.genealogy, restored.genealogy
+   assert copy.size == original.size
+   assert copy.node_of == original.node_of
+   assert list(copy.founder_ids.items()) == list(original.founder_ids.items())
+   for key in ('parent1', 'parent2', 'generation', 'alive'):
+      assert (getattr(copy, key)[:copy.size] == getattr(original, key)[:original.size]).all()
+   expected = original.dynasty_stats(world.people)
+   for key, values in copy.dynasty_stats(restored.people).items():
+      assert (values == expected[key]).all()
+
+   base, delta = (os.path.join(manager.checkpoint_dir, [c for c in manager.checkpoints if c.startswith(label)][-1],
+                               'genealogy.bin') for label in ('base', 'changes'))
+   assert os.path.getsize(delta) < os.path.getsize(base)
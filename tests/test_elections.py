@@ -0,0 +1,83 @@
+import random
+from collections import defaultdict
+
+import numpy as np
+
+
+def voter_decision(ps, voter, candidates):
+   """Per-voter ballot as the simulator scored it before elections were vectorized."""
+   best_candidate = None
+   best_score = -float('inf')
+   for candidate in candidates:
+      trait_alignment = sum(-abs(voter.traits[t] - candidate.traits[t]) / 200 for t in ps.Trait)
+      score = trait_alignment + candidate.charisma / 100 + random.uniform(-0.2, 0.2)
+      if score > best_score:
+         best_score = score
+         best_candidate = candidate
+   if best_score < -0.5 or random.random() < ps.ELECTION_ABSTENTION_RATE:
+      return None
+   return best_candidate
+
+def scalar_votes(ps, voters):
+   votes = defaultdict(int)
+   for voter in voters:
+      choice = voter_decision(ps, voter, voters)
+      if choice:
+         votes[choice.id] += 1
+   return votes
+
+def test_constituency_winner_matches_per_voter_scoring(ps, world, monkeypatch):
+   # Everyone in the constituency stands and nothing is left to chance, so both
+   # scorings see the same ballot and must agree on the winner.
+   monkeypatch.setattr(ps, 'ELECTION_VOTERS_PER_CANDIDATE', 1)
+   monkeypatch.setattr(ps, 'ELECTION_ABSTENTION_RATE', 0.0)
+   monkeypatch.setattr(ps.np.random, 'uniform', lambda low, high, size=None: np.zeros(size))
+   monkeypatch.setattr(random, 'uniform', lambda low, high: 0.0)
+
+   adults = [p for p in world.people.values() if p.is_alive and p.age >= 18 * 365]
+   home = ps.Location(0, 0, 9, 9)
+   for person in adults:
+      if (person.location.region, person.location.district,
+          person.location.cell_x, person.location.cell_y) == (0, 0, 9, 9):
+         person.location = ps.Location(0, 0, 8, 9)
+   label = '0.0.9.9'
+
+   rng = random.Random(30)
+   decided = 0
+   for trial in range(40):
+      size = rng.randint(ps.ELECTION_MIN_VOTERS, ps.ELECTION_MAX_CANDIDATES)
+      constituency = rng.sample(adults, size)
+      spread = rng.choice((5, 15, 40))
+      centre = rng.uniform(20, 80)
+      for person in constituency:
+         person.location = home
+         for trait in ps.Trait:
+            person.traits[trait] = min(100.0, max(0.0, centre + rng.uniform(-spread, spread)))
+         person.charisma = rng.uniform(0, 100)
+
+      votes = scalar_votes(ps, constituency)
+      ranked = sorted(votes.values(), reverse=True)
+      if len(ranked) > 1 and ranked[0] == ranked[1]:
+         for person in constituency:
+            person.location = ps.Location(0, 0, 8, 9)
+         continue  # tie-breaking order differs; only decisive ballots are comparable
+      decided += 1
+
+      politics = ps.PoliticalSystem()
+      politics.hold_election('block', world)
+      assert politics.offices['block'][label] == max(votes, key=votes.get)
+      for person in constituency:
+         person.location = ps.Location(0, 0, 8, 9)
+
+   assert decided >= 20
+
+def test_small_constituencies_hold_no_election(ps, world):
+   adults = [p for p in world.people.values() if p.is_alive and p.age >= 18 * 365]
+   for person in adults:
+      person.location = ps.Location(1, 0, 0, 0)
+   for person in adults[:ps.ELECTION_MIN_VOTERS - 1]:
+      person.location = ps.Location(0, 0, 9, 9)
+   politics = ps.PoliticalSystem()
+   politics.hold_election('block', world)
+   assert '0.0.9.9' not in politics.offices['block']
+   assert politics.offices['block'].get('1.0.0.0') in {p.id for p in adults}
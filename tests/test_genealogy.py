@@ -0,0 +1,80 @@
+import random
+import uuid
+from types import SimpleNamespace
+
+def make_person(birth_day, parent1=None, parent2=None, resources=0.0, primes=()):
+   family = {key: value for key, value in (('parent1', parent1), ('parent2', parent2)) if value}
+   return SimpleNamespace(id=str(uuid.uuid4()), family=family, birth_day=birth_day,
+                          age=100 - birth_day, resources=resources, known_primes=set(primes))
+
+def by_founder(index, stats):
+   return {person_id: (int(stats['descendants'][node]), float(stats['wealth'][node]),
+                       float(stats['avg_knowledge'][node]))
+           for node, person_id in index.founder_ids.items()}
+
+def three_generations(ps):
+   """Founders A, B and E; C is the child of A and B, D the child of C and E."""
+   a, b, e = make_person(0, resources=1.0), make_person(0, resources=2.0), make_person(10, resources=4.0, primes=(2,))
+   c = make_person(20, a.id, b.id, resources=8.0, primes=(2, 3))
+   d = make_person(40, c.id, e.id, resources=16.0, primes=(2, 3, 5, 7))
+   index = ps.GenealogyIndex(capacity=2)
+   for person in (a, b, e, c, d):
+      index.add(person)
+   return index, {p.id: p for p in (a, b, e, c, d)}, (a, b, c, d, e)
+
+def test_descendants_follow_both_parents(ps):
+   index, people, (a, b, c, d, e) = three_generations(ps)
+   stats = by_founder(index, index.dynasty_stats(people))
+   assert set(stats) == {a.id, b.id, e.id}
+   assert stats[a.id] == (2, 1.0 + 8.0 + 16.0, (0 + 2 + 4) / 3)
+   assert stats[b.id] == (2, 2.0 + 8.0 + 16.0, (0 + 2 + 4) / 3)
+   assert stats[e.id] == (1, 4.0 + 16.0, (1 + 4) / 2)
+   assert index.dynasty_stats(people)['descendants'][index.node_of[c.id]] == -1
+
+def test_dead_count_as_descendants_but_not_wealth(ps):
+   index, people, (a, b, c, d, e) = three_generations(ps)
+   index.mark_dead(c.id)
+   del people[c.id]
+   people['stranger'] = make_person(50, resources=1000.0)  # never added to the index
+   stats = by_founder(index, index.dynasty_stats(people))
+   assert stats[a.id] == (2, 1.0 + 16.0, (0 + 4) / 2)
+   assert stats[e.id] == (1, 4.0 + 16.0, (1 + 4) / 2)
+
+def test_from_people_matches_live_index(ps):
+   index, people, _ = three_generations(ps)
+   shuffled = dict(reversed(list(people.items())))
+   rebuilt = ps.GenealogyIndex.from_people(shuffled)
+   assert sorted(rebuilt.founder_ids.values()) == sorted(index.founder_ids.values())
+   assert by_founder(rebuilt, rebuilt.dynasty_stats(people)) == by_founder(index, index.dynasty_stats(people))
+
+def brute_force_descendants(people):
+   children = {p.id: [] for p in people}
+   for p in people:
+      for parent in set(p.family.values()):
+         children[parent].append(p.id)
+   counts = {}
+   for p in people:
+      if 'parent1' in p.family:
+         continue
+      seen, stack = set(), [p.id]
+      while stack:
+         for child in children[stack.pop()]:
+            if child not in seen:
+               seen.add(child)
+               stack.append(child)
+      counts[p.id] = len(seen)
+   return counts
+
+def test_many_founders_across_blocks(ps, monkeypatch):
+   monkeypatch.setattr(ps.GenealogyIndex, 'STATS_SCRATCH_BYTES', 4096)  # several founder blocks
+   rng = random.Random(3)
+   people = [make_person(0) for _ in range(150)]
+   for day in range(1, 400):
+      mother, father = rng.sample(people, 2)
+      people.append(make_person(day, mother.id, father.id if rng.random() < 0.7 else None))
+   index = ps.GenealogyIndex()
+   for person in people:
+      index.add(person)
+   stats = index.dynasty_stats({p.id: p for p in people})
+   expected = brute_force_descendants(people)
+   assert {index.founder_ids[node]: int(stats['descendants'][node]) for node in index.founder_ids} == expected
@@ -0,0 +1,77 @@
+import json
+import os
+from collections import defaultdict
+
+import pytest
+
+@pytest.fixture
+def journal(ps, tmp_path):
+   directory = str(tmp_path / 'events')
+   ps.event_journal.open(directory)
+   return directory
+
+def test_journal_records_events(ps, journal):
+   world = ps.World()
+   for _ in range(5):
+      world.simulate_day()
+   person = next(iter(world.people.values()))
+   world.bury_person(person)
+
+   with open(os.path.join(journal, 'schema.json')) as f:
+      schema = json.load(f)
+   assert list(schema['kinds']) == list(ps.EVENT_KINDS)
+
+   records = list(ps.event_journal.reader())
+   counts = ps.EventJournalReader(journal).counts()
+   assert sum(counts.values()) == len(records) == ps.event_journal.count
+   assert counts['hire'] >= len(world.companies)
+   assert counts['founding'] >= len(world.companies)
+   assert records[-1]['kind'] == 'death'
+   assert records[-1]['subject'] == person.id
+   assert records[-1]['day'] == world.current_day
+   assert all(a['day'] <= b['day'] for a, b in zip(records, records[1:]))
+
+def test_kinds_filter(ps, journal):
+   world = ps.World()
+   world.simulate_day()
+   reader = ps.event_journal.reader()
+   hires = list(ps.EventJournalReader(journal, kinds=['hire']))
+   assert hires and all(record['kind'] == 'hire' for record in hires)
+   assert len(hires) == reader.counts()['hire']
+   assert list(ps.EventJournalReader(journal, kinds=['hire', 'fire'], batch_size=7)) == \
+      [record for record in reader if record['kind'] in ('hire', 'fire')]
+
+def test_journal_rotates_parts(ps, journal, monkeypatch):
+   monkeypatch.setattr(ps, 'EVENT_JOURNAL_BATCH', 16)
+   monkeypatch.setattr(ps, 'EVENT_JOURNAL_ROTATE_BYTES', 64 * ps.EVENT_RECORD_DTYPE.itemsize)
+   world = ps.World()
+   for _ in range(3):
+      world.simulate_day()
+   ps.event_journal.flush()
+
+   parts = sorted(name for name in os.listdir(journal) if name.startswith('part_'))
+   assert len(parts) > 1
+   assert sum(len(list(ps.EventJournalReader(os.path.join(journal, name)))) for name in parts) == \
+      ps.event_journal.count == len(list(ps.EventJournalReader(journal)))
+
+def test_hires_and_fires_replay_rosters(ps, journal):
+   world = ps.World()
+   for _ in range(8):
+      world.simulate_day()
+   for person in world.people.values():
+      person.happiness = 0
+   ps.ExperimentalFeatures.enable_migration(world)
+
+   rosters = defaultdict(set)
+   for record in ps.event_journal.reader():
+      if record['kind'] == 'hire':
+         rosters[record['other']].add(record['subject'])
+      elif record['kind'] == 'fire':
+         rosters[record['other']].discard(record['subject'])
+   for company in world.companies.values():
+      assert rosters[company.id] == {employee.id for employee in company.employees}
+
+def test_closed_journal_records_nothing(ps, journal):
+   ps.event_journal.close()
+   ps.event_journal.record('birth', None)
+   assert not ps.event_journal.pending
@@ -0,0 +1,68 @@
+import pytest
+
+def payroll_consistent(company):
+   return company.payroll == pytest.approx(sum(e.salary for e in company.employees))
+
+@pytest.fixture
+def market(world):
+   for company in world.companies.values():
+      company.capital = 1e6
+   world.labor_market.post_vacancies()
+   return world.labor_market
+
+def adults_without_work(world):
+   return [p for p in world.people.values() if p.is_alive and p.age >= 16 * 365 and not p.employer]
+
+def test_vacancies_are_ranked_by_offer(world, market):
+   offers = [v.max_offer for v in market.all_vacancies]
+   assert offers == sorted(offers, reverse=True)
+   assert {v.company.id for v in market.all_vacancies} <= set(world.companies)
+   for region, vacancies in market.vacancies_by_region.items():
+      assert all(v.company.location.region == region for v in vacancies)
+
+def test_matching_hires_within_openings_and_budget(world, market):
+   vacancies = {v.company.id: v for v in market.all_vacancies}
+   before = {cid: (v.openings, v.budget, len(v.company.employees)) for cid, v in vacancies.items()}
+   candidates = adults_without_work(world)
+   hires = market.match(candidates)
+
+   assert hires > 0
+   assert hires == sum(1 for p in candidates if p.employer)
+   for cid, vacancy in vacancies.items():
+      openings, budget, staff = before[cid]
+      hired = [e for e in vacancy.company.employees if e in candidates]
+      assert len(vacancy.company.employees) == staff + len(hired)
+      assert vacancy.openings == openings - len(hired) >= 0
+      assert vacancy.budget == pytest.approx(budget - sum(e.salary for e in hired))
+   for company in world.companies.values():
+      assert payroll_consistent(company)
+      assert all(e.employer is company for e in company.employees)
+
+def test_filled_vacancies_leave_the_index(world, market):
+   region, vacancies = next(iter(market.vacancies_by_region.items()))
+   for vacancy in vacancies:
+      vacancy.openings = 0
+   assert market._open_vacancies(vacancies, None) == []
+   assert not vacancies
+
+def test_fired_worker_reenters_market(world, market):
+   company = max(world.companies.values(), key=lambda c: len(c.employees))
+   worker = next(iter(company.employees))
+   company.fire(worker)
+   assert worker.employer is None and worker.salary == 0
+   assert worker not in company.employees
+   assert payroll_consistent(company)
+
+   market.post_vacancies()
+   assert market.match([worker]) == 1
+   assert worker.employer is not None and worker.salary > 0
+   assert worker in worker.employer.employees
+   assert payroll_consistent(worker.employer)
+   assert worker.last_job_change_day == world.current_day
+
+def test_payroll_stays_consistent_over_days(world):
+   for _ in range(3):
+      world.simulate_day()
+      for company in world.companies.values():
+         assert payroll_consistent(company)
+         assert all(e.employer is company for e in company.employees)
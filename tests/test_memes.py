@@ -0,0 +1,95 @@
+import random
+
+import numpy as np
+import pytest
+
+
+def spread(ps, meme, person, draw):
+   """One spread attempt as the simulator made it before memes were vectorized."""
+   compatibility = sum(0.1 for trait, effect in meme.trait_effects.items() if effect * person.traits[trait] > 0)
+   if draw < ps.MEME_SPREAD_BASE_RATE * meme.transmissibility * (1 + compatibility):
+      meme.carriers.add(person.id)
+      meme.total_infections += 1
+      for trait, effect in meme.trait_effects.items():
+         person.traits[trait] = max(-100, min(100, person.traits[trait] + effect))
+
+def snapshot(world, meme):
+   return (sorted(meme.carriers), sorted(meme.immunity), meme.total_infections,
+           world.population.traits[:len(world.population.ids)].copy())
+
+def test_spread_matches_per_person_adoption(ps, world, load_latest):
+   creator = next(iter(world.people.values()))
+   meme = ps.Meme(creator, world.population, 'seeded')
+   meme.transmissibility = 0.9
+   world.memes[meme.id] = meme
+   people = list(world.people.values())
+   for person in random.Random(33).sample(people, 40):
+      meme.carriers.add(person.id)
+   for person in random.Random(34).sample(people, 20):
+      meme.immunity.add(person.id)
+   carriers = len(meme.carriers)
+   ps.CheckpointManager(world).save_checkpoint('memes')
+
+   targets = random.Random(35).sample(people, 100)
+   eligible = [p for p in targets if p.id not in meme.carriers and p.id not in meme.immunity]
+   draws = np.random.RandomState(36).random_sample(len(eligible))
+   for person, draw in zip(eligible, draws):
+      spread(ps, meme, person, draw)
+   expected = snapshot(world, meme)
+
+   world = load_latest('memes')
+   meme = next(iter(world.memes.values()))
+   np.random.seed(36)
+   adopted = meme.spread_to(world.population.rows([world.people[p.id] for p in targets]))
+   actual = snapshot(world, meme)
+
+   assert adopted == len(expected[0]) - carriers
+   assert 0 < adopted < len(eligible)
+   assert actual[:3] == expected[:3]
+   np.testing.assert_allclose(actual[3], expected[3], atol=1e-4)
+
+def test_repeated_contacts_adopt_once(ps, world):
+   creator = next(iter(world.people.values()))
+   meme = ps.Meme(creator, world.population, 'certain')
+   meme.transmissibility = 10.0  # every attempt succeeds
+   others = [p for p in world.people.values() if p is not creator][:10]
+   rows = world.population.rows(others)
+   before = world.population.traits[rows].copy()
+
+   assert meme.spread_to(np.repeat(rows, 3)) == len(others)
+   assert meme.spread_to(rows) == 0
+   assert meme.total_infections == 1 + len(others)
+   columns = [trait.column for trait in meme.trait_effects]
+   shifted = np.clip(before[:, columns] + np.array(list(meme.trait_effects.values()), dtype=np.float32), -100, 100)
+   np.testing.assert_allclose(world.population.traits[rows][:, columns], shifted)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_contacts_are_living_neighbours(ps, world, compact):
+   people = list(world.people.values())
+   rng = random.Random(36)
+   for person in people:  # one crowded district, so every source has neighbours to draw
+      world.move_person(person, ps.Location(0, 0, rng.randrange(10), rng.randrange(10)))
+   for person in random.Random(37).sample(people, len(people) // 2):
+      person.is_alive = False
+      world.bury_person(person)
+   if compact:
+      world.compact()
+   population = world.population
+   sources = population.rows(list(world.people.values()))
+
+   np.random.seed(38)
+   for _ in range(20):
+      contact_index = population.contact_index()
+      targets = population.sample_contacts(contact_index, sources, 5, ps.MEME_CONTACT_RADIUS)
+      assert len(targets)
+      assert population.live[targets].all()
+      assert {population.ids[row] for row in targets} <= set(world.people)
+
+   # Every contact is within the radius of someone in the same district
+   source_cells = population.cell[sources]
+   for row in np.unique(targets):
+      cell = population.cell[row]
+      near = ((source_cells // 100 == cell // 100) &
+              (np.abs(source_cells // 10 % 10 - cell // 10 % 10) <= ps.MEME_CONTACT_RADIUS) &
+              (np.abs(source_cells % 10 - cell % 10) <= ps.MEME_CONTACT_RADIUS))
+      assert near.any()
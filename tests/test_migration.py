@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+
+def baseline_top_regions(ps, world, current_region):
+   """Candidate destinations as the per-person migration loop ranked them."""
+   current_score = world._compute_region_opportunity_score(current_region)
+   region_scores = []
+   for region in range(ps.WORLD_REGIONS):
+      if region == current_region:
+         continue
+      score = world._compute_region_opportunity_score(region)
+      if score >= current_score + ps.MIGRATION_OPPORTUNITY_THRESHOLD:
+         region_scores.append((score, region))
+   region_scores.sort(reverse=True)
+   return [r for _, r in region_scores[:5]]
+
+@pytest.fixture
+def regions(ps, world):
+   """Seeded region stats drawn from a few values each, so many regions tie on score."""
+   rng = random.Random(36)
+   world.region_stats = {}
+   for region in range(ps.WORLD_REGIONS):
+      if rng.random() < 1 / 3:
+         continue
+      world.region_stats[region] = {
+         'avg_resources': rng.choice((0.0, 150.0, 600.0)), 'employment_rate': rng.choice((0.2, 0.5, 0.9)),
+         'avg_happiness': rng.choice((30.0, 70.0)), 'gini': rng.choice((0.2, 0.6)),
+         'starvation_rate': rng.choice((0.0, 0.3)), 'population': rng.choice((0, 150))}
+   world.memo.invalidate('opportunity')
+   return world
+
+def test_destinations_match_baseline_top_regions(ps, regions):
+   destinations, counts = regions._migration_destinations()
+   for region in range(ps.WORLD_REGIONS):
+      expected = baseline_top_regions(ps, regions, region)
+      assert destinations[region, :counts[region]].tolist() == expected
+      assert (destinations[region, counts[region]:] == -1).all()
+   assert counts.min() == 0 and counts.max() == ps.MIGRATION_TOP_REGIONS
+
+def test_movers_land_in_a_baseline_top_region(ps, regions, monkeypatch):
+   monkeypatch.setattr(ps, 'MIGRATION_BASE_RATE', 10.0)
+   adults = [p for p in regions.people.values() if p.is_alive]
+   origin = {}
+   for i, person in enumerate(adults):
+      regions.move_person(person, ps.Location(i % ps.WORLD_REGIONS, 0, 0, 0))
+      person.resources = 1e4
+      person.last_migration_day = -ps.MIGRATION_COOLDOWN_DAYS
+      origin[person.id] = person.location.region
+
+   regions._migrate(adults)
+   moved = 0
+   for person in adults:
+      top = baseline_top_regions(ps, regions, origin[person.id])
+      if person.location.region == origin[person.id]:
+         assert not top
+      else:
+         assert person.location.region in top
+         assert person.last_migration_day == regions.current_day
+         moved += 1
+   assert moved
@@ -0,0 +1,21 @@
+def brute_force_menu(ps, known_primes):
+   return [(n, ps.calculate_efficiency(n)) for n in range(2, ps.COMPANY_MAX_PRODUCT + 1)
+           if set(ps.factorize(n)) <= set(known_primes)]
+
+def test_menu_matches_factorization(ps):
+   assert ps.get_product_menu({2, 3}) == brute_force_menu(ps, {2, 3})
+   assert ps.get_product_menu(set()) == []
+
+def test_menus_follow_max_product(ps, world, monkeypatch):
+   company = max(world.companies.values(), key=lambda c: len(c.collective_knowledge))
+   full = company.product_menu()
+   assert full == brute_force_menu(ps, company.collective_knowledge)
+
+   limit = ps.COMPANY_MAX_PRODUCT
+   monkeypatch.setattr(ps, 'COMPANY_MAX_PRODUCT', 11)
+   assert ps.get_product_menu(company.collective_knowledge) == brute_force_menu(ps, company.collective_knowledge)
+   assert company.product_menu() == brute_force_menu(ps, company.collective_knowledge)
+   assert all(n <= 11 for n, _ in company.product_menu())
+
+   monkeypatch.setattr(ps, 'COMPANY_MAX_PRODUCT', limit)
+   assert company.product_menu() == full
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+
+def living_ids(world, count):
+   return [p.id for p in world.people.values() if p.is_alive][:count]
+
+def ties(graph, agent_id, day):
+   """Current {partner id: strength} of one person."""
+   row = graph.population.index[agent_id]
+   graph._refresh(row, day)
+   return {graph.population.ids[other]: float(weight)
+           for other, weight in zip(graph.partner[row], graph.weight[row]) if other >= 0}
+
+def test_full_row_evicts_weakest_tie(ps, world):
+   graph = ps.RelationshipGraph(world.population, degree_cap=4)
+   me, *others = living_ids(world, 7)
+   for other, strength in zip(others, (30.0, -2.0, 50.0, 10.0)):
+      graph.strengthen(me, other, strength, day=0)
+   assert ties(graph, me, 0) == {others[0]: 30.0, others[1]: -2.0, others[2]: 50.0, others[3]: 10.0}
+
+   graph.strengthen(me, others[4], 5.0, day=0)  # |-2| is the weakest, not the most negative
+   assert ties(graph, me, 0) == {others[0]: 30.0, others[4]: 5.0, others[2]: 50.0, others[3]: 10.0}
+
+   graph.strengthen(me, others[2], 60.0, day=0)  # an existing tie is updated in place and clamped
+   assert ties(graph, me, 0)[others[2]] == 100.0
+   assert len(ties(graph, me, 0)) == 4
+   assert graph.best_partner(me, 0) == (others[2], 100.0)
+
+def test_lazy_decay_matches_daily_decay(ps, world):
+   ids = living_ids(world, 40)
+   graph = ps.RelationshipGraph(world.population)
+   eager = {agent: {} for agent in ids}
+   rng = random.Random(31)
+   pruned = 0
+   for day in range(120):
+      for agent in ids:  # the reference decays every tie every day
+         before = len(eager[agent])
+         eager[agent] = {other: w * (1 - ps.RELATIONSHIP_DECAY) for other, w in eager[agent].items()
+                         if abs(w * (1 - ps.RELATIONSHIP_DECAY)) >= ps.RELATIONSHIP_PRUNE_THRESHOLD}
+         pruned += before - len(eager[agent])
+      for _ in range(rng.randint(0, 30)):
+         agent, other = rng.sample(ids, 2)
+         delta = rng.uniform(-20, 40)
+         eager[agent][other] = max(-100.0, min(100.0, eager[agent].get(other, 0.0) + delta))
+         graph.strengthen(agent, other, delta, day)
+
+   day = 120
+   eager = {agent: {other: w * (1 - ps.RELATIONSHIP_DECAY) for other, w in row.items()
+                    if abs(w * (1 - ps.RELATIONSHIP_DECAY)) >= ps.RELATIONSHIP_PRUNE_THRESHOLD}
+            for agent, row in eager.items()}
+   assert pruned and sum(map(len, eager.values())) > len(ids)  # ties both decayed away and survived
+   rows = world.population.rows([world.people[agent] for agent in ids])
+   partner_rows, strengths = graph.best_partners(rows, day)
+   for agent, partner_row, strength in zip(ids, partner_rows, strengths):
+      expected = eager[agent]
+      assert ties(graph, agent, day) == pytest.approx(expected, rel=1e-4)
+      assert graph.average_strength(agent, day) == pytest.approx(
+         sum(expected.values()) / max(1, len(expected)), rel=1e-4, abs=1e-6)
+      if expected:
+         best = max(expected, key=expected.get)
+         assert world.population.ids[partner_row] == best
+         assert strength == pytest.approx(expected[best], rel=1e-4)
+      else:
+         assert partner_row == -1
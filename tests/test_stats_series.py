@@ -0,0 +1,48 @@
+import pickle
+
+import numpy as np
+import pytest
+
+def test_rolling_aggregates(ps):
+   series = ps.StatsSeries(range(10), capacity=4)
+   assert len(series) == series.total == 10
+   assert series.last() == 9.0
+   assert series.rolling_sum(3) == 24.0
+   assert series.rolling_mean(4) == pytest.approx(7.5)
+   assert series.rolling_mean(100) == pytest.approx(4.5)
+   assert ps.StatsSeries().rolling_mean(5) == 0.0
+
+def test_eviction_keeps_recent_samples(ps, monkeypatch, tmp_path):
+   monkeypatch.setattr(ps, 'STATS_MEMORY_DAYS', 32)
+   spill = str(tmp_path / 'spill' / 'population.bin')
+   series = ps.StatsSeries(spill_path=spill, capacity=8)
+   for value in range(100):
+      series.append(value)
+
+   assert series.total == 100
+   assert len(series) < 2 * 32  # evicted in batches once the buffer is full
+   assert len(list(series)) == len(series) == len(series.values)
+   assert series[len(series) - 1] == 99.0
+   assert series.days()[-1] == 99
+   assert series.values.tolist() == list(range(100 - len(series), 100))
+   assert series.rolling_sum(5) == sum(range(95, 100))
+   assert np.array_equal(series.history(), np.arange(100, dtype=np.float64))
+
+def test_eviction_without_spill_drops_samples(ps, monkeypatch):
+   monkeypatch.setattr(ps, 'STATS_MEMORY_DAYS', 16)
+   series = ps.StatsSeries(range(50), capacity=4)
+   assert series.total == 50
+   assert series.days()[0] == series.total - len(series)
+   assert series.history().tolist() == series.values.tolist()
+   assert series.rolling_mean(2) == 48.5
+
+def test_pickled_series_keeps_growing(ps):
+   empty = pickle.loads(pickle.dumps(ps.StatsSeries()))
+   for value in range(40):
+      empty.append(value)
+   assert empty.rolling_sum(40) == sum(range(40))
+
+   series = pickle.loads(pickle.dumps(ps.StatsSeries(range(5), capacity=64)))
+   series.append(5)
+   assert series.values.tolist() == list(range(6))
+   assert series.rolling_mean(2) == 4.5